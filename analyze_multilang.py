@@ -8,6 +8,10 @@ import csv
 from collections import defaultdict
 from typing import Dict, List
 
+from analyze_results import STANDARD_QUANTS, generate_curve_section, generate_skipped_section, load_skipped_models
+from pareto import generate_frontier_section, make_point
+from quant_types import model_family, quant_sort_key, quant_type
+
 LANGUAGES = {
     'en': 'English',
     'fr': 'French',
@@ -32,21 +36,20 @@ def load_and_parse_csv(filepath: str = 'test_results_multilang.csv') -> Dict[str
             # Parse fields
             row['response_time_seconds'] = float(row['response_time_seconds']) if row['response_time_seconds'] else 0
             row['model_size_mb'] = float(row['model_size_mb'])
-            row['correct_answer'] = row['correct_answer'] == 'TRUE'
-            row['success'] = row['success'] == 'TRUE'
+            # Python writes True, spreadsheets TRUE
+            row['correct_answer'] = row['correct_answer'].upper() == 'TRUE'
+            row['success'] = row['success'].upper() == 'TRUE'
+            # Token columns are only present in newer result files
+            row['prompt_tokens'] = int(row['prompt_tokens']) if row.get('prompt_tokens') else None
+            row['tokens_per_second'] = float(row['tokens_per_second']) if row.get('tokens_per_second') else None
+            row['steady_rss_mb'] = float(row['steady_rss_mb']) if row.get('steady_rss_mb') else None
 
             # Determine quantization
-            model_name = row['model_name']
-            if 'Q4_K_M' in model_name:
-                quant_type = 'Q4_K_M'
-            elif 'Q8_0' in model_name:
-                quant_type = 'Q8_0'
-            elif 'F16' in model_name:
-                quant_type = 'F16'
-            else:
+            quant = quant_type(row['model_name'])
+            if quant is None:
                 continue
 
-            results[quant_type].append(row)
+            results.setdefault(quant, []).append(row)
             results['ALL'].append(row)
 
     return results
@@ -58,7 +61,10 @@ def calculate_model_stats(data: List[Dict]) -> Dict:
         'correct': 0,
         'times': [],
         'size_mb': 0,
-        'languages': defaultdict(lambda: {'total': 0, 'correct': 0, 'times': []}),
+        'steady_rss_mb': None,
+        'tokens': 0,
+        'token_time': 0.0,
+        'languages': defaultdict(lambda: {'total': 0, 'correct': 0, 'times': [], 'tokens': 0, 'token_time': 0.0}),
         'domains': defaultdict(lambda: {'total': 0, 'correct': 0})
     })
 
@@ -67,11 +73,13 @@ def calculate_model_stats(data: List[Dict]) -> Dict:
             continue
 
         # Remove quantization suffix for grouping
-        model = row['model_name'].rsplit('-', 1)[0] if any(q in row['model_name'] for q in ['Q4_K_M', 'Q8_0', 'F16']) else row['model_name']
+        model = model_family(row['model_name'])
         stats = model_stats[model]
 
         stats['total'] += 1
         stats['size_mb'] = row['model_size_mb']
+        if row['steady_rss_mb'] is not None:
+            stats['steady_rss_mb'] = row['steady_rss_mb']
         stats['times'].append(row['response_time_seconds'])
 
         if row['correct_answer']:
@@ -81,6 +89,11 @@ def calculate_model_stats(data: List[Dict]) -> Dict:
         lang = row['language']
         stats['languages'][lang]['total'] += 1
         stats['languages'][lang]['times'].append(row['response_time_seconds'])
+        if row['prompt_tokens'] is not None:
+            stats['tokens'] += row['prompt_tokens']
+            stats['token_time'] += row['response_time_seconds']
+            stats['languages'][lang]['tokens'] += row['prompt_tokens']
+            stats['languages'][lang]['token_time'] += row['response_time_seconds']
         if row['correct_answer']:
             stats['languages'][lang]['correct'] += 1
 
@@ -94,10 +107,13 @@ def calculate_model_stats(data: List[Dict]) -> Dict:
     for model, stats in model_stats.items():
         stats['accuracy'] = (stats['correct'] / stats['total'] * 100) if stats['total'] > 0 else 0
         stats['avg_time'] = sum(stats['times']) / len(stats['times']) if stats['times'] else 0
+        # Aggregate throughput (total tokens / total time), not a mean of per-query rates
+        stats['tokens_per_second'] = stats['tokens'] / stats['token_time'] if stats['token_time'] > 0 else None
 
         for lang in stats['languages'].values():
             lang['accuracy'] = (lang['correct'] / lang['total'] * 100) if lang['total'] > 0 else 0
             lang['avg_time'] = sum(lang['times']) / len(lang['times']) if lang['times'] else 0
+            lang['tokens_per_second'] = lang['tokens'] / lang['token_time'] if lang['token_time'] > 0 else None
 
     return dict(model_stats)
 
@@ -109,6 +125,57 @@ def format_size(mb: float) -> str:
         return f"{mb/1000:.1f} GB"
     return f"{int(mb)} MB"
 
+def format_throughput(tokens_per_second: float) -> str:
+    return f"{tokens_per_second:,.0f} tok/s"
+
+def rank_by_throughput(stats: Dict, lang_code: str) -> List:
+    """Rank models by token-normalized throughput for one language."""
+    ranked = [(model, s['languages'][lang_code]) for model, s in stats.items()
+              if lang_code in s['languages'] and s['languages'][lang_code]['tokens_per_second']]
+    return sorted(ranked, key=lambda x: -x[1]['tokens_per_second'])
+
+def generate_throughput_section(stats: Dict, limit: int = 5) -> str:
+    """Per-language throughput rankings, or an empty string without token data."""
+    if not any(s['tokens_per_second'] for s in stats.values()):
+        return ""
+
+    section = "## Throughput by Language (Tokens/Second)\n\n"
+    section += "Latency normalized by server-side token counts, so languages that tokenize into more tokens are compared fairly.\n\n"
+    section += "| Language | Rank | Model | Throughput | Avg Time | Accuracy |\n"
+    section += "|----------|------|-------|------------|----------|----------|\n"
+
+    for lang_code, lang_name in sorted(LANGUAGES.items()):
+        for i, (model, ls) in enumerate(rank_by_throughput(stats, lang_code)[:limit], 1):
+            section += f"| {lang_name if i == 1 else ''} | {i} | {model} | {format_throughput(ls['tokens_per_second'])} | {format_time(ls['avg_time'])} | {ls['accuracy']:.0f}% |\n"
+
+    return section + "\n"
+
+def language_points(quant_stats: Dict, lang_code: str) -> List[Dict]:
+    """Pareto candidates for every model at every quantization, measured on one language."""
+    points = []
+    for quant in sorted(quant_stats, key=quant_sort_key):
+        for model, s in quant_stats[quant].items():
+            if lang_code in s['languages']:
+                lang = dict(s['languages'][lang_code], size_mb=s['size_mb'])
+                points.append(make_point(f"{model}-{quant}", lang, s['steady_rss_mb']))
+    return points
+
+def generate_pareto_report(quant_stats: Dict) -> str:
+    """Pareto frontier over all languages, then one per language."""
+    report = "# Multilingual Performance - Pareto Frontier\n\n"
+    report += "Models at every quantization, compared on p95 latency, throughput, memory and accuracy.\n"
+    report += "A model is listed as dominated when another is at least as good on all of them.\n\n"
+    overall = [make_point(f"{model}-{quant}", s)
+               for quant in sorted(quant_stats, key=quant_sort_key)
+               for model, s in quant_stats[quant].items()]
+    report += generate_frontier_section(overall, "All Languages")
+
+    report += "## Per Language\n\n"
+    for lang_code, lang_name in LANGUAGES.items():
+        report += generate_frontier_section(language_points(quant_stats, lang_code),
+                                            f"{lang_name} ({lang_code})", level="###")
+    return report
+
 def generate_quant_report(quant_type: str, stats: Dict, total_tests: int) -> str:
     """Generate report for a single quantization."""
 
@@ -176,6 +243,8 @@ def generate_quant_report(quant_type: str, stats: Dict, total_tests: int) -> str
         report += ", ".join([f"{m} ({ls['accuracy']:.0f}%)" for m, ls in top_lang])
         report += "\n\n"
 
+    report += generate_throughput_section(stats)
+
     # Multilingual consistency
     report += "## Multilingual Consistency\n\n"
     report += "Models performing well across ALL languages:\n\n"
@@ -274,7 +343,8 @@ This report compares multilingual performance across three quantization levels.
         for model, s in stats.items():
             model_families[model][quant] = s
 
-    complete_models = {m: data for m, data in model_families.items() if len(data) == 3}
+    complete_models = {m: data for m, data in model_families.items()
+                       if all(q in data for q in STANDARD_QUANTS)}
 
     if complete_models:
         report += f"### Top Models Available in All Quantizations ({len(complete_models)} models)\n\n"
@@ -348,6 +418,11 @@ This report compares multilingual performance across three quantization levels.
         for i, (model, s) in enumerate(top_q8, 1):
             report += f"{i}. {model} - {s['accuracy']:.0f}%, {format_time(s['avg_time'])}, {format_size(s['size_mb'])}\n"
 
+    # Ladder sweeps (quant_ladder.py) add levels beyond F16/Q8_0/Q4_K_M
+    quant_stats = {quant: stats for quant, stats in all_stats.items() if quant != 'ALL'}
+    if any(quant not in STANDARD_QUANTS for quant in quant_stats):
+        report += "\n" + generate_curve_section(quant_stats)
+
     return report
 
 def generate_overall_report(stats: Dict, total_tests: int) -> str:
@@ -400,30 +475,35 @@ This report aggregates performance across ALL quantizations and languages.
         if best_model:
             report += f"**{lang_name}:** {best_model} ({best_acc:.0f}%)\n"
 
+    throughput = generate_throughput_section(stats, limit=3)
+    if throughput:
+        report += "\n" + throughput
+
     return report
 
 def main():
     """Main analysis function."""
     print("Loading multilingual test results...")
     data = load_and_parse_csv()
+    skipped = load_skipped_models('test_results_multilang.csv')
 
+    quants = sorted((q for q in data if q != 'ALL'), key=quant_sort_key)
     print(f"Processing data:")
-    print(f"  F16: {len(data['F16'])} tests")
-    print(f"  Q8_0: {len(data['Q8_0'])} tests")
-    print(f"  Q4_K_M: {len(data['Q4_K_M'])} tests")
-    print(f"  ALL: {len(data['ALL'])} tests")
+    for quant in quants + ['ALL']:
+        print(f"  {quant}: {len(data[quant])} tests")
 
     print("\nCalculating statistics...")
     all_stats = {}
-    for quant in ['Q4_K_M', 'Q8_0', 'F16', 'ALL']:
+    for quant in quants + ['ALL']:
         all_stats[quant] = calculate_model_stats(data[quant])
         print(f"  {quant}: {len(all_stats[quant])} models")
 
     print("\nGenerating reports...")
 
     # Individual quantization reports
-    for quant in ['Q4_K_M', 'Q8_0', 'F16']:
+    for quant in quants:
         report = generate_quant_report(quant, all_stats[quant], len(data[quant]))
+        report += generate_skipped_section(skipped.get(quant))
         filename = f"REPORT_MULTILANG_{quant}.md"
         with open(filename, 'w', encoding='utf-8') as f:
             f.write(report)
@@ -441,13 +521,19 @@ def main():
         f.write(overall)
     print(f"  ✓ REPORT_MULTILANG_OVERALL.md")
 
-    print("\n✅ All 5 multilingual reports generated!")
+    # Pareto frontier per language
+    pareto = generate_pareto_report({quant: all_stats[quant] for quant in quants})
+    with open('REPORT_MULTILANG_PARETO.md', 'w', encoding='utf-8') as f:
+        f.write(pareto)
+    print(f"  ✓ REPORT_MULTILANG_PARETO.md")
+
+    print(f"\n✅ All {len(quants) + 3} multilingual reports generated!")
     print("\nReport files:")
-    print("  - REPORT_MULTILANG_Q4_K_M.md")
-    print("  - REPORT_MULTILANG_Q8_0.md")
-    print("  - REPORT_MULTILANG_F16.md")
+    for quant in quants:
+        print(f"  - REPORT_MULTILANG_{quant}.md")
     print("  - REPORT_MULTILANG_COMPARISON.md")
     print("  - REPORT_MULTILANG_OVERALL.md")
+    print("  - REPORT_MULTILANG_PARETO.md")
 
 if __name__ == '__main__':
     main()
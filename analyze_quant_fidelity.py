@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+Quantization fidelity analysis.
+
+Accuracy only says whether the top document stayed on top. This compares
+each quantization's full score vector with the F16 run of the same model on
+the same query (the scores_by_index column) and reports, per model, domain
+and language:
+
+    Kendall tau-b   rank agreement over all candidates (1 = identical order)
+    top-k overlap   share of F16's top-k that the quant also ranks top-k
+    RMSE            score difference in the model's own units
+    speed / size    F16 mean latency and file size divided by the quant's
+
+and picks, per model, the fastest quantization that keeps the ranking.
+
+Usage:
+    python analyze_quant_fidelity.py [test_results.csv test_results_multilang.csv ...]
+"""
+
+import csv
+import sys
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from quant_types import model_family, quant_sort_key, quant_type
+
+# --- Configuration ---
+RESULT_FILES = ["test_results.csv", "test_results_multilang.csv"]
+REPORT_FILE = "REPORT_QUANT_FIDELITY.md"
+REFERENCE_QUANT = 'F16'
+TOP_K = 3
+MIN_KENDALL_TAU = 0.9  # Mean tau a quant needs to count as ranking-preserving
+MIN_TOP_K_OVERLAP = 0.9
+
+def parse_scores(value: str) -> List[float]:
+    """Parse a "[0.1, 0.2, nan]" cell; float() also accepts nan."""
+    return [float(part) for part in value.strip('[]').split(',') if part.strip()]
+
+def load_runs(paths) -> Tuple[Dict, Dict]:
+    """Score vectors keyed by (model, quant, language, domain, query), plus per (model, quant) timings and size."""
+    scores = {}
+    runs = defaultdict(lambda: {'times': [], 'size_mb': 0.0})
+    for path in paths:
+        if not Path(path).exists():
+            continue
+        with open(path, 'r', encoding='utf-8') as f:
+            reader = csv.DictReader(f)
+            has_query = 'query' in reader.fieldnames
+            seen, collapsed = set(), 0
+            for row in reader:
+                quant = quant_type(row['model_name'])
+                if quant is None or (row.get('success') or '').upper() != 'TRUE' or not row.get('scores_by_index'):
+                    continue
+                model = model_family(row['model_name'])
+                key = (model, quant, row.get('language') or 'en', row['domain'], row.get('query', ''))
+                if not has_query and key in seen:
+                    collapsed += 1
+                seen.add(key)
+                scores.setdefault(key, parse_scores(row['scores_by_index']))
+                runs[(model, quant)]['times'].append(float(row['response_time_seconds']))
+                runs[(model, quant)]['size_mb'] = float(row['model_size_mb'])
+        if collapsed:
+            print(f"⚠️  {path} has no query column: {collapsed} rows repeat a language and domain and are not compared")
+    return scores, dict(runs)
+
+def kendall_tau_b(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Row-wise Kendall tau-b of two (n, d) score matrices; NaN when a row is all ties."""
+    upper = np.triu(np.ones(a.shape[1], dtype=bool), k=1)
+    da = np.sign(a[:, :, None] - a[:, None, :])[:, upper]
+    db = np.sign(b[:, :, None] - b[:, None, :])[:, upper]
+    denominator = np.sqrt((da != 0).sum(axis=1) * (db != 0).sum(axis=1))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return (da * db).sum(axis=1) / denominator
+
+def top_k_overlap(a: np.ndarray, b: np.ndarray, k: int = TOP_K) -> np.ndarray:
+    k = min(k, a.shape[1])
+    top_a = np.argsort(-a, axis=1, kind='stable')[:, :k]
+    top_b = np.argsort(-b, axis=1, kind='stable')[:, :k]
+    return (top_a[:, :, None] == top_b[:, None, :]).any(axis=2).sum(axis=1) / k
+
+def compare_pairs(scores: Dict) -> List[Dict]:
+    """Per-query fidelity of every quant against the reference run of the same model and query."""
+    pairs = defaultdict(list)  # Batched by candidate count so each batch is one matrix
+    for (model, quant, language, domain, query), vector in scores.items():
+        if quant == REFERENCE_QUANT:
+            continue
+        reference = scores.get((model, REFERENCE_QUANT, language, domain, query))
+        if reference is None or len(reference) != len(vector):
+            continue
+        pairs[len(vector)].append(((model, quant, language, domain), reference, vector))
+
+    rows = []
+    for batch in pairs.values():
+        a = np.array([reference for _, reference, _ in batch])
+        b = np.array([vector for _, _, vector in batch])
+        taus = kendall_tau_b(a, b)
+        overlaps = top_k_overlap(a, b)
+        rmses = np.sqrt(np.mean((a - b) ** 2, axis=1))
+        top1 = np.argmax(a, axis=1) == np.argmax(b, axis=1)
+        for i, ((model, quant, language, domain), _, _) in enumerate(batch):
+            rows.append({
+                'model': model, 'quant': quant, 'language': language, 'domain': domain,
+                'kendall_tau': taus[i], 'top_k_overlap': overlaps[i], 'rmse': rmses[i], 'top1_agree': top1[i]
+            })
+    return rows
+
+def summarize(rows: List[Dict], group_by: Tuple[str, ...]) -> Dict[Tuple, Dict]:
+    """Mean fidelity metrics per group."""
+    groups = defaultdict(list)
+    for row in rows:
+        groups[tuple(row[column] for column in group_by)].append(row)
+    summary = {}
+    for key, members in groups.items():
+        taus = np.array([m['kendall_tau'] for m in members])
+        summary[key] = {
+            'queries': len(members),
+            'kendall_tau': float(np.nanmean(taus)) if not np.isnan(taus).all() else float('nan'),
+            'top_k_overlap': float(np.mean([m['top_k_overlap'] for m in members])),
+            'rmse': float(np.mean([m['rmse'] for m in members])),
+            'top1_agree': 100 * float(np.mean([m['top1_agree'] for m in members]))
+        }
+    return summary
+
+def gains(runs: Dict, model: str, quant: str) -> Tuple[float, float]:
+    """(speed gain, size gain) of a quant over the reference; >1 means faster / smaller."""
+    reference, run = runs.get((model, REFERENCE_QUANT)), runs.get((model, quant))
+    if not reference or not run or not run['times'] or not run['size_mb']:
+        return float('nan'), float('nan')
+    return (float(np.mean(reference['times']) / np.mean(run['times'])),
+            reference['size_mb'] / run['size_mb'])
+
+def preserves_ranking(s: Dict) -> bool:
+    return s['kendall_tau'] >= MIN_KENDALL_TAU and s['top_k_overlap'] >= MIN_TOP_K_OVERLAP
+
+def generate_fidelity_report(rows: List[Dict], runs: Dict) -> str:
+    """Markdown report of ranking fidelity against the reference quantization."""
+    report = f"""# Reranking Models - Quantization Fidelity Report
+
+Each quantization is compared with the {REFERENCE_QUANT} run of the same model on the same query.
+Kendall tau-b covers the order of all candidates, top-{TOP_K} overlap the head of the list,
+RMSE the raw scores. Speed and size gains are {REFERENCE_QUANT} divided by the quant (higher is better).
+
+"""
+    by_model = summarize(rows, ('model', 'quant'))
+    report += "## Per Model\n\n"
+    report += f"| Model | Quant | Queries | Kendall τ | Top-{TOP_K} Overlap | RMSE | Top-1 Agree | Speed Gain | Size Gain |\n"
+    report += "|-------|-------|---------|-----------|---------------|------|-------------|------------|-----------|\n"
+    for (model, quant), s in sorted(by_model.items(), key=lambda x: (x[0][0], quant_sort_key(x[0][1]))):
+        speed, size = gains(runs, model, quant)
+        report += (f"| {model} | {quant} | {s['queries']} | {s['kendall_tau']:.3f} | {s['top_k_overlap']:.2f} | "
+                   f"{s['rmse']:.4f} | {s['top1_agree']:.0f}% | {speed:.2f}× | {size:.2f}× |\n")
+
+    for column, title in [('domain', 'Domain'), ('language', 'Language')]:
+        summary = summarize(rows, (column, 'quant'))
+        quants = sorted({quant for _, quant in summary}, key=quant_sort_key)
+        report += f"\n## Per {title} (mean Kendall τ / top-{TOP_K} overlap across models)\n\n"
+        report += f"| {title} | " + " | ".join(quants) + " |\n"
+        report += "|" + "---|" * (len(quants) + 1) + "\n"
+        for value in sorted({value for value, _ in summary}):
+            cells = []
+            for quant in quants:
+                s = summary.get((value, quant))
+                cells.append(f"{s['kendall_tau']:.3f} / {s['top_k_overlap']:.2f}" if s else "-")
+            report += f"| {value} | " + " | ".join(cells) + " |\n"
+
+    report += f"\n## Fastest Ranking-Preserving Quantization\n\n"
+    report += f"Kendall τ ≥ {MIN_KENDALL_TAU} and top-{TOP_K} overlap ≥ {MIN_TOP_K_OVERLAP} against {REFERENCE_QUANT}.\n\n"
+    for model in sorted({model for model, _ in by_model}):
+        candidates = [(quant, gains(runs, model, quant)[0]) for (m, quant), s in by_model.items()
+                      if m == model and preserves_ranking(s)]
+        candidates = [(quant, speed) for quant, speed in candidates if not np.isnan(speed)]
+        if candidates:
+            quant, speed = max(candidates, key=lambda x: x[1])
+            report += f"- **{model}**: {quant} ({speed:.2f}× faster than {REFERENCE_QUANT})\n"
+        else:
+            report += f"- **{model}**: {REFERENCE_QUANT} (no quantization keeps the ranking)\n"
+
+    return report
+
+def main():
+    paths = sys.argv[1:] or RESULT_FILES
+    print(f"Loading {', '.join(paths)}...")
+    scores, runs = load_runs(paths)
+    rows = compare_pairs(scores)
+    if not rows:
+        print(f"✗ No quant/{REFERENCE_QUANT} pairs with scores_by_index found - "
+              "re-run test_all_models.py or test_multilang.py to record them")
+        return
+
+    print(f"  {len(rows)} query comparisons across {len({r['model'] for r in rows})} models")
+    with open(REPORT_FILE, 'w', encoding='utf-8') as f:
+        f.write(generate_fidelity_report(rows, runs))
+    print(f"  ✓ {REPORT_FILE}")
+
+if __name__ == '__main__':
+    main()
@@ -8,8 +8,14 @@ import csv
 from collections import defaultdict
 from typing import Dict, List, Tuple
 
+from pareto import generate_frontier_section, make_point, pareto_frontier, same_memory_source
+from quant_types import model_family, quant_sort_key, quant_type
+
+STANDARD_QUANTS = ['F16', 'Q8_0', 'Q4_K_M']  # Covered by the comparison report's fixed sections
+BALANCED_MIN_ACCURACY = 80.0  # % - Production RAG picks come from the frontier above this
+
 def load_and_parse_csv(filepath: str) -> Dict[str, List[Dict]]:
-    """Load CSV and group by quantization type."""
+    """Load CSV and group by quantization type (any GGUF type; see quant_types.py)."""
     results = {
         'Q4_K_M': [],
         'Q8_0': [],
@@ -19,26 +25,53 @@ def load_and_parse_csv(filepath: str) -> Dict[str, List[Dict]]:
     with open(filepath, 'r') as f:
         reader = csv.DictReader(f)
         for row in reader:
-            model_name = row['model_name']
-            if 'Q4_K_M' in model_name:
-                quant_type = 'Q4_K_M'
-            elif 'Q8_0' in model_name:
-                quant_type = 'Q8_0'
-            elif 'F16' in model_name:
-                quant_type = 'F16'
-            else:
+            quant = quant_type(row['model_name'])
+            if quant is None:
+                continue
+
+            # Server failures and probe-skipped models have no timings; see load_skipped_models()
+            if not row['response_time_seconds']:
                 continue
 
             # Convert types
             row['response_time_seconds'] = float(row['response_time_seconds'])
             row['model_size_mb'] = float(row['model_size_mb'])
-            row['correct_answer'] = row['correct_answer'] == 'TRUE'
-            row['success'] = row['success'] == 'TRUE'
-
-            results[quant_type].append(row)
+            # Python writes True, spreadsheets TRUE
+            row['correct_answer'] = row['correct_answer'].upper() == 'TRUE'
+            row['success'] = row['success'].upper() == 'TRUE'
+            # Memory columns are only present in newer result files
+            for column in ['peak_rss_mb', 'steady_rss_mb', 'rss_per_slot_mb']:
+                row[column] = float(row[column]) if row.get(column) else None
+            row['eliminated_early'] = (row.get('eliminated_early') or '').upper() == 'TRUE'
+            row['probe_reason'] = row.get('probe_reason') or None
+            row['prompt_tokens'] = int(row['prompt_tokens']) if row.get('prompt_tokens') else None
+
+            results.setdefault(quant, []).append(row)
 
     return results
 
+def load_skipped_models(filepath: str) -> Dict[str, Dict[str, str]]:
+    """Models without a single timed query, per quantization, with the probe reason or error."""
+    timed = set()
+    reasons = {}
+    with open(filepath, 'r', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            quant = quant_type(row['model_name'])
+            if quant is None:
+                continue
+            key = (quant, model_family(row['model_name']))
+            if row['response_time_seconds']:
+                timed.add(key)
+            elif not reasons.get(key):
+                probe_reason = row.get('probe_reason')
+                reasons[key] = row.get('error') or (f"Degenerate output: {probe_reason}" if probe_reason else '')
+
+    skipped = defaultdict(dict)
+    for (quant, model), reason in reasons.items():
+        if (quant, model) not in timed:
+            skipped[quant][model] = reason or "No timed queries"
+    return dict(skipped)
+
 def calculate_model_stats(data: List[Dict]) -> Dict[str, Dict]:
     """Calculate statistics per model."""
     model_stats = defaultdict(lambda: {
@@ -46,16 +79,36 @@ def calculate_model_stats(data: List[Dict]) -> Dict[str, Dict]:
         'correct': 0,
         'times': [],
         'size_mb': 0,
+        'peak_rss_mb': None,
+        'steady_rss_mb': None,
+        'rss_per_slot_mb': None,
+        'eliminated_early': False,
+        'elimination_reason': None,
+        'probe_reason': None,
+        'tokens': 0,
+        'token_time': 0.0,
         'domains': defaultdict(lambda: {'total': 0, 'correct': 0})
     })
 
     for row in data:
-        model = row['model_name'].rsplit('-', 1)[0]  # Remove quantization suffix
+        model = model_family(row['model_name'])
         stats = model_stats[model]
 
         stats['total_tests'] += 1
         stats['size_mb'] = row['model_size_mb']
         stats['times'].append(row['response_time_seconds'])
+        if row['prompt_tokens'] is not None:
+            stats['tokens'] += row['prompt_tokens']
+            stats['token_time'] += row['response_time_seconds']
+        for column in ['peak_rss_mb', 'steady_rss_mb', 'rss_per_slot_mb']:
+            if row[column] is not None:
+                stats[column] = row[column]
+
+        if row['probe_reason']:
+            stats['probe_reason'] = row['probe_reason']
+        if row['eliminated_early']:
+            stats['eliminated_early'] = True
+            stats['elimination_reason'] = row.get('elimination_reason')
 
         if row['correct_answer']:
             stats['correct'] += 1
@@ -82,6 +135,12 @@ def get_top_models(stats: Dict, by: str = 'accuracy', limit: int = 5) -> List[Tu
         sorted_models = sorted(stats.items(), key=lambda x: (x[1]['avg_time'], -x[1]['accuracy']))
     elif by == 'size':
         sorted_models = sorted(stats.items(), key=lambda x: (x[1]['size_mb'], -x[1]['accuracy']))
+    elif by == 'memory':
+        # Resident memory when it was sampled for every model, file size otherwise
+        measured = all(s['steady_rss_mb'] is not None for s in stats.values())
+        sorted_models = sorted(stats.items(), key=lambda x: (
+            x[1]['steady_rss_mb'] if measured else x[1]['size_mb'],
+            -x[1]['accuracy']))
     else:
         sorted_models = list(stats.items())
 
@@ -97,7 +156,61 @@ def format_size(mb: float) -> str:
         return f"{mb/1000:.1f} GB"
     return f"{int(mb)} MB"
 
-def generate_quant_report(quant_type: str, stats: Dict, total_tests: int) -> str:
+def format_memory(stats: Dict) -> str:
+    """Format sampled resident memory, or note that it was not measured."""
+    if stats['steady_rss_mb'] is None:
+        return "RSS not measured"
+    text = f"peak RSS {format_size(stats['peak_rss_mb'])}, steady RSS {format_size(stats['steady_rss_mb'])}"
+    if stats['rss_per_slot_mb'] is not None:
+        text += f", {format_size(stats['rss_per_slot_mb'])}/slot"
+    return text
+
+def format_model(model: str, stats: Dict) -> str:
+    """Bold model name, flagged when it was eliminated early or failed the pre-flight probe."""
+    text = f"**{model}**"
+    if stats['probe_reason']:
+        text += f" ⚠ *({stats['probe_reason']})*"
+    if stats['eliminated_early']:
+        text += " ✂ *(eliminated early)*"
+    return text
+
+def generate_skipped_section(skipped: Dict[str, str]) -> str:
+    """Models that are missing from every ranking because none of their queries ran."""
+    if not skipped:
+        return ""
+    section = "\n## Skipped / Failed Probe\n\n"
+    section += "These models produced no timed queries (pre-flight probe failed or the server did not start), so no ranking includes them.\n\n"
+    section += "| Model | Reason |\n|-------|--------|\n"
+    for model, reason in sorted(skipped.items()):
+        section += f"| {model} | {reason} |\n"
+    return section
+
+def best_for_labels(candidates: List[Tuple[str, Dict]]) -> Dict[str, str]:
+    """Use-case label per model, from where it sits among the candidates rather than fixed cut-offs."""
+    points = {p['name']: p for p in same_memory_source([make_point(model, s) for model, s in candidates])}
+    frontier, dominated = pareto_frontier(list(points.values()))
+    smallest = min(points.values(), key=lambda p: p['memory_mb'])['name'] if points else None
+    fastest = min(points.values(), key=lambda p: p['p95_ms'])['name'] if points else None
+
+    labels = {}
+    for p, by in dominated:
+        labels[p['name']] = f"Dominated by {by['name']} (no better on any objective)"
+    for p in frontier:
+        if p['name'] == smallest:
+            labels[p['name']] = "Resource-constrained environments"
+        elif p['name'] == fastest:
+            labels[p['name']] = "Low-latency applications"
+        else:
+            labels[p['name']] = "Balanced performance"
+    return labels
+
+def quant_points(all_stats: Dict) -> List[Dict]:
+    """Pareto candidates for every model at every quantization."""
+    return [make_point(f"{model}-{quant}", s)
+            for quant in sorted(all_stats, key=quant_sort_key)
+            for model, s in all_stats[quant].items()]
+
+def generate_quant_report(quant_type: str, stats: Dict, total_tests: int, skipped: Dict[str, str] = None) -> str:
     """Generate report for a single quantization type."""
 
     # Count perfect accuracy models
@@ -107,6 +220,7 @@ def generate_quant_report(quant_type: str, stats: Dict, total_tests: int) -> str
     top_accuracy = get_top_models(stats, 'accuracy', 10)
     top_speed = get_top_models(stats, 'speed', 5)
     top_size = get_top_models(stats, 'size', 5)
+    top_memory = get_top_models(stats, 'memory', 5)
 
     # Calculate overall stats
     avg_accuracy = sum(s['accuracy'] for s in stats.values()) / len(stats) if stats else 0
@@ -131,38 +245,30 @@ def generate_quant_report(quant_type: str, stats: Dict, total_tests: int) -> str
 
     for i, (model, s) in enumerate(top_accuracy, 1):
         emoji = "🏆" if i == 1 else "⭐" if i <= 3 else ""
-        report += f"{i}. **{model}** {emoji}\n"
+        report += f"{i}. {format_model(model, s)} {emoji}\n"
         report += f"   - Accuracy: {s['accuracy']:.0f}% ({s['correct']}/{s['total_tests']})\n"
         report += f"   - Speed: {format_time(s['avg_time'])} (range: {format_time(s['min_time'])}-{format_time(s['max_time'])})\n"
         report += f"   - Size: {format_size(s['size_mb'])}\n\n"
 
     report += f"\n### Top 5 Fastest Models\n\n"
     for i, (model, s) in enumerate(top_speed, 1):
-        report += f"{i}. **{model}** - {format_time(s['avg_time'])} ({s['accuracy']:.0f}% accuracy, {format_size(s['size_mb'])})\n"
+        report += f"{i}. {format_model(model, s)} - {format_time(s['avg_time'])} ({s['accuracy']:.0f}% accuracy, {format_size(s['size_mb'])})\n"
 
     report += f"\n### Top 5 Smallest Models\n\n"
     for i, (model, s) in enumerate(top_size, 1):
-        report += f"{i}. **{model}** - {format_size(s['size_mb'])} ({s['accuracy']:.0f}% accuracy, {format_time(s['avg_time'])})\n"
+        report += f"{i}. {format_model(model, s)} - {format_size(s['size_mb'])} ({s['accuracy']:.0f}% accuracy, {format_time(s['avg_time'])})\n"
 
     # Perfect accuracy models details
     if perfect_models:
         report += f"\n## Perfect Accuracy Models (100%)\n\n"
         perfect_stats = [(m, stats[m]) for m in perfect_models]
         perfect_stats.sort(key=lambda x: x[1]['avg_time'])
+        best_for = best_for_labels(perfect_stats)
 
         for model, s in perfect_stats:
             report += f"**{model}**\n"
             report += f"- Speed: {format_time(s['avg_time'])} | Size: {format_size(s['size_mb'])}\n"
-            report += f"- Best for: "
-            if s['size_mb'] < 100:
-                report += "Resource-constrained environments"
-            elif s['avg_time'] < 0.1:
-                report += "Low-latency applications"
-            elif s['size_mb'] > 1000:
-                report += "Maximum quality requirements"
-            else:
-                report += "Balanced performance"
-            report += "\n\n"
+            report += f"- Best for: {best_for[model]}\n\n"
 
     # Domain analysis for top model
     if top_accuracy:
@@ -176,32 +282,49 @@ def generate_quant_report(quant_type: str, stats: Dict, total_tests: int) -> str
         for domain, acc in domain_perf:
             report += f"| {domain.capitalize()} | {acc:.0f}% |\n"
 
+    # Models dropped by successive halving were only scored on the first rounds
+    eliminated = sorted((m, s) for m, s in stats.items() if s['eliminated_early'])
+    if eliminated:
+        report += f"\n## Eliminated Early (Successive Halving)\n\n"
+        report += "These models were dropped after the early rounds, so their figures cover fewer queries.\n\n"
+        report += "| Model | Queries | Accuracy | Avg Time | Reason |\n|-------|---------|----------|----------|--------|\n"
+        for model, s in eliminated:
+            report += f"| {model} | {s['total_tests']} | {s['accuracy']:.0f}% | {format_time(s['avg_time'])} | {s['elimination_reason'] or '-'} |\n"
+
+    report += generate_skipped_section(skipped)
+
     # Use case recommendations
     report += f"\n## Use Case Recommendations\n\n"
 
     report += "### Real-Time Search (Low Latency)\n"
     for model, s in top_speed[:3]:
         if s['accuracy'] >= 60:
-            report += f"- **{model}**: {format_time(s['avg_time'])}, {s['accuracy']:.0f}% accuracy\n"
+            report += f"- {format_model(model, s)}: {format_time(s['avg_time'])}, {s['accuracy']:.0f}% accuracy\n"
 
     report += f"\n### Edge Deployment (Small Size)\n"
-    for model, s in top_size[:3]:
+    for model, s in top_memory[:3]:
         if s['accuracy'] >= 60:
-            report += f"- **{model}**: {format_size(s['size_mb'])}, {s['accuracy']:.0f}% accuracy\n"
+            report += f"- {format_model(model, s)}: {format_size(s['size_mb'])} ({format_memory(s)}), {s['accuracy']:.0f}% accuracy\n"
 
     report += f"\n### Production RAG (Balanced)\n"
-    balanced = [(m, s) for m, s in stats.items()
-                if s['accuracy'] >= 80 and s['avg_time'] < 0.2 and s['size_mb'] < 1000]
-    balanced.sort(key=lambda x: (-x[1]['accuracy'], x[1]['avg_time']))
+    # Models accurate enough for production: their Pareto frontier first, then the most accurate of the rest
+    accurate = [make_point(model, s) for model, s in stats.items() if s['accuracy'] >= BALANCED_MIN_ACCURACY]
+    on_frontier = {p['name'] for p in pareto_frontier(accurate)[0]}
+    balanced = sorted(((p['name'], stats[p['name']]) for p in accurate),
+                      key=lambda x: (x[0] not in on_frontier, -x[1]['accuracy'], x[1]['avg_time']))
     for model, s in balanced[:3]:
-        report += f"- **{model}**: {s['accuracy']:.0f}% accuracy, {format_time(s['avg_time'])}, {format_size(s['size_mb'])}\n"
+        report += f"- {format_model(model, s)}: {s['accuracy']:.0f}% accuracy, {format_time(s['avg_time'])}, {format_size(s['size_mb'])}\n"
+    if not balanced:
+        report += f"- No model reaches {BALANCED_MIN_ACCURACY:.0f}% accuracy\n"
 
     report += f"\n### Maximum Accuracy (Quality Focus)\n"
     for model, s in top_accuracy[:3]:
-        report += f"- **{model}**: {s['accuracy']:.0f}% accuracy, {format_time(s['avg_time'])}, {format_size(s['size_mb'])}\n"
+        report += f"- {format_model(model, s)}: {s['accuracy']:.0f}% accuracy, {format_time(s['avg_time'])}, {format_size(s['size_mb'])}\n"
+
+    report += "\n" + generate_frontier_section([make_point(model, s) for model, s in stats.items()])
 
     # Key findings
-    report += f"\n## Key Findings\n\n"
+    report += f"## Key Findings\n\n"
 
     # Speed range
     fastest = min(stats.items(), key=lambda x: x[1]['avg_time'])
@@ -271,7 +394,8 @@ This report compares the performance of reranking models across three quantizati
             model_families[model][quant] = s
 
     # Find models available in all 3 quantizations
-    complete_models = {m: data for m, data in model_families.items() if len(data) == 3}
+    complete_models = {m: data for m, data in model_families.items()
+                       if all(q in data for q in STANDARD_QUANTS)}
 
     if complete_models:
         report += f"### Models Available in All Quantizations ({len(complete_models)} models)\n\n"
@@ -382,24 +506,80 @@ This report compares the performance of reranking models across three quantizati
     savings_gb = (total_f16_size - total_q4_size) / 1024
     report += f"- **Total storage savings** (Q4_K_M vs F16): {savings_gb:.1f} GB saved ({((total_f16_size - total_q4_size) / total_f16_size * 100):.0f}% reduction)\n"
 
+    report += "\n" + generate_frontier_section(quant_points(all_stats), "Pareto Frontier Across Quantizations")
+
+    # Ladder sweeps (quant_ladder.py) add levels beyond the three above
+    if any(quant not in STANDARD_QUANTS for quant in all_stats):
+        report += "\n" + generate_curve_section(all_stats)
+
+    return report
+
+def generate_curve_section(all_stats: Dict, kendall_tau: Dict = None) -> str:
+    """Latency-size-accuracy curve of every model measured at more than one quantization.
+
+    kendall_tau optionally maps (model, quant) to rank agreement with F16
+    (see analyze_quant_fidelity.py) and adds a column for it.
+    """
+    model_families = defaultdict(dict)
+    for quant, stats in all_stats.items():
+        for model, s in stats.items():
+            model_families[model][quant] = s
+
+    report = "## Latency-Size-Accuracy Curves\n\n"
+    report += "Quantizations from largest to smallest. Size and speed-up are relative to the largest one measured.\n\n"
+
+    for model in sorted(model_families):
+        quant_data = model_families[model]
+        quants = sorted(quant_data, key=quant_sort_key)
+        if len(quants) < 2:
+            continue
+        reference = quant_data[quants[0]]
+
+        report += f"**{model}**\n\n"
+        report += "| Quant | Size | Size Ratio | Speed | Speed-up | Accuracy | Accuracy Change |"
+        report += " Kendall τ |\n" if kendall_tau is not None else "\n"
+        report += "|-------|------|------------|-------|----------|----------|-----------------|"
+        report += "-----------|\n" if kendall_tau is not None else "\n"
+        for quant in quants:
+            s = quant_data[quant]
+            size_ratio = s['size_mb'] / reference['size_mb'] if reference['size_mb'] else 0
+            speedup = reference['avg_time'] / s['avg_time'] if s['avg_time'] > 0 else 0
+            report += (f"| {quant} | {format_size(s['size_mb'])} | {size_ratio:.2f} | {format_time(s['avg_time'])} | "
+                       f"{speedup:.2f}× | {s['accuracy']:.0f}% | {s['accuracy'] - reference['accuracy']:+.0f}% |")
+            if kendall_tau is not None:
+                tau = kendall_tau.get((model, quant))
+                report += f" {tau:.3f} |\n" if tau is not None else " - |\n"
+            else:
+                report += "\n"
+
+        # Fastest rung that loses no accuracy against the largest one
+        keeps_accuracy = [q for q in quants if quant_data[q]['accuracy'] >= reference['accuracy']]
+        best = min(keeps_accuracy, key=lambda q: quant_data[q]['avg_time'])
+        report += f"\nBest trade-off: **{best}** ({format_size(quant_data[best]['size_mb'])}, "
+        report += f"{format_time(quant_data[best]['avg_time'])}, {quant_data[best]['accuracy']:.0f}%)\n\n"
+
     return report
 
 def main():
     """Main analysis function."""
     print("Loading test results...")
     data = load_and_parse_csv('test_results.csv')
+    skipped = load_skipped_models('test_results.csv')
 
     print("Calculating statistics...")
+    quants = sorted(data, key=quant_sort_key)
     all_stats = {}
-    for quant in ['Q4_K_M', 'Q8_0', 'F16']:
+    for quant in quants:
         all_stats[quant] = calculate_model_stats(data[quant])
         print(f"  {quant}: {len(all_stats[quant])} models, {len(data[quant])} tests")
+    for quant in sorted(skipped, key=quant_sort_key):
+        print(f"  {quant}: {len(skipped[quant])} skipped ({', '.join(sorted(skipped[quant]))})")
 
     print("\nGenerating reports...")
 
     # Generate individual quantization reports
-    for quant in ['Q4_K_M', 'Q8_0', 'F16']:
-        report = generate_quant_report(quant, all_stats[quant], len(data[quant]))
+    for quant in quants:
+        report = generate_quant_report(quant, all_stats[quant], len(data[quant]), skipped.get(quant))
         filename = f"REPORT_{quant}.md"
         with open(filename, 'w') as f:
             f.write(report)
@@ -413,9 +593,8 @@ def main():
 
     print("\n✅ All reports generated successfully!")
     print("\nReport files:")
-    print("  - REPORT_Q4_K_M.md")
-    print("  - REPORT_Q8_0.md")
-    print("  - REPORT_F16.md")
+    for quant in quants:
+        print(f"  - REPORT_{quant}.md")
     print("  - REPORT_COMPARISON.md")
 
 if __name__ == '__main__':
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Micro-batcher benchmark.
+
+Simulates fan-in from several retrievers: for each query, CALLERS threads
+send their own overlapping subsets of the candidate documents at about the
+same time. Runs once with direct /rerank calls and once per batching window,
+and reports caller throughput, end-to-end latency, added queueing latency and
+how many server calls and documents were saved.
+"""
+
+import csv
+import random
+import statistics
+import sys
+import threading
+import time
+from datetime import datetime
+
+from rerank_batcher import RerankBatcher
+from test_all_models import (
+    MODEL_DIR,
+    get_model_files,
+    load_test_queries,
+    start_server,
+    stop_server,
+    test_reranking,
+    wait_for_server,
+)
+
+# --- Configuration ---
+BENCHMARK_MODEL = "bge-reranker-v2-m3-Q4_K_M.gguf"  # Overridden by the first CLI argument
+RESULTS_FILE = "batcher_benchmark_results.csv"
+WINDOWS_MS = [1, 2, 5, 10, 20]
+CALLERS = 4  # Concurrent retrievers per query
+DOCS_PER_CALLER = 3  # Each caller sends a random subset of the query's documents
+ROUNDS = 20  # Fan-in rounds per configuration
+ARRIVAL_JITTER_MS = 3  # Callers of one round arrive spread over this interval
+SEED = 42
+
+def build_rounds(test_queries):
+    """Pre-draw the caller requests so every configuration replays the same traffic."""
+    rng = random.Random(SEED)
+    rounds = []
+    for _ in range(ROUNDS):
+        query_data = rng.choice(test_queries)
+        callers = []
+        for _ in range(CALLERS):
+            documents = rng.sample(query_data['documents'], DOCS_PER_CALLER)
+            delay = rng.uniform(0, ARRIVAL_JITTER_MS / 1000)
+            callers.append((delay, documents))
+        rounds.append((query_data['query'], callers))
+    return rounds
+
+def run_configuration(rounds, rerank_fn):
+    """Replay all rounds through rerank_fn and return per-call latencies and wall time."""
+    latencies = []
+    errors = []
+    lock = threading.Lock()
+
+    def caller(query, delay, documents):
+        time.sleep(delay)
+        start_time = time.perf_counter()
+        try:
+            rerank_fn(query, documents)
+            elapsed_time = time.perf_counter() - start_time
+            with lock:
+                latencies.append(elapsed_time)
+        except Exception as e:
+            with lock:
+                errors.append(str(e))
+
+    wall_start = time.perf_counter()
+    for query, callers in rounds:
+        threads = [threading.Thread(target=caller, args=(query, delay, documents))
+                   for delay, documents in callers]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+    wall_time = time.perf_counter() - wall_start
+
+    return latencies, errors, wall_time
+
+def summarize(configuration, latencies, errors, wall_time, stats=None):
+    """Build one result row."""
+    total_calls = ROUNDS * CALLERS
+    ordered = sorted(latencies)
+    result = {
+        'configuration': configuration,
+        'caller_requests': total_calls,
+        'errors': len(errors),
+        'throughput_rps': round(len(latencies) / wall_time, 2) if wall_time > 0 else None,
+        'mean_latency_ms': round(statistics.mean(latencies) * 1000, 2) if latencies else None,
+        'p95_latency_ms': round(ordered[int(0.95 * (len(ordered) - 1))] * 1000, 2) if ordered else None,
+        'mean_queue_wait_ms': 0.0,
+        'server_calls': total_calls,
+        'documents_sent': total_calls * DOCS_PER_CALLER,
+        'timestamp': datetime.now().isoformat()
+    }
+    if stats is not None:
+        result['mean_queue_wait_ms'] = round(stats['queue_wait_seconds'] / max(stats['requests'], 1) * 1000, 2)
+        result['server_calls'] = stats['server_calls']
+        result['documents_sent'] = stats['documents_sent']
+    return result
+
+def save_to_csv(results, filename=RESULTS_FILE):
+    """Save benchmark rows to CSV file."""
+    with open(filename, 'w', newline='') as csvfile:
+        fieldnames = [
+            'model_name',
+            'configuration',
+            'caller_requests',
+            'errors',
+            'throughput_rps',
+            'mean_latency_ms',
+            'p95_latency_ms',
+            'mean_queue_wait_ms',
+            'server_calls',
+            'documents_sent',
+            'timestamp'
+        ]
+
+        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
+        writer.writeheader()
+        writer.writerows(results)
+
+    print(f"\n✓ Results saved to {filename}")
+
+def main():
+    """Compare direct rerank calls with micro-batching at several window sizes."""
+    model_name = sys.argv[1] if len(sys.argv) > 1 else BENCHMARK_MODEL
+    model_path = MODEL_DIR / model_name
+    if not model_path.exists():
+        model_files = get_model_files()
+        if not model_files:
+            print(f"✗ No models found in {MODEL_DIR}")
+            return
+        model_path = model_files[0]
+
+    print("=" * 80)
+    print("RERANK MICRO-BATCHER BENCHMARK")
+    print("=" * 80)
+    print(f"Model: {model_path.name}")
+    print(f"{ROUNDS} rounds × {CALLERS} callers × {DOCS_PER_CALLER} documents, windows: {WINDOWS_MS} ms")
+
+    rounds = build_rounds(load_test_queries())
+    results = []
+
+    process = None
+    try:
+        process = start_server(model_path)
+        if not wait_for_server():
+            print("✗ Server failed to start")
+            return
+
+        # Warm up once so the first configuration is not penalized
+        warm_query, warm_callers = rounds[0]
+        test_reranking(warm_query, warm_callers[0][1])
+
+        latencies, errors, wall_time = run_configuration(rounds, test_reranking)
+        results.append(summarize('direct', latencies, errors, wall_time))
+
+        for window_ms in WINDOWS_MS:
+            batcher = RerankBatcher(window_ms=window_ms)
+            try:
+                latencies, errors, wall_time = run_configuration(rounds, batcher.rerank)
+            finally:
+                batcher.close()
+            results.append(summarize(f'batch-{window_ms}ms', latencies, errors, wall_time, batcher.stats))
+
+    finally:
+        if process:
+            stop_server(process)
+
+    for result in results:
+        result['model_name'] = model_path.name
+    save_to_csv(results)
+
+    baseline = results[0]
+    print(f"\n{'Configuration':<14} {'Req/s':>8} {'Gain':>8} {'Mean':>10} {'p95':>10} {'Queue':>10} {'Calls':>7} {'Docs':>6}")
+    print("-" * 80)
+    for r in results:
+        gain = ((r['throughput_rps'] / baseline['throughput_rps'] - 1) * 100
+                if r['throughput_rps'] and baseline['throughput_rps'] else 0)
+        print(f"{r['configuration']:<14} {r['throughput_rps'] or 0:>8.1f} {gain:>+7.0f}% "
+              f"{r['mean_latency_ms'] or 0:>8.1f}ms {r['p95_latency_ms'] or 0:>8.1f}ms "
+              f"{r['mean_queue_wait_ms']:>8.1f}ms {r['server_calls']:>7} {r['documents_sent']:>6}")
+
+if __name__ == "__main__":
+    main()
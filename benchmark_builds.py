@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+A/B benchmark of llama-server builds.
+
+Starts every build on the same model at the same time, each on its own port
+and pinned cores, warms them up identically and sends them the query set in
+interleaved, randomized order (see interleaved.py). CPU frequency and load
+average are monitored during each run. Reports, per model, each
+build's latency change against the first build with a bootstrap confidence
+interval, and any score drift: the same query scored differently, or a
+different top document.
+
+Usage:
+    python benchmark_builds.py --build b6730=/opt/llama-b6730/bin/llama-server \\
+                               --build b6900=/opt/llama-b6900/bin/llama-server
+    python benchmark_builds.py bge-reranker-v2-m3-Q4_K_M Qwen3-Reranker-0.6B-Q8_0 --build ... --rounds 10
+"""
+
+import argparse
+import csv
+from collections import defaultdict
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+from environment_monitor import format_environment
+from interleaved import run_interleaved, start_servers, stop_servers, warm_up
+from perf_stats import bootstrap_change_ci, mann_whitney_greater
+from regression_tracker import server_version
+from test_all_models import MODEL_DIR, get_model_files, load_test_queries
+
+# --- Configuration ---
+BENCHMARK_MODELS = ["bge-reranker-v2-m3-Q4_K_M.gguf"]  # Overridden by CLI arguments
+RESULTS_FILE = "build_ab_results.csv"
+REPORT_FILE = "REPORT_AB_BUILDS.md"
+ROUNDS = 5  # Passes over the query set per build
+CPUS_PER_SERVER = None  # None splits the available cores evenly
+SCORE_TOLERANCE = 1e-4  # Score differences up to this count as identical (scores are stored rounded)
+
+def parse_build(value: str):
+    """LABEL=PATH, or just PATH (labelled by its parent directory)."""
+    label, _, path = value.rpartition('=')
+    path = Path(path).expanduser()
+    return (label or path.parent.name or path.name), [str(path)]
+
+def select_models(patterns):
+    models = get_model_files()
+    return [path for path in models if any(p in path.name for p in patterns)]
+
+def save_to_csv(results, filename=RESULTS_FILE):
+    """Save per-request A/B results to CSV file."""
+    with open(filename, 'w', newline='', encoding='utf-8') as csvfile:
+        fieldnames = [
+            'model_name',
+            'label',
+            'round',
+            'query_index',
+            'domain',
+            'success',
+            'response_time_seconds',
+            'top_document_index',
+            'correct_answer',
+            'scores_by_index',
+            'error',
+            'timestamp'
+        ]
+
+        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
+        writer.writeheader()
+        writer.writerows(results)
+
+    print(f"\n✓ Results saved to {filename}")
+
+def score_drift(reference, other):
+    """Queries whose scores differ from the reference build, largest difference and top-1 agreement."""
+    first = {}
+    for label, rows in (('reference', reference), ('other', other)):
+        for row in rows:
+            if row['success']:
+                first.setdefault((label, row['query_index']), row)
+    queries = sorted({q for label, q in first if label == 'reference'} & {q for label, q in first if label == 'other'})
+    changed, max_diff, top1 = 0, 0.0, 0
+    for q in queries:
+        a = np.array(first[('reference', q)]['scores_by_index'], dtype=float)
+        b = np.array(first[('other', q)]['scores_by_index'], dtype=float)
+        diff = float(np.nanmax(np.abs(a - b))) if a.shape == b.shape else float('inf')
+        if diff > SCORE_TOLERANCE:
+            changed += 1
+            max_diff = max(max_diff, diff)
+        top1 += first[('reference', q)]['top_document_index'] == first[('other', q)]['top_document_index']
+    return {'queries': len(queries), 'changed': changed, 'max_diff': max_diff,
+            'top1_agree': 100 * top1 / len(queries) if queries else float('nan')}
+
+def generate_report(results, builds, versions, environments) -> str:
+    """Markdown report of latency deltas and score drift against the first build."""
+    reference = builds[0][0]
+    report = f"""# llama-server Build A/B Report
+
+**Generated:** {datetime.now().strftime('%Y-%m-%d %H:%M')}
+**Reference:** {reference}
+**Method:** all builds up at once on separate pinned cores, identical warm-up, queries interleaved in random order
+
+| Build | Binary | Version |
+|-------|--------|---------|
+"""
+    for label, command in builds:
+        report += f"| {label} | `{command[0]}` | {versions.get(label) or '-'} |\n"
+
+    by_model = defaultdict(lambda: defaultdict(list))
+    for row in results:
+        by_model[row['model_name']][row['label']].append(row)
+
+    for model, by_build in by_model.items():
+        report += f"\n## {model}\n\n"
+        if model in environments:
+            environment = environments[model]
+            report += f"**Environment:** {format_environment(environment)}\n\n"
+            if environment['drifted']:
+                report += "> Machine state drifted during this run; interleaving spreads it over all builds, but re-run before trusting small deltas.\n\n"
+        report += "| Build | Requests | p50 | p95 | p50 Change (95% CI) | p95 Change (95% CI) | p-value | Accuracy | Score Drift | Top-1 Agree |\n"
+        report += "|-------|----------|-----|-----|---------------------|---------------------|---------|----------|-------------|-------------|\n"
+        base_times = [r['response_time_seconds'] for r in by_build[reference] if r['success']]
+        for label, _ in builds:
+            rows = by_build[label]
+            times = [r['response_time_seconds'] for r in rows if r['success']]
+            if not times:
+                report += f"| {label} | {len(rows)} | - | - | - | - | - | - | - | - |\n"
+                continue
+            accuracy = 100 * sum(r['correct_answer'] for r in rows) / len(rows)
+            p50, p95 = np.percentile(times, 50) * 1000, np.percentile(times, 95) * 1000
+            if label == reference or not base_times:
+                report += (f"| {label} | {len(times)}/{len(rows)} | {p50:.1f}ms | {p95:.1f}ms | reference | reference | - | "
+                           f"{accuracy:.0f}% | - | - |\n")
+                continue
+            changes = []
+            for pct in (50, 95):
+                change, low, high = bootstrap_change_ci(base_times, times, pct)
+                changes.append(f"{change:+.1%} ({low:+.1%}, {high:+.1%})")
+            # Two-sided: is either build systematically slower?
+            p_value = min(1.0, 2 * min(mann_whitney_greater(times, base_times), mann_whitney_greater(base_times, times)))
+            drift = score_drift(by_build[reference], rows)
+            drift_text = f"{drift['changed']}/{drift['queries']}" + (f" (max {drift['max_diff']:.4f})" if drift['changed'] else "")
+            report += (f"| {label} | {len(times)}/{len(rows)} | {p50:.1f}ms | {p95:.1f}ms | {changes[0]} | {changes[1]} | "
+                       f"{p_value:.3f} | {accuracy:.0f}% | {drift_text} | {drift['top1_agree']:.0f}% |\n")
+
+    report += f"""
+Changes are relative to {reference} (negative is faster). Intervals are bootstrap percentile
+intervals over all requests; the p-value is a two-sided Mann-Whitney U test. Score drift counts
+queries whose scores differ by more than {SCORE_TOLERANCE:g} from the reference build.
+"""
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare llama-server builds side by side on the same models and queries.")
+    parser.add_argument('models', nargs='*', help=f"Model files in {MODEL_DIR} whose name contains one of these")
+    parser.add_argument('--build', action='append', required=True, metavar='LABEL=PATH',
+                        help="llama-server binary to compare; the first one is the reference")
+    parser.add_argument('--rounds', type=int, default=ROUNDS)
+    parser.add_argument('--cpus-per-server', type=int, default=CPUS_PER_SERVER)
+    args = parser.parse_args()
+
+    builds = [parse_build(value) for value in args.build]
+    if len(builds) < 2:
+        parser.error("give at least two --build binaries")
+    if len({label for label, _ in builds}) != len(builds):
+        parser.error("build labels must be unique")
+
+    model_files = select_models(args.models or BENCHMARK_MODELS)
+    if not model_files:
+        print(f"✗ No matching models in {MODEL_DIR}")
+        return
+    test_queries = load_test_queries()
+    versions = {label: server_version(command) for label, command in builds}
+
+    print("=" * 80)
+    print("LLAMA-SERVER BUILD A/B BENCHMARK")
+    print("=" * 80)
+    for label, command in builds:
+        print(f"  {label}: {command[0]} ({versions[label] or 'version unknown'})")
+    print(f"Models: {len(model_files)}, queries: {len(test_queries)}, rounds: {args.rounds}")
+
+    all_results = []
+    environments = {}
+    for model_idx, model_path in enumerate(model_files, 1):
+        print(f"\n[Model {model_idx}/{len(model_files)}] {model_path.name}")
+        print("-" * 80)
+        specs = [{'label': label, 'model_path': model_path, 'command': command} for label, command in builds]
+        try:
+            servers = start_servers(specs, args.cpus_per_server)
+        except (RuntimeError, ValueError, OSError) as e:
+            print(f"✗ {e} - skipping model")
+            continue
+        try:
+            warm_up(servers, test_queries)
+            results, environments[model_path.name] = run_interleaved(servers, test_queries, args.rounds)
+            for result in results:
+                result['model_name'] = model_path.name
+            all_results.extend(results)
+        finally:
+            stop_servers(servers)
+
+        save_to_csv(all_results)
+
+    with open(REPORT_FILE, 'w', encoding='utf-8') as f:
+        f.write(generate_report(all_results, builds, versions, environments))
+    print(f"✓ Report saved to {REPORT_FILE}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+ColBERT MaxSim vs cross-encoder /rerank benchmark.
+
+Precomputes per-token embeddings for every document in the English and
+multilingual query sets (colbert_maxsim.py), then scores each query with
+MaxSim and, on a second server run, through /rerank. Reports accuracy and
+median latency of both paths and how MaxSim latency splits between query
+encoding and the NumPy scoring.
+"""
+
+import csv
+import statistics
+import sys
+import time
+
+import test_multilang
+from colbert_maxsim import COLBERT_SERVER_ARGS, COLBERT_STORE_DIR, ColbertReranker, TokenEmbeddingStore
+from test_all_models import (
+    MODEL_DIR,
+    get_model_files,
+    load_test_queries,
+    start_server,
+    stop_server,
+    test_model_with_query,
+    test_reranking,
+    wait_for_server,
+)
+
+# --- Configuration ---
+BENCHMARK_MODEL = "colbertv2.0-F16.gguf"  # Overridden by the first CLI argument
+RESULTS_FILE = "colbert_benchmark_results.csv"
+
+def find_model():
+    model_path = MODEL_DIR / (sys.argv[1] if len(sys.argv) > 1 else BENCHMARK_MODEL)
+    if model_path.exists():
+        return model_path
+    candidates = [m for m in get_model_files() if 'colbert' in m.name.lower()]
+    return candidates[0] if candidates else None
+
+def run_queries(model_path, test_queries, scoring, rerank_fn):
+    results = []
+    for query_data in test_queries:
+        result = test_model_with_query(model_path, query_data, rerank_fn=rerank_fn)
+        result['scoring'] = scoring
+        result['language'] = query_data.get('language', 'en')
+        results.append(result)
+    return results
+
+def save_to_csv(results, filename=RESULTS_FILE):
+    """Save per-query rows for both scoring paths to CSV file."""
+    with open(filename, 'w', newline='', encoding='utf-8') as csvfile:
+        fieldnames = [
+            'model_name',
+            'scoring',
+            'language',
+            'domain',
+            'success',
+            'response_time_seconds',
+            'top_score',
+            'top_document_index',
+            'correct_answer',
+            'all_scores',
+            'error',
+            'timestamp'
+        ]
+
+        writer = csv.DictWriter(csvfile, fieldnames=fieldnames, extrasaction='ignore')
+        writer.writeheader()
+
+        for result in results:
+            csv_result = result.copy()
+            if csv_result['all_scores']:
+                csv_result['all_scores'] = str(csv_result['all_scores'])
+            writer.writerow(csv_result)
+
+    print(f"\n✓ Results saved to {filename}")
+
+def print_summary(label, results):
+    successful = [r for r in results if r['success']]
+    if not successful:
+        print(f"  {label:<14} no successful queries")
+        return
+    accuracy = 100 * sum(1 for r in successful if r['correct_answer']) / len(results)
+    median_ms = statistics.median(r['response_time_seconds'] for r in successful) * 1000
+    print(f"  {label:<14} accuracy {accuracy:5.1f}%   median {median_ms:7.2f}ms   ({len(successful)}/{len(results)} ok)")
+
+def main():
+    """Compare MaxSim over precomputed token embeddings with cross-encoding."""
+    model_path = find_model()
+    if model_path is None:
+        print(f"✗ No ColBERT model found in {MODEL_DIR}")
+        return
+
+    test_queries = load_test_queries() + test_multilang.load_test_queries()
+    documents = list(dict.fromkeys(doc for q in test_queries for doc in q['documents']))
+
+    print("=" * 80)
+    print("COLBERT MAXSIM BENCHMARK")
+    print("=" * 80)
+    print(f"Model: {model_path.name}")
+    print(f"{len(test_queries)} queries, {len(documents)} distinct documents")
+
+    maxsim_results = []
+    reranker = None
+    process = None
+    try:
+        process = start_server(model_path, COLBERT_SERVER_ARGS)
+        if not wait_for_server():
+            print("✗ Server failed to start")
+            return
+
+        store = TokenEmbeddingStore(COLBERT_STORE_DIR / model_path.stem)
+        reranker = ColbertReranker(store)
+        start_time = time.perf_counter()
+        added = reranker.index_documents(documents)
+        index_seconds = time.perf_counter() - start_time
+        print(f"Indexed {added} new documents in {index_seconds:.2f}s "
+              f"({len(store)} stored, {store.rows} token vectors × {store.dim})")
+
+        reranker.rerank(test_queries[0]['query'], test_queries[0]['documents'])  # Warm-up
+        reranker.stats.update(query_seconds=0.0, maxsim_seconds=0.0)
+        maxsim_results = run_queries(model_path, test_queries, 'maxsim', reranker.rerank)
+    finally:
+        if process:
+            stop_server(process)
+
+    cross_results = []
+    process = None
+    try:
+        process = start_server(model_path)
+        if wait_for_server():
+            test_reranking(test_queries[0]['query'], test_queries[0]['documents'])  # Warm-up
+            cross_results = run_queries(model_path, test_queries, 'cross-encoder', test_reranking)
+        else:
+            print("✗ Server failed to start in /rerank mode")
+    finally:
+        if process:
+            stop_server(process)
+
+    save_to_csv(maxsim_results + cross_results)
+
+    print("\n" + "=" * 80)
+    print("SUMMARY")
+    print("=" * 80)
+    print_summary("MaxSim", maxsim_results)
+    print_summary("Cross-encoder", cross_results)
+    if maxsim_results:
+        count = len(maxsim_results)
+        print(f"\n  MaxSim split per query: query encoding {1000 * reranker.stats['query_seconds'] / count:.2f}ms, "
+              f"NumPy scoring {1000 * reranker.stats['maxsim_seconds'] / count:.3f}ms")
+
+if __name__ == "__main__":
+    main()
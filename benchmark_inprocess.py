@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+HTTP vs in-process latency benchmark.
+
+Runs the same queries against each model twice: through llama-server's
+/rerank endpoint and in-process through llama-cpp-python (inprocess_backend.py).
+Both passes go through test_model_with_query(), so rows share the usual result
+schema plus a `backend` column. The summary shows the median latency of each
+backend, the difference (HTTP, JSON and server scheduling overhead) and whether
+both backends agree on the top document.
+"""
+
+import csv
+import statistics
+import sys
+
+import test_multilang
+from inprocess_backend import InProcessReranker, is_available
+from test_all_models import (
+    MODEL_DIR,
+    load_test_queries,
+    start_server,
+    stop_server,
+    test_model_with_query,
+    test_reranking,
+    wait_for_server,
+)
+
+# --- Configuration ---
+# Small models, where a fixed per-request overhead is the largest share of latency.
+# Overridden by model file names given on the command line.
+BENCHMARK_MODELS = [
+    "ms-marco-TinyBERT-L2-v2-Q4_K_M.gguf",
+    "ms-marco-MiniLM-L6-v2-Q4_K_M.gguf",
+    "jina-reranker-v1-tiny-en-Q4_K_M.gguf",
+    "bge-reranker-v2-m3-Q4_K_M.gguf"
+]
+RESULTS_FILE = "inprocess_benchmark_results.csv"
+REPEATS = 3  # Passes over the query set per backend; medians are taken over all of them
+
+def run_backend(model_path, test_queries, backend, rerank_fn):
+    """Run every query REPEATS times and tag the rows with the backend name."""
+    results = []
+    rerank_fn(test_queries[0]['query'], test_queries[0]['documents'])  # Warm-up
+    for _ in range(REPEATS):
+        for query_data in test_queries:
+            result = test_model_with_query(model_path, query_data, rerank_fn=rerank_fn)
+            result['backend'] = backend
+            result['language'] = query_data.get('language', 'en')
+            results.append(result)
+    return results
+
+def save_to_csv(results, filename=RESULTS_FILE):
+    """Save per-query rows for both backends to CSV file."""
+    with open(filename, 'w', newline='', encoding='utf-8') as csvfile:
+        fieldnames = [
+            'model_name',
+            'model_size_mb',
+            'backend',
+            'language',
+            'domain',
+            'success',
+            'response_time_seconds',
+            'top_score',
+            'top_document_index',
+            'correct_answer',
+            'all_scores',
+            'error',
+            'timestamp'
+        ]
+
+        writer = csv.DictWriter(csvfile, fieldnames=fieldnames, extrasaction='ignore')
+        writer.writeheader()
+
+        for result in results:
+            csv_result = result.copy()
+            if csv_result['all_scores']:
+                csv_result['all_scores'] = str(csv_result['all_scores'])
+            writer.writerow(csv_result)
+
+    print(f"\n✓ Results saved to {filename}")
+
+def print_comparison(model_name, http_results, inprocess_results):
+    http_times = [r['response_time_seconds'] for r in http_results if r['success']]
+    local_times = [r['response_time_seconds'] for r in inprocess_results if r['success']]
+    if not http_times or not local_times:
+        print(f"  {model_name}: not enough successful requests to compare")
+        return
+
+    http_ms = statistics.median(http_times) * 1000
+    local_ms = statistics.median(local_times) * 1000
+    overhead_ms = http_ms - local_ms
+    pairs = [(h, l) for h, l in zip(http_results, inprocess_results) if h['success'] and l['success']]
+    agree = sum(1 for h, l in pairs if h['top_document_index'] == l['top_document_index'])
+
+    print(f"  {model_name}")
+    print(f"    llama-server (HTTP): {http_ms:7.2f}ms median")
+    print(f"    in-process:          {local_ms:7.2f}ms median")
+    print(f"    HTTP overhead:       {overhead_ms:7.2f}ms ({100 * overhead_ms / http_ms:.0f}% of the HTTP request)")
+    print(f"    Top-1 agreement:     {agree}/{len(pairs)}")
+
+def main():
+    """Benchmark each model through llama-server and in-process."""
+    if not is_available():
+        print("✗ llama-cpp-python is not installed (uv pip install llama-cpp-python)")
+        return
+
+    model_names = sys.argv[1:] or BENCHMARK_MODELS
+    test_queries = load_test_queries() + test_multilang.load_test_queries()
+
+    print("=" * 80)
+    print("HTTP VS IN-PROCESS BENCHMARK")
+    print("=" * 80)
+    print(f"{len(test_queries)} queries × {REPEATS} repeats per backend")
+
+    all_results = []
+    comparisons = []
+    for model_name in model_names:
+        model_path = MODEL_DIR / model_name
+        if not model_path.exists():
+            print(f"✗ Model not found: {model_path}")
+            continue
+        print(f"\nTesting: {model_name}")
+        print("-" * 80)
+
+        http_results = []
+        process = None
+        try:
+            process = start_server(model_path)
+            if wait_for_server():
+                http_results = run_backend(model_path, test_queries, 'llama-server', test_reranking)
+            else:
+                print("✗ Server failed to start")
+        finally:
+            if process:
+                stop_server(process)
+
+        # Load in-process only after the server exits so the two never share cores
+        inprocess_results = []
+        reranker = None
+        try:
+            reranker = InProcessReranker(model_path)
+            inprocess_results = run_backend(model_path, test_queries, 'in-process', reranker.rerank)
+        except Exception as e:
+            print(f"✗ In-process backend failed: {e}")
+        finally:
+            if reranker:
+                reranker.close()
+
+        all_results.extend(http_results + inprocess_results)
+        comparisons.append((model_name, http_results, inprocess_results))
+
+    save_to_csv(all_results)
+
+    print("\n" + "=" * 80)
+    print("SUMMARY")
+    print("=" * 80)
+    for model_name, http_results, inprocess_results in comparisons:
+        print_comparison(model_name, http_results, inprocess_results)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""
+Model load-path benchmark for llama-server.
+
+Starts every GGUF in MODEL_DIR with default mmap, --no-mmap and --mlock, each
+with a cold and a warm page cache, and measures time-to-ready and
+time-to-first-rerank. Cold starts drop the model file from the page cache with
+posix_fadvise(DONTNEED), which does not need root.
+"""
+
+import csv
+import os
+import statistics
+import time
+from collections import defaultdict
+from datetime import datetime
+
+from quant_types import quant_sort_key, quant_type
+from test_all_models import (
+    MODEL_DIR,
+    TIMEOUT_SECONDS,
+    get_model_files,
+    load_test_queries,
+    start_server,
+    stop_server,
+    test_reranking,
+    wait_for_server,
+)
+
+# --- Configuration ---
+RESULTS_FILE = "load_benchmark_results.csv"
+REPORT_FILE = "REPORT_LOAD_MODES.md"
+TRIALS = 3  # Starts per model, load mode and cache state
+POLL_INTERVAL = 0.05  # Health-check interval; bounds time-to-ready resolution
+READ_CHUNK_BYTES = 16 * 1024 * 1024
+
+LOAD_MODES = {
+    'mmap': [],
+    'no-mmap': ['--no-mmap'],
+    'mlock': ['--mlock']
+}
+
+CACHE_STATES = ['cold', 'warm']
+
+def get_quant_type(model_name: str) -> str:
+    """Extract the quantization label from a model file name."""
+    return quant_type(model_name) or 'unknown'
+
+def drop_from_page_cache(model_path) -> bool:
+    """Evict a file's pages from the page cache. Returns False if unsupported."""
+    if not hasattr(os, 'posix_fadvise'):
+        return False
+    fd = os.open(model_path, os.O_RDONLY)
+    try:
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+    finally:
+        os.close(fd)
+    return True
+
+def warm_page_cache(model_path) -> None:
+    """Read the whole file once so its pages are resident in the page cache."""
+    with open(model_path, 'rb') as f:
+        while f.read(READ_CHUNK_BYTES):
+            pass
+
+def measure_start(model_path, extra_args, probe_query):
+    """Start a server and time readiness and the first rerank request."""
+    result = {
+        'success': False,
+        'time_to_ready_seconds': None,
+        'time_to_first_rerank_seconds': None,
+        'first_rerank_seconds': None,
+        'error': None
+    }
+
+    process = None
+    try:
+        start_time = time.perf_counter()
+        process = start_server(model_path, extra_args)
+        if not wait_for_server(TIMEOUT_SECONDS, POLL_INTERVAL):
+            result['error'] = 'Server failed to start'
+            return result
+        result['time_to_ready_seconds'] = round(time.perf_counter() - start_time, 3)
+
+        _, elapsed_time = test_reranking(probe_query['query'], probe_query['documents'])
+        result['time_to_first_rerank_seconds'] = round(time.perf_counter() - start_time, 3)
+        result['first_rerank_seconds'] = round(elapsed_time, 3)
+        result['success'] = True
+
+    except Exception as e:
+        result['error'] = str(e)
+
+    finally:
+        if process:
+            stop_server(process)
+
+    return result
+
+def save_to_csv(results, filename=RESULTS_FILE):
+    """Save load benchmark results to CSV file."""
+    with open(filename, 'w', newline='') as csvfile:
+        fieldnames = [
+            'model_name',
+            'model_size_mb',
+            'quant_type',
+            'load_mode',
+            'cache_state',
+            'trial',
+            'success',
+            'time_to_ready_seconds',
+            'time_to_first_rerank_seconds',
+            'first_rerank_seconds',
+            'error',
+            'timestamp'
+        ]
+
+        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
+        writer.writeheader()
+        writer.writerows(results)
+
+    print(f"\n✓ Results saved to {filename}")
+
+def format_seconds(values) -> str:
+    """Format the median of a list of timings in ms, or '-' if empty."""
+    if not values:
+        return "-"
+    return f"{int(statistics.median(values) * 1000)}ms"
+
+def generate_report(results) -> str:
+    """Build a markdown report of median start-up times per model and quantization."""
+    successful = [r for r in results if r['success']]
+    columns = [(mode, cache) for mode in LOAD_MODES for cache in CACHE_STATES]
+
+    report = """# Model Load-Path Benchmark
+
+## Overview
+
+Median time-to-ready (server start until `/health` returns 200) and
+time-to-first-rerank (server start until the first `/rerank` response) for
+each load mode and page-cache state.
+
+"""
+    report += f"**Trials per configuration:** {TRIALS}\n"
+    report += f"**Models:** {len(set(r['model_name'] for r in results))}\n\n"
+
+    header = "| Model | Size | " + " | ".join(f"{mode} ({cache})" for mode, cache in columns) + " |\n"
+    divider = "|-------|------|" + "|".join(["-----"] * len(columns)) + "|\n"
+
+    by_model = defaultdict(lambda: defaultdict(lambda: {'ready': [], 'first': []}))
+    sizes = {}
+    for r in successful:
+        timings = by_model[r['model_name']][(r['load_mode'], r['cache_state'])]
+        timings['ready'].append(r['time_to_ready_seconds'])
+        timings['first'].append(r['time_to_first_rerank_seconds'])
+        sizes[r['model_name']] = r['model_size_mb']
+
+    for metric, title in [('ready', 'Time to Ready'), ('first', 'Time to First Rerank')]:
+        report += f"## {title}\n"
+        for quant in sorted({get_quant_type(m) for m in by_model}, key=quant_sort_key):
+            models = sorted((m for m in by_model if get_quant_type(m) == quant), key=lambda m: sizes[m])
+            if not models:
+                continue
+            report += f"\n### {quant}\n\n" + header + divider
+            for model in models:
+                cells = [format_seconds(by_model[model][column][metric]) for column in columns]
+                report += f"| {model} | {int(sizes[model])} MB | " + " | ".join(cells) + " |\n"
+        report += "\n"
+
+    # Aggregate view: how much each mode costs per GB of weights
+    report += "## Seconds to Ready per GB (median across models)\n\n"
+    report += "| Load Mode | Cold | Warm |\n|-----------|------|------|\n"
+    for mode in LOAD_MODES:
+        cells = []
+        for cache in CACHE_STATES:
+            per_gb = [r['time_to_ready_seconds'] / (r['model_size_mb'] / 1024)
+                      for r in successful
+                      if r['load_mode'] == mode and r['cache_state'] == cache and r['model_size_mb'] > 0]
+            cells.append(f"{statistics.median(per_gb):.2f}s" if per_gb else "-")
+        report += f"| {mode} | {cells[0]} | {cells[1]} |\n"
+
+    failed = [r for r in results if not r['success']]
+    if failed:
+        report += f"\n## Failed Starts ({len(failed)})\n\n"
+        for r in failed:
+            report += f"- {r['model_name']} [{r['load_mode']}, {r['cache_state']}, trial {r['trial']}]: {r['error']}\n"
+
+    return report
+
+def main():
+    """Benchmark every model under every load mode and cache state."""
+    print("=" * 80)
+    print("MODEL LOAD-PATH BENCHMARK")
+    print("=" * 80)
+
+    probe_query = load_test_queries()[0]
+    model_files = get_model_files()
+    print(f"Found {len(model_files)} models in {MODEL_DIR}")
+
+    can_drop_cache = hasattr(os, 'posix_fadvise')
+    cache_states = CACHE_STATES if can_drop_cache else ['warm']
+    if not can_drop_cache:
+        print("posix_fadvise is not available on this platform - measuring warm starts only")
+
+    total_runs = len(model_files) * len(LOAD_MODES) * len(cache_states) * TRIALS
+    print(f"Total server starts: {total_runs}")
+    print("=" * 80)
+
+    all_results = []
+    for model_idx, model_path in enumerate(model_files, 1):
+        print(f"\n[Model {model_idx}/{len(model_files)}] {model_path.name}")
+        print("-" * 80)
+        model_size_mb = round(model_path.stat().st_size / (1024 * 1024), 2)
+
+        for mode, extra_args in LOAD_MODES.items():
+            for cache_state in cache_states:
+                for trial in range(1, TRIALS + 1):
+                    if cache_state == 'cold':
+                        drop_from_page_cache(model_path)
+                    else:
+                        warm_page_cache(model_path)
+
+                    result = measure_start(model_path, extra_args, probe_query)
+                    result.update({
+                        'model_name': model_path.name,
+                        'model_size_mb': model_size_mb,
+                        'quant_type': get_quant_type(model_path.name),
+                        'load_mode': mode,
+                        'cache_state': cache_state,
+                        'trial': trial,
+                        'timestamp': datetime.now().isoformat()
+                    })
+                    all_results.append(result)
+
+                    if result['success']:
+                        print(f"  ✓ {mode:8s} {cache_state:5s} #{trial}: ready={result['time_to_ready_seconds']}s, "
+                              f"first rerank={result['time_to_first_rerank_seconds']}s")
+                    else:
+                        print(f"  ✗ {mode:8s} {cache_state:5s} #{trial}: {result['error']}")
+
+        # Save intermediate results after each model
+        save_to_csv(all_results)
+
+    with open(REPORT_FILE, 'w') as f:
+        f.write(generate_report(all_results))
+    print(f"✓ Report saved to {REPORT_FILE}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+"""
+Retrieve-then-rerank pipeline benchmark.
+
+Builds a corpus from every document in the English and multilingual query
+sets plus seeded synthetic filler (stored once per query set with
+corpus_store.py), embeds it through an embedding model's /v1/embeddings
+endpoint and keeps the normalized vectors in a NumPy matrix. The vectors are saved next to the
+corpus, so later runs with the same embedding model skip that step.
+Each query is then embedded, the top-N documents are retrieved by cosine
+similarity and reranked with the chosen reranker. Reports latency per stage,
+recall@k of the first stage and end-to-end top-1 accuracy for each N, which
+is what sizing N against the rerank cost needs.
+
+Usage:
+    python benchmark_pipeline.py --embedding-model ~/models/bge-m3-Q4_K_M.gguf \\
+        --reranker bge-reranker-v2-m3-Q4_K_M.gguf
+"""
+
+import argparse
+import csv
+import hashlib
+import random
+import statistics
+import subprocess
+import time
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import requests
+
+import test_multilang
+from corpus_store import CORPUS_DIR, CorpusStore, write_corpus
+from test_all_models import (
+    MODEL_DIR,
+    SERVER_COMMAND,
+    TIMEOUT_SECONDS,
+    load_test_queries,
+    start_server,
+    stop_server,
+    test_reranking,
+    wait_for_server,
+)
+
+# --- Configuration ---
+EMBEDDING_PORT = 8081  # The reranker keeps PORT from test_all_models.py
+EMBEDDING_BATCH = 32
+REQUEST_TIMEOUT = 120
+FILLER_DOCUMENTS = 2000
+RETRIEVE_N = [5, 10, 20, 50]  # Candidates passed to the reranker
+RECALL_K = [1, 5, 10, 20, 50]
+RESULTS_FILE = "pipeline_benchmark_results.csv"
+SEED = 42
+
+def synthetic_filler(documents, count, seed=SEED):
+    """Distractor passages built from the corpus vocabulary, so they share its scripts and length."""
+    rng = random.Random(seed)
+    tokenized = [doc.split() for doc in documents]
+    vocabulary = [word for words in tokenized for word in words]
+    lengths = [len(words) for words in tokenized]
+    return [" ".join(rng.choices(vocabulary, k=rng.choice(lengths))) for _ in range(count)]
+
+def query_set_documents(test_queries):
+    """Unique query-set documents; they take IDs 0..n-1 in the pipeline corpus."""
+    return list(dict.fromkeys(doc for q in test_queries for doc in q['documents']))
+
+def open_corpus(test_queries, filler_count=FILLER_DOCUMENTS):
+    """Open the pipeline corpus, writing it on first use.
+
+    The directory is keyed on a hash of the query-set documents, so a changed
+    query set gets a new corpus instead of stale document IDs.
+    """
+    documents = query_set_documents(test_queries)
+    digest = hashlib.sha256("\0".join(documents).encode('utf-8')).hexdigest()[:12]
+    path = CORPUS_DIR / f"pipeline_{filler_count}_{SEED}_{digest}"
+    if (path / "meta.json").exists():
+        return CorpusStore(path)
+    return write_corpus(path, documents + synthetic_filler(documents, filler_count))
+
+def start_embedding_server(model_path):
+    """Start llama-server in embedding mode on EMBEDDING_PORT."""
+    cmd = SERVER_COMMAND + ["-m", str(model_path), "--port", str(EMBEDDING_PORT), "--embedding"]
+    print(f"Starting embedding server with model: {Path(model_path).name}")
+    return subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+
+def wait_for_embedding_server(timeout=TIMEOUT_SECONDS):
+    start_time = time.time()
+    while time.time() - start_time < timeout:
+        try:
+            if requests.get(f"http://localhost:{EMBEDDING_PORT}/health", timeout=2).status_code == 200:
+                return True
+        except requests.exceptions.RequestException:
+            pass
+        time.sleep(1)
+    return False
+
+def embed(texts):
+    """Embed a batch of texts. Returns L2-normalized float32 rows in input order."""
+    response = requests.post(
+        f"http://localhost:{EMBEDDING_PORT}/v1/embeddings",
+        json={"input": texts},
+        timeout=REQUEST_TIMEOUT
+    )
+    response.raise_for_status()
+    data = sorted(response.json()['data'], key=lambda x: x['index'])
+    matrix = np.asarray([item['embedding'] for item in data], dtype=np.float32)
+    return matrix / np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12)
+
+def embed_corpus(corpus, name, batch_size=EMBEDDING_BATCH):
+    """Normalized float32 corpus vectors, embedding and storing them if the corpus has none under name."""
+    if not corpus.has_embeddings(name):
+        corpus.write_embeddings(name, (embed(texts) for _, texts in corpus.batches(batch_size)))
+    return np.asarray(corpus.embeddings(name), dtype=np.float32)
+
+def search(index, query_vector, top_n):
+    """IDs of the top_n documents by cosine similarity, best first."""
+    scores = index @ query_vector
+    top = np.argpartition(-scores, min(top_n, len(scores) - 1))[:top_n]
+    return top[np.argsort(-scores[top])].tolist()
+
+def save_to_csv(results, filename=RESULTS_FILE):
+    """Save per (query, N) pipeline rows to CSV file."""
+    with open(filename, 'w', newline='', encoding='utf-8') as csvfile:
+        fieldnames = [
+            'reranker',
+            'language',
+            'domain',
+            'retrieve_n',
+            'retrieved',
+            'correct_answer',
+            'embed_ms',
+            'search_ms',
+            'rerank_ms',
+            'total_ms',
+            'error',
+            'timestamp'
+        ]
+
+        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
+        writer.writeheader()
+        writer.writerows(results)
+
+    print(f"\n✓ Results saved to {filename}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark embedding retrieval followed by reranking.")
+    parser.add_argument('--embedding-model', required=True, help="GGUF embedding model path")
+    parser.add_argument('--reranker', default="bge-reranker-v2-m3-Q4_K_M.gguf", help=f"Reranker file in {MODEL_DIR}")
+    parser.add_argument('--filler', type=int, default=FILLER_DOCUMENTS, help="Synthetic distractor documents")
+    args = parser.parse_args()
+
+    test_queries = load_test_queries() + test_multilang.load_test_queries()
+    # Recall and top-1 need a relevant document to look for
+    unlabeled = [q for q in test_queries if q['correct_doc_index'] is None]
+    if unlabeled:
+        print(f"⚠️  Skipping {len(unlabeled)} queries without a relevant document")
+        test_queries = [q for q in test_queries if q['correct_doc_index'] is not None]
+    corpus = open_corpus(test_queries, args.filler)
+    doc_ids = {doc: i for i, doc in enumerate(query_set_documents(test_queries))}
+    reranker_path = MODEL_DIR / args.reranker
+
+    print("=" * 80)
+    print("RETRIEVE-THEN-RERANK PIPELINE BENCHMARK")
+    print("=" * 80)
+    print(f"Corpus: {len(corpus)} documents ({len(corpus) - args.filler} from query sets, {args.filler} filler)")
+    print(f"Queries: {len(test_queries)}, reranker: {reranker_path.name}")
+
+    results = []
+    recall_hits = {k: 0 for k in RECALL_K}
+    embed_process = None
+    rerank_process = None
+    try:
+        embed_process = start_embedding_server(args.embedding_model)
+        rerank_process = start_server(reranker_path)
+        if not wait_for_embedding_server() or not wait_for_server():
+            print("✗ Servers failed to start")
+            return
+
+        cached = corpus.has_embeddings(Path(args.embedding_model).stem)
+        start_time = time.perf_counter()
+        index = embed_corpus(corpus, Path(args.embedding_model).stem)
+        elapsed = time.perf_counter() - start_time
+        if cached:
+            print(f"Loaded stored corpus embeddings in {elapsed:.2f}s, index {index.shape}")
+        else:
+            print(f"Embedded corpus in {elapsed:.1f}s ({len(corpus) / elapsed:.0f} docs/s), index {index.shape}")
+
+        test_reranking(test_queries[0]['query'], test_queries[0]['documents'])  # Warm-up
+        for query_data in test_queries:
+            correct_id = doc_ids[query_data['documents'][query_data['correct_doc_index']]]
+
+            start_time = time.perf_counter()
+            query_vector = embed([query_data['query']])[0]
+            embed_ms = (time.perf_counter() - start_time) * 1000
+
+            start_time = time.perf_counter()
+            ranked_ids = search(index, query_vector, max(RETRIEVE_N + RECALL_K))
+            search_ms = (time.perf_counter() - start_time) * 1000
+
+            for k in RECALL_K:
+                recall_hits[k] += correct_id in ranked_ids[:k]
+
+            for top_n in RETRIEVE_N:
+                candidates = ranked_ids[:top_n]
+                row = {
+                    'reranker': reranker_path.name,
+                    'language': query_data.get('language', 'en'),
+                    'domain': query_data['domain'],
+                    'retrieve_n': top_n,
+                    'retrieved': correct_id in candidates,
+                    'correct_answer': False,
+                    'embed_ms': round(embed_ms, 2),
+                    'search_ms': round(search_ms, 3),
+                    'rerank_ms': None,
+                    'total_ms': None,
+                    'error': None,
+                    'timestamp': datetime.now().isoformat()
+                }
+                try:
+                    sorted_results, rerank_time = test_reranking(query_data['query'], corpus.get_many(candidates))
+                    row['rerank_ms'] = round(rerank_time * 1000, 2)
+                    row['total_ms'] = round(embed_ms + search_ms + row['rerank_ms'], 2)
+                    row['correct_answer'] = candidates[sorted_results[0]['index']] == correct_id
+                except Exception as e:
+                    row['error'] = str(e)
+                results.append(row)
+    finally:
+        for process in [embed_process, rerank_process]:
+            if process:
+                stop_server(process)
+        corpus.close()
+
+    save_to_csv(results)
+
+    print("\n" + "=" * 80)
+    print("FIRST-STAGE RECALL")
+    print("=" * 80)
+    for k in RECALL_K:
+        print(f"  recall@{k:<3} {100 * recall_hits[k] / len(test_queries):5.1f}%")
+
+    print(f"\n{'N':>4} {'Embed':>10} {'Search':>10} {'Rerank':>10} {'Total':>10} {'Top-1':>8}   (medians)")
+    for top_n in RETRIEVE_N:
+        rows = [r for r in results if r['retrieve_n'] == top_n and r['error'] is None]
+        if not rows:
+            continue
+        accuracy = 100 * sum(r['correct_answer'] for r in rows) / len(rows)
+        print(f"{top_n:>4} {statistics.median(r['embed_ms'] for r in rows):>8.2f}ms "
+              f"{statistics.median(r['search_ms'] for r in rows):>8.3f}ms "
+              f"{statistics.median(r['rerank_ms'] for r in rows):>8.2f}ms "
+              f"{statistics.median(r['total_ms'] for r in rows):>8.2f}ms {accuracy:>7.1f}%")
+
+if __name__ == "__main__":
+    main()
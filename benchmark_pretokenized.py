@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+Pre-tokenized rerank payload benchmark.
+
+Tokenizes every document once per tokenizer family (cached on disk under
+.token_cache/, keyed by vocabulary fingerprint) and compares /rerank latency
+when documents are sent as raw strings versus token ID arrays. Documents are
+also lengthened by repetition to show how the saving grows with length.
+"""
+
+import csv
+import statistics
+import time
+from collections import defaultdict
+from datetime import datetime
+
+import requests
+
+from test_all_models import (
+    MODEL_DIR,
+    PORT,
+    get_model_files,
+    load_test_queries,
+    start_server,
+    stop_server,
+    test_reranking,
+    wait_for_server,
+)
+from tokenization import TokenCounter, TokenIdCache, vocab_fingerprint
+
+# --- Configuration ---
+RESULTS_FILE = "pretokenized_benchmark_results.csv"
+TRIALS = 5  # Timed requests per query, length and payload type
+LENGTH_MULTIPLIERS = [1, 8, 32]  # Each document repeated this many times
+SCORE_TOLERANCE = 1e-3  # Max score difference for token input to count as equivalent
+
+def lengthen(documents, multiplier):
+    """Repeat each document to build longer candidates with the same content."""
+    if multiplier == 1:
+        return list(documents)
+    return [" ".join([doc] * multiplier) for doc in documents]
+
+def scores_by_index(sorted_results):
+    return [r['relevance_score'] for r in sorted(sorted_results, key=lambda x: x['index'])]
+
+def check_token_input_support(query_data, token_counter):
+    """Check whether this server build accepts token ID arrays as documents.
+
+    Returns (supported, reason). Token input only counts as supported when it
+    reproduces the string-input scores.
+    """
+    try:
+        token_docs = [token_counter.tokenize(doc) for doc in query_data['documents']]
+        text_results, _ = test_reranking(query_data['query'], query_data['documents'])
+        token_results, _ = test_reranking(query_data['query'], token_docs)
+    except requests.exceptions.HTTPError as e:
+        return False, f"rejected token input ({e.response.status_code})"
+    except (requests.exceptions.RequestException, ValueError) as e:
+        return False, f"token input check failed ({e})"
+
+    text_scores = scores_by_index(text_results)
+    token_scores = scores_by_index(token_results)
+    if len(text_scores) != len(token_scores):
+        return False, "result count mismatch"
+    if any(abs(a - b) > SCORE_TOLERANCE for a, b in zip(text_scores, token_scores)):
+        return False, "scores differ from string input"
+    return True, "ok"
+
+def time_payload(query, documents):
+    """Median latency of TRIALS rerank calls for one payload."""
+    times = []
+    for _ in range(TRIALS):
+        _, elapsed_time = test_reranking(query, documents)
+        times.append(elapsed_time)
+    return statistics.median(times)
+
+def benchmark_model(model_path, test_queries):
+    """Compare string and token-ID payloads for one model. Returns result rows."""
+    base_url = f"http://localhost:{PORT}"
+    vocab_hash = vocab_fingerprint(base_url)
+    id_cache = TokenIdCache(vocab_hash)
+    cached_before = len(id_cache)
+    token_counter = TokenCounter(base_url, id_cache=id_cache)
+
+    # Tokenize every (lengthened) document once; reused by later quants of the same model
+    tokenize_start = time.perf_counter()
+    for query_data in test_queries:
+        for multiplier in LENGTH_MULTIPLIERS:
+            for doc in lengthen(query_data['documents'], multiplier):
+                token_counter.tokenize(doc)
+    tokenize_seconds = time.perf_counter() - tokenize_start
+    id_cache.save()
+    print(f"  Vocabulary {vocab_hash}: {cached_before} cached texts, "
+          f"{id_cache.misses} tokenized in {tokenize_seconds:.2f}s")
+
+    supported, reason = check_token_input_support(test_queries[0], token_counter)
+    if not supported:
+        print(f"  ✗ Token ID documents not usable with this server: {reason}")
+
+    rows = []
+    for query_data in test_queries:
+        for multiplier in LENGTH_MULTIPLIERS:
+            documents = lengthen(query_data['documents'], multiplier)
+            token_docs = [token_counter.tokenize(doc) for doc in documents]
+
+            row = {
+                'model_name': model_path.name,
+                'vocab_hash': vocab_hash,
+                'domain': query_data['domain'],
+                'length_multiplier': multiplier,
+                'document_tokens': sum(len(t) for t in token_docs),
+                'token_input_supported': supported,
+                'support_note': reason,
+                'string_time_seconds': None,
+                'token_time_seconds': None,
+                'saved_ms': None,
+                'error': None,
+                'timestamp': datetime.now().isoformat()
+            }
+
+            try:
+                row['string_time_seconds'] = round(time_payload(query_data['query'], documents), 4)
+                if supported:
+                    row['token_time_seconds'] = round(time_payload(query_data['query'], token_docs), 4)
+                    row['saved_ms'] = round((row['string_time_seconds'] - row['token_time_seconds']) * 1000, 2)
+            except Exception as e:
+                row['error'] = str(e)
+
+            rows.append(row)
+
+        if supported and rows[-1]['saved_ms'] is not None:
+            print(f"  {query_data['domain']:12s}: saved {rows[-1]['saved_ms']}ms at {LENGTH_MULTIPLIERS[-1]}x length")
+
+    return rows
+
+def save_to_csv(results, filename=RESULTS_FILE):
+    """Save benchmark rows to CSV file."""
+    with open(filename, 'w', newline='') as csvfile:
+        fieldnames = [
+            'model_name',
+            'vocab_hash',
+            'domain',
+            'length_multiplier',
+            'document_tokens',
+            'token_input_supported',
+            'support_note',
+            'string_time_seconds',
+            'token_time_seconds',
+            'saved_ms',
+            'error',
+            'timestamp'
+        ]
+
+        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
+        writer.writeheader()
+        writer.writerows(results)
+
+    print(f"\n✓ Results saved to {filename}")
+
+def print_summary(results):
+    """Print median latency saved per request by model and document length."""
+    print("\n" + "=" * 80)
+    print("LATENCY SAVED PER REQUEST (median, string input - token input)")
+    print("=" * 80)
+
+    saved = defaultdict(lambda: defaultdict(list))
+    tokens = defaultdict(lambda: defaultdict(list))
+    unsupported = {}
+    for r in results:
+        if r['saved_ms'] is not None:
+            saved[r['model_name']][r['length_multiplier']].append(r['saved_ms'])
+            tokens[r['model_name']][r['length_multiplier']].append(r['document_tokens'])
+        elif not r['token_input_supported']:
+            unsupported[r['model_name']] = r['support_note']
+
+    header = f"{'Model':<50}" + "".join(f"{f'{m}x':>14}" for m in LENGTH_MULTIPLIERS)
+    print(header)
+    print("-" * len(header))
+    for model in sorted(saved):
+        cells = []
+        for multiplier in LENGTH_MULTIPLIERS:
+            values = saved[model][multiplier]
+            if values:
+                avg_tokens = int(statistics.mean(tokens[model][multiplier]))
+                cells.append(f"{statistics.median(values):+.2f}ms/{avg_tokens}t")
+            else:
+                cells.append("-")
+        print(f"{model:<50}" + "".join(f"{c:>14}" for c in cells))
+
+    for model, note in sorted(unsupported.items()):
+        print(f"{model:<50} token input unsupported: {note}")
+
+def main():
+    """Benchmark string versus pre-tokenized rerank payloads for every model."""
+    print("=" * 80)
+    print("PRE-TOKENIZED PAYLOAD BENCHMARK")
+    print("=" * 80)
+
+    test_queries = load_test_queries()
+    model_files = get_model_files()
+    print(f"Loaded {len(test_queries)} queries, found {len(model_files)} models in {MODEL_DIR}")
+
+    all_results = []
+    for model_idx, model_path in enumerate(model_files, 1):
+        print(f"\n[Model {model_idx}/{len(model_files)}] {model_path.name}")
+        print("-" * 80)
+
+        process = None
+        try:
+            process = start_server(model_path)
+            if not wait_for_server():
+                print("✗ Server failed to start - skipping model")
+                continue
+            all_results.extend(benchmark_model(model_path, test_queries))
+
+        except Exception as e:
+            print(f"✗ Unexpected error: {e}")
+
+        finally:
+            if process:
+                stop_server(process)
+
+        save_to_csv(all_results)
+
+    print_summary(all_results)
+
+if __name__ == "__main__":
+    main()
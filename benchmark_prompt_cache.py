@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+Prompt/KV cache reuse benchmark for llama-server reranking.
+
+Replays three workloads against every model with prompt caching off, on, and
+on with slot affinity (requests pinned to a slot by query hash):
+- repeated: the same query and documents sent several times in a row
+- shared-prefix: distinct queries that all start with the same long instruction
+- disjoint: every query sent once
+
+Every workload runs on a freshly started server, so the disjoint workload
+never finds the texts the repeated workload already sent in the cache.
+
+The latency and throughput differences show whether slot-affinity routing in
+front of the servers would pay off.
+"""
+
+import csv
+import hashlib
+import statistics
+import time
+from datetime import datetime
+
+from test_all_models import (
+    MODEL_DIR,
+    get_model_files,
+    get_total_slots,
+    load_test_queries,
+    start_server,
+    stop_server,
+    test_reranking,
+    wait_for_server,
+)
+
+# --- Configuration ---
+RESULTS_FILE = "prompt_cache_benchmark_results.csv"
+REPEATS = 5  # Sends per query in the repeated workload
+SERVER_PARALLEL = 4  # Slots per server, so affinity has something to choose from
+CACHE_REUSE_TOKENS = 256  # --cache-reuse chunk size when caching is on
+
+# Instruction-style prefix shared by every query in the shared-prefix workload
+SHARED_PREFIX = (
+    "Instruct: Given a user question from a customer support search engine, "
+    "judge whether the passage directly answers the question. Prefer passages "
+    "that state the fact explicitly over passages that are merely on the same "
+    "topic, mention related entities, or only share keywords with the question. "
+    "Question:"
+)
+
+CACHE_MODES = {
+    'off': {'server_args': [], 'cache_prompt': False, 'affinity': False},
+    'on': {'server_args': ['--cache-reuse', str(CACHE_REUSE_TOKENS)], 'cache_prompt': True, 'affinity': False},
+    'on+affinity': {'server_args': ['--cache-reuse', str(CACHE_REUSE_TOKENS)], 'cache_prompt': True, 'affinity': True}
+}
+
+WORKLOADS = ['repeated', 'shared-prefix', 'disjoint']
+
+def build_workload(name, test_queries):
+    """Return the ordered list of (query, documents) requests for a workload."""
+    if name == 'repeated':
+        return [(q['query'], q['documents']) for q in test_queries for _ in range(REPEATS)]
+    if name == 'shared-prefix':
+        return [(f"{SHARED_PREFIX} {q['query']}", q['documents']) for q in test_queries]
+    return [(q['query'], q['documents']) for q in test_queries]
+
+def slot_for(query, total_slots):
+    """Stable slot choice per query, as an affinity router would make."""
+    return int(hashlib.md5(query.encode('utf-8')).hexdigest(), 16) % total_slots
+
+def run_workload(requests_list, mode, total_slots):
+    """Send a workload sequentially and return per-request latencies and wall time."""
+    times = []
+    wall_start = time.perf_counter()
+    for query, documents in requests_list:
+        extra_payload = {'cache_prompt': mode['cache_prompt']}
+        if mode['affinity']:
+            extra_payload['id_slot'] = slot_for(query, total_slots)
+        _, elapsed_time = test_reranking(query, documents, extra_payload)
+        times.append(elapsed_time)
+    return times, time.perf_counter() - wall_start
+
+def save_to_csv(results, filename=RESULTS_FILE):
+    """Save per-workload summaries to CSV file."""
+    with open(filename, 'w', newline='') as csvfile:
+        fieldnames = [
+            'model_name',
+            'cache_mode',
+            'workload',
+            'requests',
+            'success',
+            'median_time_seconds',
+            'p95_time_seconds',
+            'throughput_rps',
+            'error',
+            'timestamp'
+        ]
+
+        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
+        writer.writeheader()
+        writer.writerows(results)
+
+    print(f"\n✓ Results saved to {filename}")
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+def print_summary(results):
+    """Print cache-on versus cache-off deltas per model and workload."""
+    print("\n" + "=" * 100)
+    print("PROMPT CACHE IMPACT (median latency change vs cache off, throughput change)")
+    print("=" * 100)
+
+    by_key = {(r['model_name'], r['cache_mode'], r['workload']): r for r in results if r['success']}
+    models = sorted(set(r['model_name'] for r in results))
+    modes = [m for m in CACHE_MODES if m != 'off']
+
+    header = f"{'Model':<45} {'Workload':<14}" + "".join(f"{m:>22}" for m in modes)
+    print(header)
+    print("-" * len(header))
+    for model in models:
+        for workload in WORKLOADS:
+            baseline = by_key.get((model, 'off', workload))
+            if not baseline:
+                continue
+            cells = []
+            for mode in modes:
+                r = by_key.get((model, mode, workload))
+                if not r:
+                    cells.append("-")
+                    continue
+                latency_change = (r['median_time_seconds'] / baseline['median_time_seconds'] - 1) * 100
+                throughput_change = (r['throughput_rps'] / baseline['throughput_rps'] - 1) * 100
+                cells.append(f"{latency_change:+.0f}% / {throughput_change:+.0f}% rps")
+            print(f"{model:<45} {workload:<14}" + "".join(f"{c:>22}" for c in cells))
+
+def main():
+    """Replay cache-sensitive workloads with caching off and on for every model."""
+    print("=" * 80)
+    print("PROMPT CACHE REUSE BENCHMARK")
+    print("=" * 80)
+
+    test_queries = load_test_queries()
+    model_files = get_model_files()
+    print(f"Loaded {len(test_queries)} queries, found {len(model_files)} models in {MODEL_DIR}")
+    print(f"Cache modes: {', '.join(CACHE_MODES)} | Workloads: {', '.join(WORKLOADS)}")
+
+    all_results = []
+    for model_idx, model_path in enumerate(model_files, 1):
+        print(f"\n[Model {model_idx}/{len(model_files)}] {model_path.name}")
+        print("-" * 80)
+
+        for mode_name, mode in CACHE_MODES.items():
+            for workload in WORKLOADS:
+                result = {
+                    'model_name': model_path.name,
+                    'cache_mode': mode_name,
+                    'workload': workload,
+                    'requests': 0,
+                    'success': False,
+                    'median_time_seconds': None,
+                    'p95_time_seconds': None,
+                    'throughput_rps': None,
+                    'error': None,
+                    'timestamp': datetime.now().isoformat()
+                }
+                process = None
+                try:
+                    # Fresh server per workload, so no workload hits prompts cached by another
+                    process = start_server(model_path, ['--parallel', str(SERVER_PARALLEL)] + mode['server_args'])
+                    if not wait_for_server():
+                        raise RuntimeError("Server failed to start")
+                    total_slots = get_total_slots()
+
+                    # Identical warm-up for every run so only caching differs
+                    warmup = test_queries[0]
+                    test_reranking(warmup['query'], warmup['documents'], {'cache_prompt': False})
+
+                    times, wall_time = run_workload(build_workload(workload, test_queries), mode, total_slots)
+                    result['requests'] = len(times)
+                    result['success'] = True
+                    result['median_time_seconds'] = round(statistics.median(times), 4)
+                    result['p95_time_seconds'] = round(percentile(times, 95), 4)
+                    result['throughput_rps'] = round(len(times) / wall_time, 2)
+                    print(f"  ✓ [{mode_name:11s}] {workload:13s}: median={result['median_time_seconds']}s, "
+                          f"{result['throughput_rps']} req/s")
+                except Exception as e:
+                    result['error'] = str(e)
+                    print(f"  ✗ [{mode_name:11s}] {workload:13s}: Error - {e}")
+                finally:
+                    if process:
+                        stop_server(process)
+                all_results.append(result)
+
+        save_to_csv(all_results)
+
+    print_summary(all_results)
+
+if __name__ == "__main__":
+    main()
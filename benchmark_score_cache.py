@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Score cache benchmark with Zipf-distributed query repetition.
+
+Draws requests from the English and multilingual query CSVs so that a few
+popular queries repeat often and most are rare (Zipf), then replays the same
+request stream without a cache and through RerankScoreCache at several sizes.
+Reports hit rate, latency saved and end-to-end latency.
+"""
+
+import csv
+import random
+import statistics
+import sys
+from datetime import datetime
+
+import test_multilang
+from score_cache import RerankScoreCache
+from test_all_models import (
+    MODEL_DIR,
+    get_model_files,
+    load_test_queries,
+    start_server,
+    stop_server,
+    test_reranking,
+    wait_for_server,
+)
+
+# --- Configuration ---
+BENCHMARK_MODEL = "bge-reranker-v2-m3-Q4_K_M.gguf"  # Overridden by the first CLI argument
+RESULTS_FILE = "score_cache_benchmark_results.csv"
+REQUESTS = 500
+ZIPF_EXPONENTS = [0.8, 1.1]
+CACHE_SIZES = [50, 150, 1000]  # Max cached (query, document) pairs
+TTL_SECONDS = 3600
+SEED = 42
+
+def zipf_stream(test_queries, exponent, count, seed=SEED):
+    """Draw a request stream where the k-th most popular query has weight 1/k^exponent."""
+    rng = random.Random(seed)
+    ranked = list(test_queries)
+    rng.shuffle(ranked)
+    weights = [1 / (rank ** exponent) for rank in range(1, len(ranked) + 1)]
+    return rng.choices(ranked, weights=weights, k=count)
+
+def replay(stream, rerank_fn):
+    """Send every request in order and return the per-request latencies."""
+    times = []
+    for query_data in stream:
+        _, elapsed_time = rerank_fn(query_data['query'], query_data['documents'])
+        times.append(elapsed_time)
+    return times
+
+def save_to_csv(results, filename=RESULTS_FILE):
+    """Save benchmark rows to CSV file."""
+    with open(filename, 'w', newline='') as csvfile:
+        fieldnames = [
+            'model_name',
+            'zipf_exponent',
+            'cache_size',
+            'requests',
+            'hit_rate',
+            'server_calls',
+            'evictions',
+            'latency_saved_seconds',
+            'total_time_seconds',
+            'median_time_ms',
+            'p95_time_ms',
+            'timestamp'
+        ]
+
+        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
+        writer.writeheader()
+        writer.writerows(results)
+
+    print(f"\n✓ Results saved to {filename}")
+
+def summarize(model_name, exponent, cache_size, times, cache=None):
+    ordered = sorted(times)
+    return {
+        'model_name': model_name,
+        'zipf_exponent': exponent,
+        'cache_size': cache_size,
+        'requests': len(times),
+        'hit_rate': round(cache.hit_rate, 3) if cache else 0.0,
+        'server_calls': cache.stats['server_calls'] if cache else len(times),
+        'evictions': cache.stats['evictions'] if cache else 0,
+        'latency_saved_seconds': round(cache.stats['latency_saved_seconds'], 3) if cache else 0.0,
+        'total_time_seconds': round(sum(times), 3),
+        'median_time_ms': round(statistics.median(times) * 1000, 2),
+        'p95_time_ms': round(ordered[int(0.95 * (len(ordered) - 1))] * 1000, 2),
+        'timestamp': datetime.now().isoformat()
+    }
+
+def main():
+    """Replay Zipf request streams with and without the score cache."""
+    model_name = sys.argv[1] if len(sys.argv) > 1 else BENCHMARK_MODEL
+    model_path = MODEL_DIR / model_name
+    if not model_path.exists():
+        model_files = get_model_files()
+        if not model_files:
+            print(f"✗ No models found in {MODEL_DIR}")
+            return
+        model_path = model_files[0]
+
+    test_queries = load_test_queries() + test_multilang.load_test_queries()
+
+    print("=" * 80)
+    print("RERANK SCORE CACHE BENCHMARK")
+    print("=" * 80)
+    print(f"Model: {model_path.name}")
+    print(f"{len(test_queries)} distinct queries, {REQUESTS} requests per stream")
+
+    results = []
+    process = None
+    try:
+        process = start_server(model_path)
+        if not wait_for_server():
+            print("✗ Server failed to start")
+            return
+        test_reranking(test_queries[0]['query'], test_queries[0]['documents'])  # Warm-up
+
+        for exponent in ZIPF_EXPONENTS:
+            stream = zipf_stream(test_queries, exponent, REQUESTS)
+            distinct = len(set(q['query'] for q in stream))
+            print(f"\nZipf s={exponent}: {distinct} distinct queries in stream")
+
+            results.append(summarize(model_path.name, exponent, 0, replay(stream, test_reranking)))
+            for cache_size in CACHE_SIZES:
+                cache = RerankScoreCache(model_path.name, max_entries=cache_size, ttl_seconds=TTL_SECONDS)
+                results.append(summarize(model_path.name, exponent, cache_size, replay(stream, cache.rerank), cache))
+
+            for r in results[-(len(CACHE_SIZES) + 1):]:
+                label = f"cache {r['cache_size']}" if r['cache_size'] else "no cache"
+                print(f"  {label:<11} hit rate {r['hit_rate']:6.1%}  total {r['total_time_seconds']:7.2f}s  "
+                      f"median {r['median_time_ms']:6.1f}ms  p95 {r['p95_time_ms']:6.1f}ms  "
+                      f"saved ~{r['latency_saved_seconds']:.2f}s  calls {r['server_calls']}")
+
+    finally:
+        if process:
+            stop_server(process)
+
+    save_to_csv(results)
+
+if __name__ == "__main__":
+    main()
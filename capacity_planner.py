@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+"""
+Latency cost model and capacity planner.
+
+Fits, per model and quantization, a single-request latency model on the
+benchmark results:
+
+    latency ≈ a + b·prompt_tokens + c·documents
+
+The document count comes from the length of the scores_by_index column.
+If it never varies (the bundled query set always has 5), c cannot be
+separated from a and is left out of the fit.
+20% of the queries are held out, and the report shows how well the model
+predicts them (mean error and p99 coverage). Concurrency comes from
+replay_trace.py load-test CSVs. The slowdown per extra in-flight request is
+fitted from those, and without one every extra request is assumed to slow
+the others down as if they shared the cores evenly.
+
+Given a target QPS, candidates per query, average passage length and a p99
+SLO, it picks the fewest replicas and the parallel slots per replica. A
+replica is one llama-server with the --threads the results were measured
+with, on the same machine class; the thread count is an input, since the
+results do not record it. The p99 is an M/M/c (Erlang C) queueing estimate.
+
+Usage:
+    python capacity_planner.py                                  # fit and held-out check only
+    python capacity_planner.py --qps 50 --candidates 20 --passage-tokens 120 --p99-ms 250 --threads 8
+    python capacity_planner.py bge-reranker-v2-m3 --quant Q4_K_M --qps 50 --candidates 20 \\
+        --passage-tokens 120 --p99-ms 250 --threads 8 --load-test trace_replay_20250101_120000.csv
+"""
+
+import argparse
+import csv
+import math
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from analyze_quant_fidelity import parse_scores
+from quant_types import model_family, quant_sort_key, quant_type
+
+# --- Configuration ---
+RESULT_FILES = ["test_results.csv", "test_results_multilang.csv"]
+HOLDOUT_FRACTION = 0.2
+SEED = 42
+MIN_SAMPLES = 10  # Fitted queries needed per model
+QUERY_TOKENS = 16  # Default query length; counted once per candidate, like TokenCounter.prompt_tokens
+SLOT_OPTIONS = [1, 2, 4, 8]  # --parallel values to consider per replica
+MAX_REPLICAS = 1000
+DEFAULT_SLOWDOWN = 1.0  # Per extra in-flight request when no load test is given (cores shared evenly)
+SLO_PERCENTILE = 99
+
+def load_samples(paths) -> Dict[Tuple[str, str], np.ndarray]:
+    """(prompt_tokens, documents, seconds) rows per (model, quant) from successful queries."""
+    samples = defaultdict(list)
+    for path in paths:
+        if not Path(path).exists():
+            continue
+        with open(path, 'r', encoding='utf-8') as f:
+            for row in csv.DictReader(f):
+                quant = quant_type(row['model_name'])
+                if (quant is None or (row.get('success') or '').upper() != 'TRUE'
+                        or not row.get('prompt_tokens') or not row.get('scores_by_index')):
+                    continue
+                documents = len(parse_scores(row['scores_by_index']))
+                samples[(model_family(row['model_name']), quant)].append(
+                    (float(row['prompt_tokens']), documents, float(row['response_time_seconds'])))
+    return {key: np.array(rows, dtype=float) for key, rows in samples.items()}
+
+def split_holdout(samples: np.ndarray, fraction: float = HOLDOUT_FRACTION, seed: int = SEED):
+    """(fit, held-out) rows; the same seed always holds out the same queries."""
+    order = np.random.default_rng(seed).permutation(len(samples))
+    cut = int(round(len(samples) * fraction))
+    return samples[order[cut:]], samples[order[:cut]]
+
+def design_matrix(tokens, documents=None) -> np.ndarray:
+    if documents is None:
+        return np.column_stack([np.ones_like(tokens), tokens])
+    return np.column_stack([np.ones_like(tokens), tokens, documents])
+
+def fit_latency_model(samples: np.ndarray) -> Dict:
+    """Least-squares a, b, c and the SLO-percentile residual used as a tail margin.
+
+    When every query has the same number of documents, the documents column
+    is collinear with the intercept and c cannot be told apart from a; c is
+    then left out (None) and 'documents' records the one count seen.
+    """
+    counts = np.unique(samples[:, 1])
+    documents = samples[:, 1] if len(counts) > 1 else None
+    matrix = design_matrix(samples[:, 0], documents)
+    coefficients, _, _, _ = np.linalg.lstsq(matrix, samples[:, 2], rcond=None)
+    residuals = samples[:, 2] - matrix @ coefficients
+    return {
+        'a': float(coefficients[0]),
+        'b': float(coefficients[1]),
+        'c': float(coefficients[2]) if documents is not None else None,
+        'documents': int(counts[0]) if documents is None else None,
+        'tail_margin': float(max(np.percentile(residuals, SLO_PERCENTILE), 0.0)),
+        'samples': len(samples)
+    }
+
+def predict(model: Dict, tokens, documents):
+    """Mean single-request latency in seconds."""
+    latency = model['a'] + model['b'] * np.asarray(tokens, dtype=float)
+    if model['c'] is not None:
+        latency = latency + model['c'] * np.asarray(documents, dtype=float)
+    return latency
+
+def check_holdout(model: Dict, held_out: np.ndarray) -> Optional[Dict]:
+    """Mean absolute percentage error and how many held-out latencies stay under the predicted tail."""
+    if len(held_out) == 0:
+        return None
+    predicted = predict(model, held_out[:, 0], held_out[:, 1])
+    observed = held_out[:, 2]
+    return {
+        'queries': len(held_out),
+        'mape': float(np.mean(np.abs(predicted - observed) / observed) * 100),
+        'coverage': float(np.mean(observed <= predicted + model['tail_margin']) * 100)
+    }
+
+def load_slowdown(path: str) -> Optional[float]:
+    """Fitted slowdown per extra in-flight request from a replay_trace.py CSV.
+
+    Service time per document at concurrency k is modeled as
+    base · (1 + slowdown · (k - 1)), base being the median at k = 1.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        rows = [r for r in csv.DictReader(f) if r['success'].upper() == 'TRUE' and r['service_seconds']]
+    if not rows:
+        return None
+    service = np.array([float(r['service_seconds']) for r in rows])
+    ends = np.array([float(r['completed_offset_seconds']) for r in rows])
+    starts = ends - service
+    per_document = service / np.array([max(int(r['num_documents']), 1) for r in rows])
+
+    # Requests in flight (this one included) when each request started
+    concurrency = (np.searchsorted(np.sort(starts), starts, side='right')
+                   - np.searchsorted(np.sort(ends), starts, side='right'))
+    lowest = concurrency.min()
+    base = np.median(per_document[concurrency == lowest])
+    excess = concurrency - lowest
+    if not excess.any():
+        return None
+    relative = per_document / base - 1
+    return max(float(np.sum(excess * relative) / np.sum(excess ** 2)), 0.0)
+
+def erlang_c(servers: int, load: float) -> float:
+    """Probability that an arrival waits in an M/M/c queue with the given offered load (Erlangs)."""
+    if load >= servers:
+        return 1.0
+    blocking = 1.0
+    for i in range(1, servers + 1):
+        blocking = load * blocking / (i + load * blocking)
+    return servers * blocking / (servers - load * (1 - blocking))
+
+def p99_latency(model: Dict, tokens: float, documents: int, slots: int, replica_qps: float,
+                slowdown: float) -> float:
+    """Tail latency of one replica with the given parallel slots and arrival rate, in seconds."""
+    mean = float(predict(model, tokens, documents))
+    contention = 1 + slowdown * (slots - 1)
+    service = mean * contention
+    if service <= 0:
+        return float('inf')
+    spare_rate = slots / service - replica_qps
+    if spare_rate <= 0:
+        return float('inf')
+    tail = 1 - SLO_PERCENTILE / 100
+    waiting = erlang_c(slots, replica_qps * service)
+    wait = math.log(waiting / tail) / spare_rate if waiting > tail else 0.0
+    return (mean + model['tail_margin']) * contention + wait
+
+def plan_capacity(model: Dict, qps: float, documents: int, tokens: float, p99_seconds: float,
+                  slowdown: float) -> Optional[Dict]:
+    """Fewest replicas (then fewest slots) meeting the SLO, or None if no replica count does."""
+    best = None
+    for slots in SLOT_OPTIONS:
+        if p99_latency(model, tokens, documents, slots, 0.0, slowdown) > p99_seconds:
+            continue  # Even an idle replica misses the SLO
+        for replicas in range(1, MAX_REPLICAS + 1):
+            latency = p99_latency(model, tokens, documents, slots, qps / replicas, slowdown)
+            if latency <= p99_seconds:
+                if best is None or replicas < best['replicas']:
+                    best = {'replicas': replicas, 'slots': slots, 'p99_seconds': latency}
+                break
+    return best
+
+def format_ms(seconds: float) -> str:
+    return f"{seconds * 1000:.0f}ms" if math.isfinite(seconds) else "∞"
+
+def main():
+    parser = argparse.ArgumentParser(description="Fit latency models from test results and size a rerank deployment.")
+    parser.add_argument('models', nargs='*', help="Only model families containing one of these")
+    parser.add_argument('--quant', help="Only this quantization (e.g. Q4_K_M)")
+    parser.add_argument('--results', nargs='+', default=RESULT_FILES)
+    parser.add_argument('--load-test', help="replay_trace.py CSV measured against the planned model")
+    parser.add_argument('--qps', type=float, help="Target queries per second")
+    parser.add_argument('--candidates', type=int, help="Documents per query")
+    parser.add_argument('--passage-tokens', type=float, help="Average passage length in tokens")
+    parser.add_argument('--query-tokens', type=float, default=QUERY_TOKENS)
+    parser.add_argument('--p99-ms', type=float, help="p99 latency SLO")
+    parser.add_argument('--threads', type=int,
+                        help="llama-server --threads the results were measured with (on the benchmark machine)")
+    args = parser.parse_args()
+
+    planning = [args.qps, args.candidates, args.passage_tokens, args.p99_ms, args.threads]
+    if any(v is not None for v in planning) and not all(v is not None for v in planning):
+        parser.error("planning needs --qps, --candidates, --passage-tokens, --p99-ms and --threads")
+
+    samples = load_samples(args.results)
+    samples = {key: rows for key, rows in samples.items()
+               if (not args.models or any(m in key[0] for m in args.models))
+               and (not args.quant or key[1] == args.quant.upper())}
+    if not samples:
+        print("✗ No results with prompt_tokens and scores_by_index - re-run test_all_models.py or test_multilang.py")
+        return
+
+    slowdown, slowdown_source = DEFAULT_SLOWDOWN, "default"
+    if args.load_test:
+        fitted = load_slowdown(args.load_test)
+        if fitted is None:
+            print(f"⚠️  {args.load_test} has no overlapping requests, using the default slowdown")
+        else:
+            slowdown, slowdown_source = fitted, f"fitted on {args.load_test}"
+
+    print("=" * 80)
+    print("LATENCY MODEL: latency ≈ a + b·tokens + c·documents")
+    print("=" * 80)
+    print(f"{'Model':<40} {'Quant':<8} {'a':>8} {'b (µs/tok)':>11} {'c (ms/doc)':>11} {'MAPE':>7} {'p99 cover':>10}")
+    models = {}
+    for key in sorted(samples, key=lambda k: (k[0], quant_sort_key(k[1]))):
+        fit_rows, held_out = split_holdout(samples[key])
+        if len(fit_rows) < MIN_SAMPLES:
+            print(f"{key[0]:<40} {key[1]:<8} skipped ({len(fit_rows)} queries, need {MIN_SAMPLES})")
+            continue
+        model = fit_latency_model(fit_rows)
+        check = check_holdout(model, held_out)
+        models[key] = model
+        held = f"{check['mape']:>6.1f}% {check['coverage']:>9.0f}%" if check else f"{'-':>7} {'-':>10}"
+        per_document = f"{model['c'] * 1000:>11.2f}" if model['c'] is not None else f"{'-':>11}"
+        print(f"{key[0]:<40} {key[1]:<8} {format_ms(model['a']):>8} {model['b'] * 1e6:>11.1f} "
+              f"{per_document} {held}")
+    print(f"\nHeld out {HOLDOUT_FRACTION:.0%} of queries per model; p99 cover should be near {SLO_PERCENTILE}%.")
+    fixed = sorted({model['documents'] for model in models.values() if model['c'] is None})
+    if fixed:
+        print(f"⚠️  Document count does not vary ({', '.join(map(str, fixed))} per query) - c is not identifiable "
+              f"and was left out; per-document cost is folded into a and b")
+    print(f"Slowdown per extra in-flight request: {slowdown:.2f} ({slowdown_source})")
+
+    if args.qps is None:
+        return
+
+    tokens = args.candidates * (args.query_tokens + args.passage_tokens)
+    p99_seconds = args.p99_ms / 1000
+    print("\n" + "=" * 80)
+    print(f"CAPACITY PLAN: {args.qps:g} QPS, {args.candidates} candidates × {args.passage_tokens:g} tokens "
+          f"({tokens:.0f} prompt tokens), p{SLO_PERCENTILE} ≤ {args.p99_ms:g}ms")
+    print("=" * 80)
+    extrapolated = sorted({model['documents'] for model in models.values()
+                           if model['c'] is None and model['documents'] != args.candidates})
+    if extrapolated:
+        print(f"⚠️  Fitted on {', '.join(map(str, extrapolated))} documents per query only - the plan for "
+              f"{args.candidates} candidates extrapolates through prompt tokens alone; fit on results "
+              f"with varied candidate counts (generate_dataset.py --documents) before trusting it")
+    print(f"{'Model':<40} {'Quant':<8} {'Replicas':>9} {'Slots':>6} {'Threads':>8} {'p99':>8}")
+    plans = [(key, plan_capacity(model, args.qps, args.candidates, tokens, p99_seconds, slowdown))
+             for key, model in models.items()]
+    for (model, quant), plan in sorted(plans, key=lambda x: (x[1] is None, x[1]['replicas'] if x[1] else 0)):
+        if plan:
+            print(f"{model:<40} {quant:<8} {plan['replicas']:>9} {plan['slots']:>6} {args.threads:>8} "
+                  f"{format_ms(plan['p99_seconds']):>8}")
+        else:
+            print(f"{model:<40} {quant:<8} {'✗ cannot meet SLO':>33}")
+    print(f"\nReplicas are benchmark-class machines, each running llama-server "
+          f"--threads {args.threads} --parallel <slots>.")
+    print("Threads are an input (--threads), not a result: use the value the results were measured with.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Late-interaction (ColBERT MaxSim) scoring.
+
+ColBERT models are not cross-encoders: /rerank feeds them query and document
+as one sequence, which is why colbertv2.0 scores 10% there. Here each document
+is encoded once into per-token embeddings (llama-server started with
+--pooling none), stored in a memory-mapped float16 file, and scored against
+the query's token embeddings with MaxSim: for every query token, the best
+cosine similarity over the document's tokens, summed over query tokens.
+A rerank request then costs one query encoding plus a matrix product.
+
+The GGUF conversion carries the BERT encoder without ColBERT's 128-d output
+projection, so the vectors are the encoder's hidden states. Scores therefore
+approximate the original model rather than reproduce it.
+"""
+
+import json
+import time
+from pathlib import Path
+from typing import Callable, List
+
+import numpy as np
+import requests
+
+from tokenization import text_key
+
+# --- Configuration ---
+COLBERT_STORE_DIR = Path(".colbert_store")
+EMBEDDINGS_URL = "http://localhost:8080/embeddings"
+REQUEST_TIMEOUT = 60
+# llama-server flags for per-token output; --pooling after --rerank takes precedence
+COLBERT_SERVER_ARGS = ["--embedding", "--pooling", "none"]
+
+def fetch_token_embeddings(text: str, url: str = EMBEDDINGS_URL, timeout: int = REQUEST_TIMEOUT) -> np.ndarray:
+    """Per-token embeddings of one text as an L2-normalized (tokens, dim) float32 array."""
+    response = requests.post(url, json={"content": text}, timeout=timeout)
+    response.raise_for_status()
+    data = response.json()
+    # /embeddings returns a list of {index, embedding}; with pooling none the
+    # embedding is one vector per token
+    embedding = data[0]['embedding'] if isinstance(data, list) else data['embedding']
+    matrix = np.asarray(embedding, dtype=np.float32)
+    if matrix.ndim == 1:
+        raise ValueError("server returned a pooled embedding; start it with --pooling none")
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.maximum(norms, 1e-12)
+
+class TokenEmbeddingStore:
+    """Append-only float16 store of per-token document embeddings.
+
+    tokens.f16 holds every document's token vectors back to back and is read
+    through np.memmap; index.json maps a document's text hash to its
+    (first row, row count).
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self._data_path = self.path / "tokens.f16"
+        self._index_path = self.path / "index.json"
+        self.dim = None
+        self.rows = 0
+        self._docs = {}
+        if self._index_path.exists():
+            with open(self._index_path, 'r', encoding='utf-8') as f:
+                index = json.load(f)
+            self.dim = index['dim']
+            self.rows = index['rows']
+            self._docs = {key: tuple(span) for key, span in index['docs'].items()}
+        # Rows appended after the last save() (an interrupted indexing run) are
+        # not in the index; drop them so new rows land where the index expects
+        indexed_bytes = self.rows * (self.dim or 0) * np.dtype(np.float16).itemsize
+        if self._data_path.exists() and self._data_path.stat().st_size > indexed_bytes:
+            with open(self._data_path, 'r+b') as f:
+                f.truncate(indexed_bytes)
+        self._matrix = None
+
+    def __len__(self):
+        return len(self._docs)
+
+    def __contains__(self, document: str):
+        return text_key(document) in self._docs
+
+    def add(self, document: str, embeddings: np.ndarray):
+        """Append one document's (tokens, dim) matrix."""
+        if self.dim is None:
+            self.dim = embeddings.shape[1]
+        elif embeddings.shape[1] != self.dim:
+            raise ValueError(f"embedding dim {embeddings.shape[1]} does not match store dim {self.dim}")
+        with open(self._data_path, 'ab') as f:
+            f.write(np.ascontiguousarray(embeddings, dtype=np.float16).tobytes())
+        self._docs[text_key(document)] = (self.rows, len(embeddings))
+        self.rows += len(embeddings)
+        self._matrix = None  # Re-map on next read
+
+    def save(self):
+        with open(self._index_path, 'w', encoding='utf-8') as f:
+            json.dump({'dim': self.dim, 'rows': self.rows, 'docs': self._docs}, f)
+
+    @property
+    def matrix(self) -> np.ndarray:
+        if self._matrix is None:
+            self._matrix = np.memmap(self._data_path, dtype=np.float16, mode='r', shape=(self.rows, self.dim))
+        return self._matrix
+
+    def spans(self, documents: List[str]):
+        return [self._docs[text_key(doc)] for doc in documents]
+
+def maxsim_scores(query_embeddings: np.ndarray, store: TokenEmbeddingStore, documents: List[str]) -> np.ndarray:
+    """MaxSim score of each document: sum over query tokens of the best document-token similarity.
+
+    Documents without stored tokens score 0.
+    """
+    scores = np.zeros(len(documents), dtype=np.float32)
+    spans = store.spans(documents)
+    # reduceat would give an empty span the next document's first row, so skip them
+    filled = [i for i, (_, count) in enumerate(spans) if count > 0]
+    if not filled:
+        return scores
+    spans = [spans[i] for i in filled]
+    rows = np.concatenate([np.arange(start, start + count) for start, count in spans])
+    doc_tokens = np.asarray(store.matrix[rows], dtype=np.float32)
+    similarity = doc_tokens @ query_embeddings.T  # (document tokens, query tokens)
+
+    starts = np.cumsum([0] + [count for _, count in spans[:-1]])
+    best = np.maximum.reduceat(similarity, starts, axis=0)  # (documents, query tokens)
+    scores[filled] = best.sum(axis=1)
+    return scores
+
+class ColbertReranker:
+    """MaxSim reranker over a TokenEmbeddingStore, shaped like test_reranking()."""
+
+    def __init__(self, store: TokenEmbeddingStore, embed_fn: Callable[[str], np.ndarray] = fetch_token_embeddings):
+        self.store = store
+        self.embed_fn = embed_fn
+        self.stats = {'documents_encoded': 0, 'query_seconds': 0.0, 'maxsim_seconds': 0.0}
+
+    def index_documents(self, documents: List[str]) -> int:
+        """Encode and store every document not already in the store. Returns how many were added."""
+        added = 0
+        try:
+            for document in documents:
+                if document not in self.store:
+                    self.store.add(document, self.embed_fn(document))
+                    added += 1
+        finally:
+            # Keep the index in step with tokens.f16 even if encoding fails part-way
+            if added:
+                self.store.save()
+                self.stats['documents_encoded'] += added
+        return added
+
+    def rerank(self, query: str, documents: List[str]):
+        """Score documents against the query. Returns (sorted_results, elapsed_time)."""
+        start_time = time.perf_counter()
+        self.index_documents(documents)  # No-op once the corpus is precomputed
+
+        query_start = time.perf_counter()
+        query_embeddings = self.embed_fn(query)
+        maxsim_start = time.perf_counter()
+        scores = maxsim_scores(query_embeddings, self.store, documents)
+        finished = time.perf_counter()
+
+        self.stats['query_seconds'] += maxsim_start - query_start
+        self.stats['maxsim_seconds'] += finished - maxsim_start
+
+        results = [{'index': i, 'relevance_score': float(score)} for i, score in enumerate(scores)]
+        results.sort(key=lambda x: x['relevance_score'], reverse=True)
+        return results, finished - start_time
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Memory-mapped corpus store.
+
+A corpus is a directory holding:
+    texts.bin            every document's UTF-8 bytes, back to back
+    offsets.u64          N+1 little-endian uint64 byte offsets into texts.bin
+    embeddings.NAME.f16  optional (N, dim) float16 matrices, one per embedding model
+    meta.json            document count and embedding shapes
+
+Opening a store maps the files and reads nothing else, so startup does not
+grow with the corpus. Document i is decoded only when it is asked for.
+
+Usage:
+    python corpus_store.py build .corpus/msmarco passages.jsonl --text-field text
+    python corpus_store.py show .corpus/msmarco 12345
+"""
+
+import argparse
+import json
+import mmap
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+# --- Configuration ---
+CORPUS_DIR = Path(".corpus")
+
+class CorpusWriter:
+    """Stream documents (and later their embeddings) into a new corpus directory."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self._texts = open(self.path / "texts.bin", 'wb')
+        self._offsets = [0]
+
+    def add(self, text: str) -> int:
+        """Append a document and return its ID."""
+        data = text.encode('utf-8')
+        self._texts.write(data)
+        self._offsets.append(self._offsets[-1] + len(data))
+        return len(self._offsets) - 2
+
+    def add_many(self, texts: Iterable[str]) -> None:
+        for text in texts:
+            self.add(text)
+
+    def close(self) -> None:
+        self._texts.close()
+        np.asarray(self._offsets, dtype='<u8').tofile(self.path / "offsets.u64")
+        with open(self.path / "meta.json", 'w', encoding='utf-8') as f:
+            json.dump({'documents': len(self._offsets) - 1, 'embeddings': {}}, f)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+class CorpusStore:
+    """Read-only, lazily decoded view of a corpus directory."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        with open(self.path / "meta.json", 'r', encoding='utf-8') as f:
+            self.meta = json.load(f)
+        self._offsets = np.memmap(self.path / "offsets.u64", dtype='<u8', mode='r')
+        self._file = open(self.path / "texts.bin", 'rb')
+        # mmap cannot map an empty file
+        self._texts = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if self._offsets[-1] else b''
+        self._embeddings: Dict[str, np.ndarray] = {}
+
+    def __len__(self):
+        return self.meta['documents']
+
+    def __getitem__(self, doc_id: int) -> str:
+        if not 0 <= doc_id < len(self):
+            raise IndexError(f"document {doc_id} not in corpus of {len(self)}")
+        start, end = int(self._offsets[doc_id]), int(self._offsets[doc_id + 1])
+        return self._texts[start:end].decode('utf-8')
+
+    def get_many(self, doc_ids: Iterable[int]) -> List[str]:
+        return [self[doc_id] for doc_id in doc_ids]
+
+    def __iter__(self):
+        for doc_id in range(len(self)):
+            yield self[doc_id]
+
+    def batches(self, batch_size: int):
+        """Yield (first_id, texts) batches for streaming over the corpus."""
+        for start in range(0, len(self), batch_size):
+            yield start, self.get_many(range(start, min(start + batch_size, len(self))))
+
+    def has_embeddings(self, name: str) -> bool:
+        return name in self.meta['embeddings']
+
+    def embeddings(self, name: str) -> Optional[np.ndarray]:
+        """The (N, dim) float16 matrix stored under name, memory-mapped, or None."""
+        if name not in self.meta['embeddings']:
+            return None
+        if name not in self._embeddings:
+            dim = self.meta['embeddings'][name]['dim']
+            self._embeddings[name] = np.memmap(self.path / f"embeddings.{name}.f16",
+                                               dtype=np.float16, mode='r', shape=(len(self), dim))
+        return self._embeddings[name]
+
+    def write_embeddings(self, name: str, batches: Iterable[np.ndarray]) -> None:
+        """Stream row batches (in document order) into a new embedding matrix."""
+        rows = 0
+        dim = None
+        with open(self.path / f"embeddings.{name}.f16", 'wb') as f:
+            for batch in batches:
+                dim = batch.shape[1]
+                f.write(np.ascontiguousarray(batch, dtype=np.float16).tobytes())
+                rows += len(batch)
+        if rows != len(self):
+            raise ValueError(f"wrote {rows} embedding rows for {len(self)} documents")
+        self.meta['embeddings'][name] = {'dim': dim}
+        with open(self.path / "meta.json", 'w', encoding='utf-8') as f:
+            json.dump(self.meta, f)
+
+    def close(self) -> None:
+        self._embeddings.clear()
+        if isinstance(self._texts, mmap.mmap):
+            self._texts.close()
+        self._file.close()
+
+def write_corpus(path, documents: Iterable[str]) -> CorpusStore:
+    """Write documents to a new corpus directory and open it."""
+    with CorpusWriter(path) as writer:
+        writer.add_many(documents)
+    return CorpusStore(path)
+
+def resolve_documents(query_data: dict, corpus: Optional[CorpusStore]) -> List[str]:
+    """Document texts of a query that lists either `documents` or corpus `doc_ids`."""
+    if query_data.get('doc_ids') is not None:
+        if corpus is None:
+            raise ValueError("query references doc_ids but no corpus is open (set CORPUS_PATH in the runner)")
+        return corpus.get_many(query_data['doc_ids'])
+    return query_data['documents']
+
+def _iter_jsonl_texts(path, text_field):
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)[text_field]
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or inspect a memory-mapped corpus.")
+    sub = parser.add_subparsers(dest='command', required=True)
+    build = sub.add_parser('build', help="Build a corpus from a JSONL file (one document per line)")
+    build.add_argument('corpus')
+    build.add_argument('jsonl')
+    build.add_argument('--text-field', default='text')
+    show = sub.add_parser('show', help="Print documents by ID")
+    show.add_argument('corpus')
+    show.add_argument('ids', type=int, nargs='*')
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        corpus = write_corpus(args.corpus, _iter_jsonl_texts(args.jsonl, args.text_field))
+        print(f"✓ {len(corpus)} documents written to {args.corpus}")
+    else:
+        corpus = CorpusStore(args.corpus)
+        print(f"{args.corpus}: {len(corpus)} documents, embeddings: {', '.join(corpus.meta['embeddings']) or 'none'}")
+        for doc_id in args.ids:
+            print(f"[{doc_id}] {corpus[doc_id]}")
+    corpus.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Pre-flight probe for models that load but cannot rank.
+
+Some GGUF rerankers start fine and then return the same score for every
+document (Qwen3 returns all zeros), NaN, or ties at the top. The probe sends a
+few query/document sets where one document is obviously relevant and checks
+the scores before the model gets its full query run.
+
+Reason codes:
+    PROBE_ERROR      the rerank request itself failed
+    NAN_SCORES       a score was NaN, infinite or missing
+    CONSTANT_SCORES  every probe document got the same score
+    TIED_SCORES      the top two documents tie in most probe sets
+"""
+
+import math
+from typing import Callable, List, Optional, Tuple
+
+# --- Configuration ---
+PROBE_TIE_TOLERANCE = 1e-4  # Scores closer than this count as tied
+PROBE_CASES = [
+    {
+        'query': "What is the capital of France?",
+        'documents': [
+            "Paris is the capital and largest city of France.",
+            "Bananas are a good source of potassium.",
+            "The stock market closed higher on Friday.",
+            "Photosynthesis converts light into chemical energy."
+        ],
+        'relevant_index': 0
+    },
+    {
+        'query': "How do I reset a forgotten email password?",
+        'documents': [
+            "Mount Everest is the highest mountain above sea level.",
+            "Click 'Forgot password' on the sign-in page and follow the link sent to your recovery address.",
+            "Whales are marine mammals that breathe air.",
+            "The recipe calls for two cups of flour."
+        ],
+        'relevant_index': 1
+    },
+    {
+        'query': "Which planet is known as the Red Planet?",
+        'documents': [
+            "Tea originated in China.",
+            "Jazz developed in New Orleans in the early 20th century.",
+            "Mars is called the Red Planet because of iron oxide on its surface.",
+            "A triangle has three sides."
+        ],
+        'relevant_index': 2
+    }
+]
+
+def _is_valid(score) -> bool:
+    return isinstance(score, (int, float)) and math.isfinite(score)
+
+def classify_scores(score_sets: List[List[float]], tolerance: float = PROBE_TIE_TOLERANCE) -> Optional[str]:
+    """Return a reason code for degenerate scores, or None if they look usable."""
+    all_scores = [score for scores in score_sets for score in scores]
+    if not all_scores or not all(_is_valid(score) for score in all_scores):
+        return 'NAN_SCORES'
+
+    if max(all_scores) - min(all_scores) <= tolerance:
+        return 'CONSTANT_SCORES'
+
+    tied = 0
+    for scores in score_sets:
+        ranked = sorted(scores, reverse=True)
+        if len(ranked) > 1 and ranked[0] - ranked[1] <= tolerance:
+            tied += 1
+    if tied * 2 > len(score_sets):
+        return 'TIED_SCORES'
+
+    return None
+
+def probe_model(rerank_fn: Callable, cases: List[dict] = PROBE_CASES) -> Tuple[Optional[str], str]:
+    """Run the probe cases through rerank_fn(query, documents).
+
+    Returns (reason_code, detail); reason_code is None when the model passes.
+    """
+    score_sets = []
+    hits = 0
+    for case in cases:
+        try:
+            sorted_results, _ = rerank_fn(case['query'], case['documents'])
+        except Exception as e:
+            return 'PROBE_ERROR', str(e)
+        score_sets.append([res.get('relevance_score') for res in sorted_results])
+        if sorted_results and _is_valid(sorted_results[0].get('relevance_score')):
+            hits += sorted_results[0]['index'] == case['relevant_index']
+
+    reason = classify_scores(score_sets)
+    sample = ", ".join(str(score) for score in score_sets[0][:4]) if score_sets else ""
+    return reason, f"{hits}/{len(cases)} probes ranked correctly; first scores [{sample}]"
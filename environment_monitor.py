@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Background sampler for machine state during a measurement run.
+
+Reads the current CPU frequency from /sys/devices/system/cpu/*/cpufreq and
+the 1-minute load average at a fixed interval. A run is flagged as drifted
+when the mean frequency moved (turbo ending, thermal throttling) or the load
+average rose (noisy neighbours) by more than the thresholds below. The
+measured servers load the machine themselves, so the load is judged against
+the idle load before they started (or the lowest sample) plus the threads
+they are expected to keep busy. Latency from drifted runs should not be
+compared across models or builds.
+
+Hosts without cpufreq (many VMs, macOS) are monitored by load average only.
+"""
+
+import os
+import statistics
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional
+
+SAMPLE_INTERVAL = 1.0  # Seconds between samples
+CPUFREQ_ROOT = Path("/sys/devices/system/cpu")
+MAX_FREQUENCY_DRIFT = 0.10  # (max - min) / max of the mean CPU frequency
+MAX_LOAD_SWING = 1.5  # 1-minute load average above idle + expected busy threads
+
+def read_cpu_mhz(cpus: Optional[List[int]] = None) -> Optional[float]:
+    """Mean current frequency of the given CPUs (all CPUs if None) in MHz, or None without cpufreq."""
+    if cpus is None:
+        paths = CPUFREQ_ROOT.glob("cpu[0-9]*/cpufreq/scaling_cur_freq")
+    else:
+        paths = (CPUFREQ_ROOT / f"cpu{cpu}" / "cpufreq" / "scaling_cur_freq" for cpu in cpus)
+    values = []
+    for path in paths:
+        try:
+            values.append(int(path.read_text()) / 1000)  # kHz
+        except (OSError, ValueError):
+            continue
+    return statistics.mean(values) if values else None
+
+def read_load_average() -> Optional[float]:
+    try:
+        return os.getloadavg()[0]
+    except (AttributeError, OSError):
+        return None
+
+class EnvironmentMonitor:
+    """Sample CPU frequency and load average in a background thread."""
+
+    def __init__(self, cpus: Optional[List[int]] = None, interval: float = SAMPLE_INTERVAL,
+                 idle_load: Optional[float] = None, busy_threads: float = 0.0):
+        self.cpus = cpus
+        self.interval = interval
+        self.idle_load = idle_load  # Load average before the measured work started
+        self.busy_threads = busy_threads  # Load the measured work itself is expected to add
+        self.samples = []
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _sample(self):
+        self.samples.append({'cpu_mhz': read_cpu_mhz(self.cpus), 'load': read_load_average()})
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            self._sample()
+            self._stop_event.wait(self.interval)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self) -> Dict:
+        """Stop sampling and return the drift summary."""
+        if not self._stop_event.is_set():
+            self._sample()  # Short runs still get a closing sample
+            self._stop_event.set()
+            if self._thread.is_alive():
+                self._thread.join(timeout=2)
+        return self.summary()
+
+    def summary(self) -> Dict:
+        frequencies = [s['cpu_mhz'] for s in self.samples if s['cpu_mhz'] is not None]
+        loads = [s['load'] for s in self.samples if s['load'] is not None]
+        summary = {
+            'samples': len(self.samples),
+            'cpu_mhz_min': round(min(frequencies), 1) if frequencies else None,
+            'cpu_mhz_max': round(max(frequencies), 1) if frequencies else None,
+            'frequency_drift': round((max(frequencies) - min(frequencies)) / max(frequencies), 4) if frequencies else None,
+            'load_min': round(min(loads), 2) if loads else None,
+            'load_max': round(max(loads), 2) if loads else None,
+            'load_idle': round(self.idle_load, 2) if self.idle_load is not None else None,
+            'busy_threads': self.busy_threads,
+            'reasons': []
+        }
+        if summary['frequency_drift'] is not None and summary['frequency_drift'] > MAX_FREQUENCY_DRIFT:
+            summary['reasons'].append(f"CPU frequency moved {summary['frequency_drift']:.0%} "
+                                      f"({summary['cpu_mhz_min']:.0f}-{summary['cpu_mhz_max']:.0f} MHz)")
+        if loads:
+            reference = summary['load_idle'] if summary['load_idle'] is not None else summary['load_min']
+            excess = summary['load_max'] - reference - self.busy_threads
+            if excess > MAX_LOAD_SWING:
+                summary['reasons'].append(f"load average reached {summary['load_max']:.2f}, {excess:.2f} above "
+                                          f"{reference:.2f} + {self.busy_threads:g} busy threads")
+        summary['drifted'] = bool(summary['reasons'])
+        return summary
+
+def format_environment(summary: Dict) -> str:
+    """One-line description of a monitored run."""
+    frequency = (f"{summary['cpu_mhz_min']:.0f}-{summary['cpu_mhz_max']:.0f} MHz"
+                 if summary['cpu_mhz_min'] is not None else "no cpufreq")
+    load = f"load {summary['load_min']:.2f}-{summary['load_max']:.2f}" if summary['load_min'] is not None else "no loadavg"
+    if summary.get('load_idle') is not None:
+        load += f" (idle {summary['load_idle']:.2f})"
+    status = "⚠️  drifted: " + "; ".join(summary['reasons']) if summary['drifted'] else "✓ stable"
+    return f"{frequency}, {load}, {summary['samples']} samples - {status}"
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Synthetic benchmark dataset generator.
+
+Builds any number of reproducible query/candidate sets from the queries in
+test_queries.csv and test_queries_multilang.csv and streams them to JSONL
+in the query_dataset.py format. For each generated query:
+
+- a seed query is drawn by language (--languages weights) and its correct
+  document is the relevant candidate
+- each distractor comes from the seed's own candidates (hard: same topic)
+  with probability --hardness, otherwise from other domains in the same
+  language (easy)
+- every document is padded with unrelated same-language sentences up to a
+  length drawn from --doc-tokens, so length does not give the answer away
+- the query text is varied with per-language templates and the candidate
+  order is shuffled
+
+Usage:
+    python generate_dataset.py synthetic_5k.jsonl --count 5000 --documents 20 \\
+        --doc-tokens 40:200 --hardness 0.6 --languages en=3,de=1,fr=1,es=1,ar=1,zh=1
+"""
+
+import argparse
+import json
+import random
+from collections import defaultdict
+
+from query_dataset import load_queries
+
+# --- Configuration ---
+SOURCE_FILES = ["test_queries.csv", "test_queries_multilang.csv"]
+SEED = 42
+QUERY_TEMPLATES = {
+    'en': ["{q}", "{q} Please explain.", "I need to know: {q}", "Quick question - {q}"],
+    'de': ["{q}", "Frage: {q}", "{q} Bitte erklären."],
+    'fr': ["{q}", "Question : {q}", "{q} Merci d'expliquer."],
+    'es': ["{q}", "Pregunta: {q}", "{q} Por favor, explícalo."],
+    'ar': ["{q}", "سؤال: {q}"],
+    'zh': ["{q}", "问题：{q}", "请解释：{q}"]
+}
+
+def approx_tokens(text: str) -> int:
+    """Rough token count that also works for scripts written without spaces."""
+    return max(len(text.split()), len(text) // 4)
+
+def parse_range(value: str):
+    low, _, high = value.partition(':')
+    return int(low), int(high or low)
+
+def parse_weights(value: str):
+    weights = {}
+    for part in value.split(','):
+        language, _, weight = part.partition('=')
+        weights[language.strip()] = float(weight or 1)
+    return weights
+
+def load_sources(paths=SOURCE_FILES):
+    """Seed queries, tagged with language (English when the file has none)."""
+    seeds = []
+    for path in paths:
+        for query_data in load_queries(path):
+            if query_data['correct_doc_index'] is None:
+                continue  # Nothing relevant to build a query around
+            query_data.setdefault('language', 'en')
+            seeds.append(query_data)
+    return seeds
+
+class DatasetGenerator:
+    """Seeded generator of query/candidate sets from the existing query files."""
+
+    def __init__(self, seeds, num_documents=10, doc_tokens=(0, 0), hardness=0.5,
+                 language_weights=None, seed=SEED):
+        self.rng = random.Random(seed)
+        self.num_documents = num_documents
+        self.doc_tokens = doc_tokens
+        self.hardness = hardness
+
+        self.by_language = defaultdict(list)
+        self.sentences = defaultdict(list)  # language -> every source document, for padding
+        for query_data in seeds:
+            language = query_data['language']
+            self.by_language[language].append(query_data)
+            self.sentences[language].extend(query_data['documents'])
+        # Easy distractors: same-language documents from other domains
+        self.easy = {}
+        for language, queries in self.by_language.items():
+            for domain in {q['domain'] for q in queries}:
+                self.easy[(language, domain)] = [doc for q in queries if q['domain'] != domain
+                                                 for doc in q['documents']]
+
+        weights = language_weights or {language: 1.0 for language in self.by_language}
+        missing = [language for language in weights if language not in self.by_language]
+        if missing:
+            raise ValueError(f"no seed queries for language(s): {', '.join(missing)}")
+        self.languages = list(weights)
+        self.language_weights = [weights[language] for language in self.languages]
+
+    def _distractor(self, seed_query, used):
+        """One non-relevant document, hard with probability self.hardness."""
+        correct = seed_query['correct_doc_index']
+        hard = [doc for i, doc in enumerate(seed_query['documents']) if i != correct]
+        easy = self.easy[(seed_query['language'], seed_query['domain'])]
+
+        pools = [hard, easy] if self.rng.random() < self.hardness else [easy, hard]
+        for pool in pools:
+            fresh = [doc for doc in pool if doc not in used]
+            if fresh:
+                return self.rng.choice(fresh)
+        return self.rng.choice(easy or hard)  # More candidates than distinct documents
+
+    def _pad(self, document, language, relevant):
+        """Extend a document to a drawn length; never with the relevant passage."""
+        low, high = self.doc_tokens
+        if high <= 0:
+            return document
+        target = self.rng.randint(low, high)
+        # Empty sentences add no tokens, so they could not end the loop either
+        candidates = [s for s in self.sentences[language] if s != relevant and s.strip()]
+        padded = document
+        while candidates and approx_tokens(padded) < target:
+            padded += " " + self.rng.choice(candidates)
+        return padded
+
+    def generate(self, count):
+        """Yield count query records, one at a time."""
+        for number in range(count):
+            language = self.rng.choices(self.languages, weights=self.language_weights)[0]
+            seed_query = self.rng.choice(self.by_language[language])
+            relevant = seed_query['documents'][seed_query['correct_doc_index']]
+
+            documents = [relevant]
+            while len(documents) < self.num_documents:
+                documents.append(self._distractor(seed_query, set(documents)))
+            self.rng.shuffle(documents)
+
+            template = self.rng.choice(QUERY_TEMPLATES.get(language, ["{q}"]))
+            yield {
+                'id': f"syn-{number:07d}",
+                'language': language,
+                'domain': seed_query['domain'],
+                'query': template.format(q=seed_query['query']),
+                'documents': [self._pad(doc, language, relevant) for doc in documents],
+                'relevance': [1 if doc == relevant else 0 for doc in documents],
+                'hardness': self.hardness
+            }
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a seeded synthetic rerank dataset (JSONL).")
+    parser.add_argument('output', help="JSONL file to write")
+    parser.add_argument('--count', type=int, default=1000, help="Number of queries")
+    parser.add_argument('--documents', type=int, default=10, help="Candidates per query")
+    parser.add_argument('--doc-tokens', default="0", help="Approximate document length range MIN:MAX (0 keeps originals)")
+    parser.add_argument('--hardness', type=float, default=0.5, help="0 = distractors from other domains, 1 = same topic")
+    parser.add_argument('--languages', help="Language weights, e.g. en=3,de=1 (default: all equally)")
+    parser.add_argument('--seed', type=int, default=SEED)
+    args = parser.parse_args()
+
+    generator = DatasetGenerator(
+        load_sources(),
+        num_documents=args.documents,
+        doc_tokens=parse_range(args.doc_tokens),
+        hardness=args.hardness,
+        language_weights=parse_weights(args.languages) if args.languages else None,
+        seed=args.seed
+    )
+
+    written = 0
+    with open(args.output, 'w', encoding='utf-8') as f:
+        for record in generator.generate(args.count):
+            f.write(json.dumps(record, ensure_ascii=False) + '\n')
+            written += 1
+
+    print(f"✓ {written} queries × {args.documents} documents written to {args.output}")
+
+if __name__ == "__main__":
+    main()
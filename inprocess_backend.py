@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+In-process llama.cpp reranker via llama-cpp-python.
+
+Loads a GGUF reranker with rank pooling and scores (query, document) pairs
+without llama-server, so latency excludes JSON encoding, the HTTP stack and
+the server's task queue. rerank() returns results in the same shape as
+test_reranking(), so it plugs into test_model_with_query(rerank_fn=...).
+
+Pairs are tokenized the way llama-server's /rerank builds them for encoder
+rerankers:  [BOS] query [EOS] [SEP] document [EOS]. Each pair is decoded on
+its own, so a request costs one decode per document.
+
+Requires the optional llama-cpp-python package:
+    uv pip install llama-cpp-python
+"""
+
+import time
+from pathlib import Path
+from typing import List
+
+try:
+    import llama_cpp
+except ImportError:  # Optional dependency; only needed for the in-process backend
+    llama_cpp = None
+
+# --- Configuration ---
+INPROCESS_N_CTX = 2048  # Also the batch size: encoder models need a whole pair in one batch
+INPROCESS_THREADS = None  # None lets llama.cpp pick
+
+def is_available() -> bool:
+    return llama_cpp is not None
+
+class InProcessReranker:
+    """A GGUF reranker loaded in this process with LLAMA_POOLING_TYPE_RANK."""
+
+    def __init__(self, model_path, n_ctx: int = INPROCESS_N_CTX, n_threads: int = INPROCESS_THREADS):
+        if llama_cpp is None:
+            raise ImportError("llama-cpp-python is not installed (uv pip install llama-cpp-python)")
+        self.model_path = Path(model_path)
+        self.llm = llama_cpp.Llama(
+            model_path=str(self.model_path),
+            embedding=True,
+            pooling_type=llama_cpp.LLAMA_POOLING_TYPE_RANK,
+            n_ctx=n_ctx,
+            n_batch=n_ctx,
+            n_ubatch=n_ctx,
+            n_threads=n_threads,
+            verbose=False
+        )
+        self.n_ctx = n_ctx
+        model = self.llm._model
+        # Tokens the vocab does not define are -1 and get dropped, as in llama-server
+        self._bos = [t for t in [model.token_bos()] if t >= 0]
+        self._eos = [t for t in [model.token_eos()] if t >= 0]
+        self._sep = [t for t in [model.token_sep()] if t >= 0]
+
+    def _tokenize(self, text: str) -> List[int]:
+        return self.llm.tokenize(text.encode('utf-8'), add_bos=False, special=False)
+
+    def pair_tokens(self, query_tokens: List[int], document: str) -> List[int]:
+        tokens = self._bos + query_tokens + self._eos + self._sep + self._tokenize(document) + self._eos
+        return tokens[:self.n_ctx]
+
+    def score_tokens(self, tokens: List[int]) -> float:
+        """Decode one pair and read its rank-pooled score."""
+        ctx = self.llm._ctx
+        batch = self.llm._batch
+        ctx.kv_cache_clear()
+        batch.reset()
+        batch.add_sequence(tokens, 0, False)
+        ctx.decode(batch)
+        return float(llama_cpp.llama_get_embeddings_seq(ctx.ctx, 0)[0])
+
+    def rerank(self, query: str, documents: List[str]):
+        """Score every document. Returns (sorted_results, elapsed_time) like test_reranking()."""
+        start_time = time.perf_counter()
+        query_tokens = self._tokenize(query)
+        results = [
+            {'index': i, 'relevance_score': self.score_tokens(self.pair_tokens(query_tokens, doc))}
+            for i, doc in enumerate(documents)
+        ]
+        elapsed_time = time.perf_counter() - start_time
+
+        results.sort(key=lambda x: x['relevance_score'], reverse=True)
+        return results, elapsed_time
+
+    def close(self):
+        self.llm.close()
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Side-by-side llama-server instances with interleaved requests.
+
+Measuring one server after another turns drift in the machine (turbo,
+thermal throttling, background load) into differences between the servers.
+These helpers keep several servers up at once, each on its own port and,
+where the OS allows it, its own cores. They send every query to all of them
+in a random order, so drift hits every server alike. The machine itself is
+monitored during the run (environment_monitor.py) so drifted runs get flagged.
+
+Used by benchmark_builds.py (one model, several llama.cpp builds) and
+test_interleaved.py (several models).
+"""
+
+import os
+import random
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+from environment_monitor import EnvironmentMonitor, format_environment, read_load_average
+from query_dataset import is_correct
+from test_all_models import (
+    SERVER_COMMAND,
+    scores_by_index,
+    start_server,
+    stop_server,
+    test_reranking,
+    wait_for_server,
+)
+
+# --- Configuration ---
+BASE_PORT = 8090  # Servers get BASE_PORT, BASE_PORT + 1, ...
+WARMUP_QUERIES = 3  # Sent to every server, in the same order, before measuring
+SEED = 42
+
+def assign_cpus(count: int, cpus_per_server: Optional[int] = None) -> List[Optional[List[int]]]:
+    """Disjoint core sets per server, or None each where affinity is not supported."""
+    if not hasattr(os, 'sched_getaffinity'):
+        print("⚠️  CPU pinning is not supported on this platform - servers share all cores")
+        return [None] * count
+    available = sorted(os.sched_getaffinity(0))
+    if cpus_per_server is None and len(available) < count:
+        print(f"⚠️  {len(available)} cores for {count} servers - servers share all cores")
+        return [None] * count
+    per_server = cpus_per_server or len(available) // count
+    if per_server < 1 or per_server * count > len(available):
+        raise ValueError(f"{count} servers × {per_server} cores do not fit on {len(available)} available cores")
+    return [available[i * per_server:(i + 1) * per_server] for i in range(count)]
+
+def start_servers(specs: List[Dict], cpus_per_server: Optional[int] = None) -> List[Dict]:
+    """Start one server per spec ({'label', 'model_path'} plus optional 'command', 'extra_args').
+
+    Returns the specs with 'port', 'url', 'cpus', 'threads' (None for
+    llama-server's default) and 'process' filled in, plus 'idle_load', the
+    load average before any of them started. If any server fails to come up,
+    the ones already started are stopped.
+    """
+    servers = []
+    idle_load = read_load_average()
+    try:
+        for i, (spec, cpus) in enumerate(zip(specs, assign_cpus(len(specs), cpus_per_server))):
+            port = BASE_PORT + i
+            server = dict(spec, port=port, url=f"http://localhost:{port}/rerank", cpus=cpus,
+                          threads=len(cpus) if cpus else None, idle_load=idle_load)
+            server['process'] = start_server(spec['model_path'], spec.get('extra_args'),
+                                             spec.get('command') or SERVER_COMMAND, port, cpus)
+            servers.append(server)
+        for server in servers:
+            if not wait_for_server(port=server['port']):
+                raise RuntimeError(f"{server['label']} failed to start on port {server['port']}")
+    except Exception:
+        stop_servers(servers)
+        raise
+    return servers
+
+def monitored_cpus(servers: List[Dict]) -> Optional[List[int]]:
+    """Cores the servers are pinned to, or None (all cores) if any of them is not pinned."""
+    if any(server['cpus'] is None for server in servers):
+        return None
+    return sorted({cpu for server in servers for cpu in server['cpus']})
+
+def busy_threads(servers: List[Dict]) -> int:
+    """Threads the run keeps busy: requests go out one at a time, so one server's worth."""
+    return max(server['threads'] or os.cpu_count() or 1 for server in servers)
+
+def stop_servers(servers: List[Dict]) -> None:
+    for server in servers:
+        stop_server(server['process'])
+
+def warm_up(servers: List[Dict], queries: List[Dict], count: int = WARMUP_QUERIES) -> None:
+    """Send the same warm-up queries to every server."""
+    for query_data in queries[:count]:
+        for server in servers:
+            try:
+                test_reranking(query_data['query'], query_data['documents'], url=server['url'])
+            except Exception as e:
+                print(f"  ⚠️  Warm-up on {server['label']} failed: {e}")
+
+def measure_request(server: Dict, query_index: int, query_data: Dict) -> Dict:
+    """Send one query to one server and record latency, top document and scores."""
+    result = {
+        'label': server['label'],
+        'query_index': query_index,
+        'domain': query_data['domain'],
+        'success': False,
+        'response_time_seconds': None,
+        'top_document_index': None,
+        'correct_answer': False,
+        'scores_by_index': None,
+        'error': None,
+        'timestamp': datetime.now().isoformat()
+    }
+    try:
+        sorted_results, elapsed_time = test_reranking(query_data['query'], query_data['documents'], url=server['url'])
+        result['success'] = True
+        result['response_time_seconds'] = round(elapsed_time, 4)
+        if sorted_results:
+            result['top_document_index'] = sorted_results[0]['index']
+            result['correct_answer'] = is_correct(query_data, sorted_results[0]['index'])
+        result['scores_by_index'] = scores_by_index(sorted_results)
+    except Exception as e:
+        result['error'] = str(e)
+    return result
+
+def run_interleaved(servers: List[Dict], queries: List[Dict], rounds: int, seed: int = SEED,
+                    measure: Callable = measure_request) -> Tuple[List[Dict], Dict]:
+    """Send every query to every server for several rounds, monitoring the machine meanwhile.
+
+    The query order is shuffled per round and the server order per query,
+    so no server is systematically measured first or last. measure(server,
+    query_index, query_data) returns one result row. Returns the rows (each
+    with its 'round') and the environment summary of the run.
+    """
+    rng = random.Random(seed)
+    results = []
+    monitor = EnvironmentMonitor(monitored_cpus(servers), idle_load=servers[0].get('idle_load'),
+                                 busy_threads=busy_threads(servers)).start()
+    try:
+        for round_number in range(rounds):
+            order = list(range(len(queries)))
+            rng.shuffle(order)
+            for query_index in order:
+                for server in rng.sample(servers, len(servers)):
+                    result = measure(server, query_index, queries[query_index])
+                    result['round'] = round_number
+                    results.append(result)
+            print(f"  Round {round_number + 1}/{rounds} done")
+    finally:
+        environment = monitor.stop()
+    print(f"  Environment: {format_environment(environment)}")
+    return results, environment
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Background resident-memory sampler for spawned llama-server processes.
+
+Reads /proc/<pid>/status and /proc/<pid>/smaps_rollup at a fixed interval while
+a model loads and serves queries, so reports can use real resident memory
+instead of the GGUF file size. Falls back to `ps` where /proc is unavailable
+(e.g. macOS), in which case only RSS is reported.
+"""
+
+import statistics
+import subprocess
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional
+
+SAMPLE_INTERVAL = 0.1  # Seconds between memory samples
+
+def _read_kb_fields(path: Path, fields: List[str]) -> Dict[str, float]:
+    """Read 'Name:   1234 kB' style fields from a /proc file, converted to MB."""
+    values = {}
+    with open(path, 'r') as f:
+        for line in f:
+            name, _, rest = line.partition(':')
+            if name in fields:
+                values[name] = int(rest.split()[0]) / 1024
+    return values
+
+def read_process_memory(pid: int) -> Optional[Dict[str, float]]:
+    """Return current memory figures (MB) for a process, or None if it is gone."""
+    proc_dir = Path(f"/proc/{pid}")
+    if proc_dir.exists():
+        try:
+            status = _read_kb_fields(proc_dir / "status", ['VmRSS', 'VmHWM'])
+            sample = {
+                'rss_mb': status.get('VmRSS'),
+                'hwm_mb': status.get('VmHWM'),
+                'pss_mb': None,
+                'anon_mb': None
+            }
+            try:
+                rollup = _read_kb_fields(proc_dir / "smaps_rollup", ['Pss', 'Anonymous'])
+                sample['pss_mb'] = rollup.get('Pss')
+                sample['anon_mb'] = rollup.get('Anonymous')
+            except OSError:
+                pass  # smaps_rollup needs Linux 4.14+ and same-user access
+            return sample if sample['rss_mb'] is not None else None
+        except OSError:
+            return None
+
+    # Non-Linux fallback: RSS only
+    try:
+        output = subprocess.run(
+            ['ps', '-o', 'rss=', '-p', str(pid)],
+            capture_output=True, text=True, timeout=2
+        ).stdout.strip()
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+    if not output:
+        return None
+    rss_mb = int(output) / 1024
+    return {'rss_mb': rss_mb, 'hwm_mb': None, 'pss_mb': None, 'anon_mb': None}
+
+class MemorySampler:
+    """Sample a process's memory in a background thread.
+
+    Samples taken before mark_loaded() belong to the load phase, samples taken
+    after it to the query (steady) phase.
+    """
+
+    def __init__(self, pid: int, interval: float = SAMPLE_INTERVAL):
+        self.pid = pid
+        self.interval = interval
+        self.load_samples = []
+        self.query_samples = []
+        self._phase = self.load_samples
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            sample = read_process_memory(self.pid)
+            if sample is not None:
+                self._phase.append(sample)
+            self._stop_event.wait(self.interval)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def mark_loaded(self):
+        """Switch from the load phase to the query phase."""
+        self._phase = self.query_samples
+
+    def stop(self) -> Dict[str, Optional[float]]:
+        """Stop sampling and return peak and steady memory figures in MB."""
+        if self._stop_event.is_set():
+            return self.summary()
+        # Take one last sample so short query phases are still represented
+        sample = read_process_memory(self.pid)
+        if sample is not None:
+            self._phase.append(sample)
+        self._stop_event.set()
+        if self._thread.is_alive():
+            self._thread.join(timeout=2)
+        return self.summary()
+
+    def summary(self) -> Dict[str, Optional[float]]:
+        all_samples = self.load_samples + self.query_samples
+        if not all_samples:
+            return {'peak_rss_mb': None, 'steady_rss_mb': None, 'steady_anon_mb': None}
+
+        # VmHWM is the kernel's own high-water mark, so it also catches
+        # spikes that fall between two samples
+        peak = max(max(s['rss_mb'] for s in all_samples),
+                   max((s['hwm_mb'] for s in all_samples if s['hwm_mb'] is not None), default=0))
+
+        steady_samples = self.query_samples or self.load_samples[-1:]
+        steady = statistics.median(s['rss_mb'] for s in steady_samples)
+        anon_values = [s['anon_mb'] for s in steady_samples if s['anon_mb'] is not None]
+        steady_anon = statistics.median(anon_values) if anon_values else None
+
+        return {
+            'peak_rss_mb': round(peak, 2),
+            'steady_rss_mb': round(steady, 2),
+            'steady_anon_mb': round(steady_anon, 2) if steady_anon is not None else None
+        }
+
+def samples_llama_server(command: List[str]) -> bool:
+    """Whether a server command runs llama-server itself, so the spawned pid is the one to sample.
+
+    Wrappers such as record_replay.py would have their own memory recorded instead.
+    """
+    return Path(command[0]).name.startswith("llama-server")
+
+def memory_per_slot(memory: Dict[str, Optional[float]], total_slots: int) -> Optional[float]:
+    """Approximate memory per parallel slot (KV cache plus compute buffers).
+
+    Uses anonymous memory when available, since mmap'd weights are file-backed
+    and shared by all slots; otherwise falls back to steady RSS.
+    """
+    base = memory.get('steady_anon_mb')
+    if base is None:
+        base = memory.get('steady_rss_mb')
+    if base is None or not total_slots:
+        return None
+    return round(base / total_slots, 2)
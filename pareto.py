@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Pareto-frontier model selection.
+
+Replaces fixed cut-offs ("accuracy >= 80 and avg_time < 0.2 ...") with the
+multi-objective frontier over:
+
+    p95 latency     lower is better
+    throughput      prompt tokens per second, higher is better (only when every model has it)
+    memory          steady resident memory, lower is better (file size for every
+                    candidate unless all of them had RSS sampled)
+    accuracy        higher is better
+
+A model is dominated when another one is at least as good on every
+objective and strictly better on one. The analyzers list frontier and
+dominated models and answer budget queries such as "best accuracy under
+30ms p95 and 500MB RSS":
+
+    python pareto.py --max-p95-ms 30 --max-memory-mb 500
+    python pareto.py --max-p95-ms 50 --language de
+"""
+
+import argparse
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+# --- Configuration ---
+# (key, direction); objectives missing for any candidate are left out
+OBJECTIVES = [('p95_ms', 'min'), ('throughput', 'max'), ('memory_mb', 'min'), ('accuracy', 'max')]
+BUDGETS = [
+    {'max_p95_ms': 30, 'max_memory_mb': 500},
+    {'max_p95_ms': 100, 'max_memory_mb': 1000},
+    {'max_p95_ms': 300}
+]
+
+def make_point(name: str, stats: Dict, memory_mb: Optional[float] = None) -> Dict:
+    """Objective values of one candidate from analyzer stats (times in seconds, accuracy in %)."""
+    if memory_mb is None:
+        memory_mb = stats.get('steady_rss_mb')
+    token_time = stats.get('token_time') or 0
+    return {
+        'name': name,
+        'p95_ms': float(np.percentile(stats['times'], 95)) * 1000,
+        'throughput': stats['tokens'] / token_time if token_time > 0 else None,
+        'memory_mb': memory_mb if memory_mb is not None else stats['size_mb'],
+        'memory_measured': memory_mb is not None,
+        'size_mb': stats['size_mb'],
+        'accuracy': stats['accuracy']
+    }
+
+def same_memory_source(points: List[Dict]) -> List[Dict]:
+    """Points with one memory figure for all: steady RSS if every point has it, file size otherwise."""
+    if all(p['memory_measured'] for p in points):
+        return points
+    return [dict(p, memory_mb=p['size_mb'], memory_measured=False) for p in points]
+
+def active_objectives(points: List[Dict]) -> List[Tuple[str, str]]:
+    return [(key, direction) for key, direction in OBJECTIVES
+            if all(p[key] is not None for p in points)]
+
+def pareto_frontier(points: List[Dict]) -> Tuple[List[Dict], List[Tuple[Dict, Dict]]]:
+    """Split points into the frontier and (dominated point, a point dominating it) pairs."""
+    if not points:
+        return [], []
+    points = same_memory_source(points)
+    # Orient every objective so that lower is better
+    matrix = np.array([[p[key] if direction == 'min' else -p[key] for key, direction in active_objectives(points)]
+                       for p in points], dtype=float)
+    no_worse = (matrix[:, None, :] <= matrix[None, :, :]).all(axis=2)
+    better = (matrix[:, None, :] < matrix[None, :, :]).any(axis=2)
+    dominates = no_worse & better  # dominates[j, i]: point j dominates point i
+
+    frontier, dominated = [], []
+    for i, point in enumerate(points):
+        dominators = np.flatnonzero(dominates[:, i])
+        if dominators.size == 0:
+            frontier.append(point)
+        else:
+            # Name the most accurate dominator, then the fastest
+            best = min(dominators, key=lambda j: (-points[j]['accuracy'], points[j]['p95_ms']))
+            dominated.append((point, points[best]))
+    return frontier, dominated
+
+def best_under_budget(points: List[Dict], max_p95_ms=None, max_memory_mb=None,
+                      min_throughput=None, min_accuracy=None) -> Optional[Dict]:
+    """Most accurate point within the budget (ties go to the lower p95), or None."""
+    fitting = [p for p in same_memory_source(points)
+               if (max_p95_ms is None or p['p95_ms'] <= max_p95_ms)
+               and (max_memory_mb is None or p['memory_mb'] <= max_memory_mb)
+               and (min_throughput is None or (p['throughput'] or 0) >= min_throughput)
+               and (min_accuracy is None or p['accuracy'] >= min_accuracy)]
+    return min(fitting, key=lambda p: (-p['accuracy'], p['p95_ms']), default=None)
+
+def describe_budget(budget: Dict) -> str:
+    parts = []
+    if budget.get('max_p95_ms') is not None:
+        parts.append(f"p95 ≤ {budget['max_p95_ms']:g}ms")
+    if budget.get('max_memory_mb') is not None:
+        parts.append(f"memory ≤ {budget['max_memory_mb']:g}MB")
+    if budget.get('min_throughput') is not None:
+        parts.append(f"≥ {budget['min_throughput']:g} tokens/s")
+    if budget.get('min_accuracy') is not None:
+        parts.append(f"accuracy ≥ {budget['min_accuracy']:g}%")
+    return ", ".join(parts) or "no limits"
+
+def format_memory(p: Dict) -> str:
+    return f"{p['memory_mb']:.0f}MB" + ("" if p['memory_measured'] else " (file)")
+
+def format_point(p: Dict) -> str:
+    throughput = f", {p['throughput']:.0f} tok/s" if p['throughput'] is not None else ""
+    return f"{p['accuracy']:.0f}%, p95 {p['p95_ms']:.0f}ms, {format_memory(p)}{throughput}"
+
+def generate_frontier_section(points: List[Dict], title: str = "Pareto Frontier",
+                              budgets: List[Dict] = BUDGETS, level: str = "##") -> str:
+    """Markdown listing frontier and dominated candidates plus answers to the budget queries."""
+    if not points:
+        return ""
+    points = same_memory_source(points)
+    frontier, dominated = pareto_frontier(points)
+    objectives = ", ".join(key for key, _ in active_objectives(points))
+
+    report = f"{level} {title}\n\n"
+    report += f"Objectives: {objectives}. {len(frontier)} of {len(points)} candidates are not dominated.\n\n"
+    report += "| Model | Accuracy | p95 | Throughput | Memory |\n"
+    report += "|-------|----------|-----|------------|--------|\n"
+    for p in sorted(frontier, key=lambda p: (-p['accuracy'], p['p95_ms'])):
+        throughput = f"{p['throughput']:.0f} tok/s" if p['throughput'] is not None else "-"
+        report += f"| {p['name']} | {p['accuracy']:.0f}% | {p['p95_ms']:.0f}ms | {throughput} | {format_memory(p)} |\n"
+
+    if dominated:
+        report += "\n**Dominated:**\n\n"
+        report += "| Model | Accuracy | p95 | Memory | Dominated By |\n"
+        report += "|-------|----------|-----|--------|--------------|\n"
+        for p, by in sorted(dominated, key=lambda x: (-x[0]['accuracy'], x[0]['p95_ms'])):
+            report += f"| {p['name']} | {p['accuracy']:.0f}% | {p['p95_ms']:.0f}ms | {format_memory(p)} | {by['name']} |\n"
+
+    if budgets:
+        report += "\n**Budget queries:**\n"
+        for budget in budgets:
+            best = best_under_budget(points, **budget)
+            answer = f"{best['name']} ({format_point(best)})" if best else "nothing fits"
+            report += f"- Best accuracy with {describe_budget(budget)}: {answer}\n"
+
+    return report + "\n"
+
+def main():
+    parser = argparse.ArgumentParser(description="Answer a latency/memory/accuracy budget query from test results.")
+    parser.add_argument('results', nargs='?', help="Results CSV (default: test_results.csv, or the multilingual file with --language)")
+    parser.add_argument('--max-p95-ms', type=float)
+    parser.add_argument('--max-memory-mb', type=float)
+    parser.add_argument('--min-throughput', type=float, help="Prompt tokens per second")
+    parser.add_argument('--min-accuracy', type=float)
+    parser.add_argument('--language', help="Use the multilingual results for this language code")
+    args = parser.parse_args()
+
+    if args.language:
+        import analyze_multilang
+        data = analyze_multilang.load_and_parse_csv(args.results or 'test_results_multilang.csv')
+        points = analyze_multilang.language_points(
+            {quant: analyze_multilang.calculate_model_stats(rows) for quant, rows in data.items() if quant != 'ALL'},
+            args.language)
+    else:
+        import analyze_results
+        data = analyze_results.load_and_parse_csv(args.results or 'test_results.csv')
+        points = analyze_results.quant_points(
+            {quant: analyze_results.calculate_model_stats(rows) for quant, rows in data.items() if rows})
+
+    budget = {'max_p95_ms': args.max_p95_ms, 'max_memory_mb': args.max_memory_mb,
+              'min_throughput': args.min_throughput, 'min_accuracy': args.min_accuracy}
+    frontier, _ = pareto_frontier(points)
+    print(f"{len(points)} candidates, {len(frontier)} on the Pareto frontier")
+    best = best_under_budget(points, **budget)
+    if best:
+        print(f"✓ Best with {describe_budget(budget)}: {best['name']} - {format_point(best)}")
+    else:
+        print(f"✗ No model fits {describe_budget(budget)}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Small statistics helpers for comparing latency samples between runs.
+
+NumPy only, so the comparisons run without SciPy: a one-sided Mann-Whitney U
+test (normal approximation with tie correction) and percentile bootstrap
+confidence intervals for the relative change of a percentile.
+"""
+
+import math
+from typing import Tuple
+
+import numpy as np
+
+BOOTSTRAP_SAMPLES = 2000
+SEED = 42
+
+def average_ranks(values: np.ndarray) -> np.ndarray:
+    """1-based ranks, ties getting the mean of the ranks they span."""
+    _, inverse, counts = np.unique(values, return_inverse=True, return_counts=True)
+    upper = np.cumsum(counts)
+    return ((upper - counts + 1 + upper) / 2)[inverse]
+
+def mann_whitney_greater(current, baseline) -> float:
+    """One-sided p-value that current latencies tend to be larger than baseline ones."""
+    current, baseline = np.asarray(current, dtype=float), np.asarray(baseline, dtype=float)
+    n1, n2 = len(current), len(baseline)
+    if n1 == 0 or n2 == 0:
+        return float('nan')
+    combined = np.concatenate([current, baseline])
+    u = average_ranks(combined)[:n1].sum() - n1 * (n1 + 1) / 2
+
+    _, counts = np.unique(combined, return_counts=True)
+    n = n1 + n2
+    variance = n1 * n2 / 12 * ((n + 1) - np.sum(counts ** 3 - counts) / (n * (n - 1)))
+    if variance <= 0:
+        return 1.0  # All values tied
+    z = (u - n1 * n2 / 2 - 0.5) / math.sqrt(variance)  # Continuity correction
+    return 0.5 * math.erfc(z / math.sqrt(2))
+
+def bootstrap_change_ci(baseline, current, percentile: float = 50, confidence: float = 0.95,
+                        samples: int = BOOTSTRAP_SAMPLES, seed: int = SEED) -> Tuple[float, float, float]:
+    """Relative change of a percentile (current / baseline - 1) with a bootstrap confidence interval."""
+    baseline, current = np.asarray(baseline, dtype=float), np.asarray(current, dtype=float)
+    change = np.percentile(current, percentile) / np.percentile(baseline, percentile) - 1
+    rng = np.random.default_rng(seed)
+    resampled_baseline = np.percentile(rng.choice(baseline, (samples, len(baseline))), percentile, axis=1)
+    resampled_current = np.percentile(rng.choice(current, (samples, len(current))), percentile, axis=1)
+    changes = resampled_current / resampled_baseline - 1
+    tail = (1 - confidence) / 2 * 100
+    low, high = np.percentile(changes, [tail, 100 - tail])
+    return float(change), float(low), float(high)
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Quantization ladder sweep.
+
+Finds the F16 GGUFs in MODEL_DIR, quantizes each one locally down a ladder
+of llama.cpp types with llama-quantize, and benchmarks every rung (F16
+included) with the test_all_models.py runner. Quantized files are kept in
+LADDER_DIR and reused on later runs.
+
+Writes the per-query rows to quant_ladder_results.csv, which has the same
+columns as test_results.csv, so analyze_results.py and
+analyze_quant_fidelity.py read it as well. It also writes
+REPORT_QUANT_LADDER.md with a latency-size-accuracy curve per model.
+
+Usage:
+    python quant_ladder.py                          # every F16 model, default ladder
+    python quant_ladder.py bge-reranker-v2-m3 --ladder Q8_0,Q5_K_M,Q4_K_M,Q3_K_M
+"""
+
+import argparse
+import subprocess
+from pathlib import Path
+
+import analyze_quant_fidelity
+from analyze_results import calculate_model_stats, generate_curve_section, load_and_parse_csv
+from quant_types import model_family, quant_type
+from test_all_models import (
+    MODEL_DIR,
+    get_model_files,
+    load_test_queries,
+    run_model_queries,
+    save_to_csv,
+)
+
+# --- Configuration ---
+QUANTIZE_COMMAND = ["llama-quantize"]
+LADDER = ['Q8_0', 'Q6_K', 'Q5_K_M', 'Q4_K_M', 'Q3_K_M', 'Q2_K']
+LADDER_DIR = MODEL_DIR / "ladder"
+QUANTIZE_THREADS = None  # llama-quantize's default (all cores)
+RESULTS_FILE = "quant_ladder_results.csv"
+REPORT_FILE = "REPORT_QUANT_LADDER.md"
+
+def find_f16_models(patterns=None):
+    """F16 models in MODEL_DIR, optionally only those whose name contains one of patterns."""
+    models = [path for path in get_model_files() if quant_type(path.name) == 'F16']
+    if patterns:
+        models = [path for path in models if any(p in path.name for p in patterns)]
+    return models
+
+def quantize(source: Path, quant: str) -> Path:
+    """Quantize an F16 GGUF to LADDER_DIR, reusing the file if it already exists."""
+    output = LADDER_DIR / f"{model_family(source.name)}-{quant}.gguf"
+    if output.exists():
+        print(f"  ✓ {output.name} (cached)")
+        return output
+
+    LADDER_DIR.mkdir(parents=True, exist_ok=True)
+    partial = output.with_suffix(".gguf.part")  # Renamed only once complete
+    cmd = QUANTIZE_COMMAND + [str(source), str(partial), quant]
+    if QUANTIZE_THREADS:
+        cmd.append(str(QUANTIZE_THREADS))
+    completed = subprocess.run(cmd, capture_output=True, text=True)
+    if completed.returncode != 0:
+        partial.unlink(missing_ok=True)
+        raise RuntimeError(f"llama-quantize {quant} failed: {completed.stderr.strip()[-500:]}")
+    partial.rename(output)
+    print(f"  ✓ {output.name} ({output.stat().st_size / (1024 * 1024):.0f} MB)")
+    return output
+
+def generate_ladder_report(results_file: str) -> str:
+    """Curve report of a ladder run, with rank agreement against F16 where scores are available."""
+    data = load_and_parse_csv(results_file)
+    all_stats = {quant: calculate_model_stats(rows) for quant, rows in data.items() if rows}
+
+    scores, _ = analyze_quant_fidelity.load_runs([results_file])
+    rows = analyze_quant_fidelity.compare_pairs(scores)
+    summary = analyze_quant_fidelity.summarize(rows, ('model', 'quant'))
+    kendall_tau = {key: s['kendall_tau'] for key, s in summary.items()}
+
+    report = "# Reranking Models - Quantization Ladder Report\n\n"
+    report += "Every rung was quantized locally from the F16 model and run on the same query set.\n\n"
+    return report + generate_curve_section(all_stats, kendall_tau)
+
+def main():
+    parser = argparse.ArgumentParser(description="Quantize F16 models down a ladder and benchmark every rung.")
+    parser.add_argument('models', nargs='*', help="Only F16 models whose file name contains one of these")
+    parser.add_argument('--ladder', default=",".join(LADDER), help="Comma-separated llama.cpp quantization types")
+    parser.add_argument('--report-only', action='store_true', help=f"Rebuild {REPORT_FILE} from {RESULTS_FILE}")
+    args = parser.parse_args()
+
+    if not args.report_only:
+        ladder = [quant.strip().upper() for quant in args.ladder.split(',') if quant.strip()]
+        sources = find_f16_models(args.models)
+        if not sources:
+            print(f"✗ No F16 models found in {MODEL_DIR}")
+            return
+        test_queries = load_test_queries()
+
+        print("=" * 80)
+        print("QUANTIZATION LADDER SWEEP")
+        print("=" * 80)
+        print(f"Models: {len(sources)}, ladder: F16 → {' → '.join(ladder)}, queries: {len(test_queries)}")
+
+        all_results = []
+        for model_idx, source in enumerate(sources, 1):
+            print(f"\n[Model {model_idx}/{len(sources)}] {model_family(source.name)}")
+            print("-" * 80)
+            rungs = [source]
+            for quant in ladder:
+                try:
+                    rungs.append(quantize(source, quant))
+                except (RuntimeError, OSError) as e:
+                    print(f"  ✗ {quant}: {e}")
+
+            for rung in rungs:
+                print(f"\n  Testing {rung.name}")
+                all_results.extend(run_model_queries(rung, test_queries))
+
+        save_to_csv(all_results, RESULTS_FILE)
+
+    with open(REPORT_FILE, 'w') as f:
+        f.write(generate_ladder_report(RESULTS_FILE))
+    print(f"✓ {REPORT_FILE}")
+
+if __name__ == "__main__":
+    main()
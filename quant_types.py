@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""
+GGUF quantization labels in model names.
+
+Model files are named <family>-<QUANT>.gguf (Ollama tags <family>-<QUANT>:latest).
+The analyzers used to look for the Q4_K_M, Q8_0 and F16 substrings only;
+these helpers recognize every llama.cpp type, so ladder sweeps
+(quant_ladder.py) group and sort the same way.
+"""
+
+import re
+from typing import Optional
+
+# Largest to smallest; unlisted types sort after these
+QUANT_ORDER = [
+    'F32', 'BF16', 'F16', 'Q8_0', 'Q6_K', 'Q5_1', 'Q5_K_M', 'Q5_0', 'Q5_K_S',
+    'Q4_1', 'Q4_K_M', 'Q4_0', 'Q4_K_S', 'IQ4_NL', 'IQ4_XS', 'Q3_K_L', 'Q3_K_M',
+    'IQ3_M', 'Q3_K_S', 'IQ3_S', 'IQ3_XS', 'IQ3_XXS', 'Q2_K', 'Q2_K_S', 'IQ2_M',
+    'IQ2_S', 'IQ2_XS', 'IQ2_XXS', 'IQ1_M', 'IQ1_S'
+]
+QUANT_PATTERN = re.compile(
+    r'[-_.](F32|BF16|F16|IQ\d_[A-Z]+|Q\d_K_[SML]|Q\d_K|Q\d_\d)(?=[-_.:]|$)', re.IGNORECASE)
+
+def _match(model_name: str):
+    matches = list(QUANT_PATTERN.finditer(model_name))
+    return matches[-1] if matches else None
+
+def quant_type(model_name: str) -> Optional[str]:
+    """Quantization label of a model file or tag, or None if it has none."""
+    match = _match(model_name)
+    return match.group(1).upper() if match else None
+
+def model_family(model_name: str) -> str:
+    """Model name without the quantization suffix."""
+    match = _match(model_name)
+    return model_name[:match.start()] if match else model_name
+
+def quant_sort_key(quant: str):
+    """Sort key putting quantization labels in QUANT_ORDER (largest first)."""
+    return (QUANT_ORDER.index(quant) if quant in QUANT_ORDER else len(QUANT_ORDER), quant)
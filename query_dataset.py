@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Shared query dataset loader.
+
+Reads query sets in three formats into one dict per query:
+
+    CSV      test_queries.csv / test_queries_multilang.csv layout. Any number
+             of docN columns; optional language, relevance ("0;2;1;0") and
+             correct_doc_indices ("1;3") columns.
+    JSONL    one query per line:
+             {"query": "...", "documents": ["...", ...] | "doc_ids": [...],
+              "relevance": [0, 2, 1] | "correct_doc_indices": [1] | "correct_doc_index": 1,
+              "domain": "...", "language": "..."}
+    Parquet  the JSONL fields as columns (needs the optional pyarrow package)
+
+Every record has query, documents, domain, relevance (a graded label per
+document, 0 = not relevant) and correct_doc_index (the first document with
+the highest grade, as the runners report it). language is set when the
+source has it. Queries listing doc_ids are resolved against a CorpusStore
+when they are read. correct_doc_index is None when no document is relevant.
+
+load_queries() returns the whole set, which the runners need because they
+run it once per model; iter_queries() yields one record at a time for
+single-pass tools.
+"""
+
+import csv
+import json
+import re
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+from corpus_store import CorpusStore, resolve_documents
+
+try:
+    import pyarrow.parquet as pq
+except ImportError:  # Optional dependency; only needed for Parquet datasets
+    pq = None
+
+DOC_COLUMN = re.compile(r'^doc(\d+)$')
+
+def _split_ints(value: str) -> List[int]:
+    return [int(part) for part in re.split(r'[;,\s]+', value.strip()) if part]
+
+def _relevance(record: Dict, num_documents: int) -> List[int]:
+    """Graded labels from whichever of relevance / correct_doc_indices / correct_doc_index is given."""
+    if record.get('relevance') is not None:
+        relevance = [int(grade) for grade in record['relevance']]
+        if len(relevance) != num_documents:
+            raise ValueError(f"{len(relevance)} relevance labels for {num_documents} documents")
+        return relevance
+    relevance = [0] * num_documents
+    indices = record.get('correct_doc_indices')
+    if indices is None and record.get('correct_doc_index') is not None:
+        indices = [record['correct_doc_index']]
+    for index in indices or []:
+        relevance[int(index)] = 1
+    return relevance
+
+def normalize_record(record: Dict, corpus=None) -> Dict:
+    """Turn a raw CSV/JSONL/Parquet record into the shape the runners use."""
+    query_data = {
+        'domain': record.get('domain') or 'general',
+        'query': record['query'],
+        'documents': resolve_documents(record, corpus)
+    }
+    if record.get('language'):
+        query_data['language'] = record['language']
+    if record.get('doc_ids') is not None:
+        query_data['doc_ids'] = list(record['doc_ids'])
+    if record.get('id') is not None:
+        query_data['id'] = record['id']
+
+    relevance = _relevance(record, len(query_data['documents']))
+    query_data['relevance'] = relevance
+    best = max(relevance, default=0)
+    query_data['correct_doc_index'] = relevance.index(best) if best > 0 else None
+    return query_data
+
+def _iter_csv(path: Path) -> Iterator[Dict]:
+    with open(path, 'r', encoding='utf-8') as f:
+        reader = csv.DictReader(f)
+        doc_columns = sorted((c for c in reader.fieldnames if DOC_COLUMN.match(c)),
+                             key=lambda c: int(DOC_COLUMN.match(c).group(1)))
+        for row in reader:
+            documents = [row[c] for c in doc_columns]
+            while documents and not documents[-1]:
+                documents.pop()  # Rows may use fewer docN columns than the header
+            record = {
+                'domain': row.get('domain'),
+                'language': row.get('language'),
+                'query': row['query'],
+                'documents': documents
+            }
+            if row.get('relevance'):
+                record['relevance'] = _split_ints(row['relevance'])
+            elif row.get('correct_doc_indices'):
+                record['correct_doc_indices'] = _split_ints(row['correct_doc_indices'])
+            elif row.get('correct_doc_index'):
+                record['correct_doc_index'] = int(row['correct_doc_index'])
+            yield record
+
+def _iter_jsonl(path: Path) -> Iterator[Dict]:
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+def _iter_parquet(path: Path) -> Iterator[Dict]:
+    if pq is None:
+        raise ImportError("Parquet datasets need pyarrow (uv pip install pyarrow)")
+    for batch in pq.ParquetFile(path).iter_batches():
+        yield from batch.to_pylist()
+
+def iter_queries(path, corpus=None, limit: Optional[int] = None) -> Iterator[Dict]:
+    """Stream normalized queries from a CSV, JSONL or Parquet dataset.
+
+    corpus resolves doc_ids: an open CorpusStore, or a corpus directory that
+    is opened for the duration of the iteration.
+    """
+    path = Path(path)
+    suffix = path.suffix.lower()
+    if suffix == '.csv':
+        records = _iter_csv(path)
+    elif suffix in ('.jsonl', '.ndjson'):
+        records = _iter_jsonl(path)
+    elif suffix == '.parquet':
+        records = _iter_parquet(path)
+    else:
+        raise ValueError(f"unsupported dataset format: {path.name}")
+
+    owned = corpus is not None and not isinstance(corpus, CorpusStore)
+    if owned:
+        corpus = CorpusStore(corpus)
+    try:
+        for count, record in enumerate(records):
+            if limit is not None and count >= limit:
+                return
+            yield normalize_record(record, corpus)
+    finally:
+        if owned:
+            corpus.close()
+
+def load_queries(path, corpus=None, limit: Optional[int] = None) -> List[Dict]:
+    """Load a whole dataset, as the runners do: they run every query once per model."""
+    return list(iter_queries(path, corpus, limit))
+
+def correct_indices(query_data: Dict) -> List[int]:
+    """Indices of the documents with the highest relevance grade."""
+    relevance = query_data.get('relevance')
+    if relevance is None:
+        return [query_data['correct_doc_index']]
+    best = max(relevance, default=0)
+    return [i for i, grade in enumerate(relevance) if grade == best and best > 0]
+
+def is_correct(query_data: Dict, top_index: int) -> bool:
+    """Whether the top-ranked document is one of the best-graded ones."""
+    return top_index in correct_indices(query_data)
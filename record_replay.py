@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+"""
+Record-and-replay backend for llama-server and Ollama rerank traffic.
+
+record: an HTTP proxy that forwards every request to the real backend and
+appends (route, model, request, response, upstream latency) to a gzip JSONL
+archive. It either proxies an already running backend (--upstream) or, when
+given llama-server style arguments (-m MODEL --port PORT ...), starts the real
+llama-server on a private port and proxies PORT to it. That makes it a drop-in
+replacement for the "llama-server" command in SERVER_COMMAND.
+
+serve: answers the same routes (/rerank, /v1/rerank, /api/rerank, /tokenize,
+...) from an archive, sleeping for the recorded latency unless --instant is
+given. It accepts the same llama-server style arguments, so runners can launch
+it in place of llama-server and work offline.
+
+Usage:
+    # llama.cpp runners: set SERVER_COMMAND in test_all_models.py to one of
+    [sys.executable, "record_replay.py", "record", "--archive", "recordings/llamacpp.jsonl.gz"]
+    [sys.executable, "record_replay.py", "serve", "--archive", "recordings/llamacpp.jsonl.gz"]
+
+    # Ollama runners: move Ollama to another port, then proxy or replay 11434
+    OLLAMA_HOST=127.0.0.1:11435 ollama serve
+    python record_replay.py record --archive recordings/ollama.jsonl.gz --port 11434 --upstream http://localhost:11435
+    python record_replay.py serve --archive recordings/ollama.jsonl.gz --port 11434 --instant
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import signal
+import subprocess
+import sys
+import threading
+import time
+from collections import defaultdict, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import requests
+
+# --- Configuration ---
+DEFAULT_PORT = 8080
+UPSTREAM_PORT_OFFSET = 1000  # Private port for the wrapped llama-server
+UPSTREAM_BINARY = "llama-server"
+REQUEST_TIMEOUT = 120
+HEALTH_ROUTES = {'/health'}
+
+def request_key(method, route, model, body):
+    """Stable key for a request: same route, model and JSON body map to the same key."""
+    try:
+        canonical = json.dumps(json.loads(body), sort_keys=True, separators=(',', ':')) if body else ''
+    except ValueError:
+        canonical = body.decode('utf-8', errors='replace') if isinstance(body, bytes) else body
+    raw = f"{method} {route}\0{model or ''}\0{canonical}"
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+def request_model(body, default_model):
+    """Ollama requests name their model; llama-server serves exactly one."""
+    try:
+        return json.loads(body).get('model') or default_model
+    except (ValueError, AttributeError):
+        return default_model
+
+class ArchiveWriter:
+    """Append-only gzip JSONL archive. Each session adds one gzip member."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = gzip.open(self.path, 'at', encoding='utf-8')
+        self._lock = threading.Lock()
+        self.count = 0
+
+    def write(self, record):
+        line = json.dumps(record, ensure_ascii=False, separators=(',', ':'))
+        with self._lock:
+            self._file.write(line + '\n')
+            self.count += 1
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+def iter_archive(path):
+    """Yield archived exchanges in recording order."""
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+def load_archive(path):
+    """Index an archive by request key. Repeated requests keep every recording, in order."""
+    index = defaultdict(list)
+    for record in iter_archive(path):
+        index[record['key']].append(record)
+    return index
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass  # Keep the runners' console output readable
+
+    def _read_body(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        return self.rfile.read(length) if length else b''
+
+    def _send(self, status, body, content_type='application/json'):
+        if isinstance(body, (dict, list)):
+            body = json.dumps(body).encode('utf-8')
+        elif isinstance(body, str):
+            body = body.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        self.server.handle_exchange(self, 'GET', self._read_body())
+
+    def do_POST(self):
+        self.server.handle_exchange(self, 'POST', self._read_body())
+
+class RecordingProxy(ThreadingHTTPServer):
+    """Forward requests to an upstream backend and archive every exchange."""
+
+    daemon_threads = True
+
+    def __init__(self, port, upstream_url, archive, model=None):
+        super().__init__(('127.0.0.1', port), _Handler)
+        self.upstream_url = upstream_url.rstrip('/')
+        self.archive = archive
+        self.model = model
+
+    def handle_exchange(self, handler, method, body):
+        route = handler.path
+        start_time = time.perf_counter()
+        try:
+            response = requests.request(
+                method, f"{self.upstream_url}{route}",
+                data=body or None,
+                headers={'Content-Type': handler.headers.get('Content-Type', 'application/json')},
+                timeout=REQUEST_TIMEOUT
+            )
+        except requests.exceptions.RequestException as e:
+            handler._send(502, {'error': f"upstream unavailable: {e}"})
+            return
+        elapsed = time.perf_counter() - start_time
+
+        if route not in HEALTH_ROUTES:
+            model = request_model(body, self.model)
+            self.archive.write({
+                'key': request_key(method, route, model, body),
+                'method': method,
+                'route': route,
+                'model': model,
+                'request': body.decode('utf-8', errors='replace'),
+                'status': response.status_code,
+                'response': response.text,
+                'content_type': response.headers.get('Content-Type', 'application/json'),
+                'elapsed_seconds': round(elapsed, 6)
+            })
+        handler._send(response.status_code, response.content,
+                      response.headers.get('Content-Type', 'application/json'))
+
+class ReplayServer(ThreadingHTTPServer):
+    """Serve archived responses at their recorded latency (or instantly)."""
+
+    daemon_threads = True
+
+    def __init__(self, port, archive_index, model=None, instant=False):
+        super().__init__(('127.0.0.1', port), _Handler)
+        self.model = model
+        self.instant = instant
+        self.misses = 0
+        # Each key replays its recordings in order, then cycles
+        self._queues = {key: deque(records) for key, records in archive_index.items()}
+        self._lock = threading.Lock()
+
+    def _next_recording(self, key):
+        with self._lock:
+            queue = self._queues.get(key)
+            if not queue:
+                return None
+            record = queue[0]
+            queue.rotate(-1)
+            return record
+
+    def handle_exchange(self, handler, method, body):
+        route = handler.path
+        if route in HEALTH_ROUTES:
+            handler._send(200, {'status': 'ok'})
+            return
+
+        model = request_model(body, self.model)
+        record = self._next_recording(request_key(method, route, model, body))
+        if record is None:
+            with self._lock:
+                self.misses += 1
+            handler._send(404, {'error': f"no recording for {method} {route} (model={model})"})
+            return
+
+        if not self.instant:
+            time.sleep(record['elapsed_seconds'])
+        handler._send(record['status'], record['response'], record['content_type'])
+
+def _parse_args(argv):
+    parser = argparse.ArgumentParser(description="Record or replay rerank backend traffic.")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    for name in ['record', 'serve']:
+        p = sub.add_parser(name)
+        p.add_argument('--archive', required=True, help="gzip JSONL archive path")
+        p.add_argument('--port', type=int, default=DEFAULT_PORT, help="Port to listen on")
+        p.add_argument('-m', '--model', help="Model path or name (llama-server style)")
+
+    sub.choices['record'].add_argument('--upstream', help="URL of an already running backend")
+    sub.choices['record'].add_argument('--upstream-binary', default=UPSTREAM_BINARY,
+                                       help="Server to start when --upstream is not given")
+    sub.choices['serve'].add_argument('--instant', action='store_true', help="Do not sleep recorded latency")
+
+    # Unknown arguments (e.g. --rerank, --no-mmap) are passed to the wrapped llama-server
+    args, passthrough = parser.parse_known_args(argv)
+    return args, passthrough
+
+def main(argv=None):
+    args, passthrough = _parse_args(sys.argv[1:] if argv is None else argv)
+    model = Path(args.model).name if args.model else None
+
+    upstream_process = None
+    if args.command == 'record':
+        archive = ArchiveWriter(args.archive)
+        upstream_url = args.upstream
+        if not upstream_url:
+            if not args.model:
+                sys.exit("record: either --upstream or -m MODEL is required")
+            upstream_port = args.port + UPSTREAM_PORT_OFFSET
+            upstream_process = subprocess.Popen(
+                [args.upstream_binary, '-m', args.model, '--port', str(upstream_port)] + passthrough
+            )
+            upstream_url = f"http://localhost:{upstream_port}"
+        server = RecordingProxy(args.port, upstream_url, archive, model)
+    else:
+        archive = None
+        server = ReplayServer(args.port, load_archive(args.archive), model, args.instant)
+
+    def shutdown(signum, frame):
+        # Runners stop servers with SIGTERM; flush the archive and stop the child
+        threading.Thread(target=server.shutdown, daemon=True).start()
+
+    signal.signal(signal.SIGTERM, shutdown)
+    signal.signal(signal.SIGINT, shutdown)
+
+    # /health is proxied (502 until the upstream listens), so callers only
+    # see "ready" once the real server is
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        if archive is not None:
+            archive.close()
+            print(f"record: {archive.count} exchanges appended to {args.archive}", file=sys.stderr)
+        if upstream_process is not None:
+            upstream_process.terminate()
+            try:
+                upstream_process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                upstream_process.kill()
+        if isinstance(server, ReplayServer) and server.misses:
+            print(f"serve: {server.misses} requests had no recording", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
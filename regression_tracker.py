@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+"""
+Performance regression tracking between sweep runs.
+
+Every sweep overwrites test_results.csv, so save a copy as a named baseline
+and compare later runs against it:
+
+    python regression_tracker.py save b6730                     # test_results*.csv as baseline "b6730"
+    python regression_tracker.py list
+    python regression_tracker.py compare b6730                  # current test_results*.csv vs "b6730"
+    python regression_tracker.py compare b6730 new_results.csv --max-p95-increase 0.2 --by group
+
+Rows are matched on (model, quant, domain, language). Latency is compared per
+model and quant (pooled over the matched groups; --by group compares each
+group on its own). The p50 is gated on a one-sided Mann-Whitney U test, the
+p95 on the lower bound of a bootstrap interval for its change, since a
+rank test barely notices a slower tail. Accuracy is compared exactly, and so are the
+score vectors (scores_by_index) of every query that was run in both.
+
+Writes REPORT_REGRESSION.md and exits with status 1 when p50/p95 latency grows
+(significantly) or accuracy drops beyond the thresholds.
+"""
+
+import argparse
+import csv
+import json
+import shutil
+import subprocess
+import sys
+from collections import defaultdict
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from analyze_quant_fidelity import parse_scores
+from perf_stats import bootstrap_change_ci, mann_whitney_greater
+from quant_types import model_family, quant_sort_key, quant_type
+from test_all_models import SERVER_COMMAND
+
+# --- Configuration ---
+BASELINE_DIR = Path("baselines")
+RESULT_FILES = ["test_results.csv", "test_results_multilang.csv"]
+REPORT_FILE = "REPORT_REGRESSION.md"
+MAX_P50_INCREASE = 0.10  # Relative
+MAX_P95_INCREASE = 0.15
+MAX_ACCURACY_DROP = 2.0  # Percentage points
+ALPHA = 0.05  # Latency increases must also be significant at this level
+MIN_TRIALS = 5  # Fewer latency samples per side are reported but never flagged
+FAIL_ON_SCORE_CHANGE = False
+
+def server_version(command: Optional[List[str]] = None) -> Optional[str]:
+    """Version line of `llama-server --version` (or another server command), or None if it cannot be run."""
+    try:
+        completed = subprocess.run(list(command or SERVER_COMMAND) + ["--version"],
+                                   capture_output=True, text=True, timeout=10)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    lines = (completed.stdout + completed.stderr).strip().splitlines()
+    return next((line for line in lines if 'version' in line.lower()), lines[0] if lines else None)
+
+def save_baseline(name: str, paths: List[str]) -> Path:
+    """Copy result files into BASELINE_DIR/<name> with a small metadata file."""
+    target = BASELINE_DIR / name
+    if target.exists():
+        raise FileExistsError(f"Baseline {name} already exists in {BASELINE_DIR}")
+    existing = [Path(p) for p in paths if Path(p).exists()]
+    if not existing:
+        raise FileNotFoundError(f"None of {', '.join(paths)} exist")
+    target.mkdir(parents=True)
+    for path in existing:
+        shutil.copy2(path, target / path.name)
+    metadata = {
+        'created': datetime.now().isoformat(),
+        'files': [path.name for path in existing],
+        'server_version': server_version()
+    }
+    with open(target / "baseline.json", 'w') as f:
+        json.dump(metadata, f, indent=2)
+    return target
+
+def baseline_files(name: str) -> List[Path]:
+    target = BASELINE_DIR / name
+    if not target.is_dir():
+        raise FileNotFoundError(f"No baseline named {name} in {BASELINE_DIR}")
+    return sorted(target.glob("*.csv"))
+
+def load_run(paths) -> Tuple[Dict, Dict]:
+    """Per (model, quant, domain, language) trials, plus score vectors per (model, quant, language, domain, query)."""
+    groups = defaultdict(lambda: {'times': [], 'correct': 0, 'total': 0})
+    scores = {}
+    for path in paths:
+        if not Path(path).exists():
+            continue
+        with open(path, 'r', encoding='utf-8') as f:
+            reader = csv.DictReader(f)
+            has_query = 'query' in reader.fieldnames
+            seen, collapsed = set(), 0
+            for row in reader:
+                model, quant = model_family(row['model_name']), quant_type(row['model_name']) or '-'
+                language = row.get('language') or 'en'
+                group = groups[(model, quant, row['domain'], language)]
+                # Failed requests count against accuracy but have no latency
+                group['total'] += 1
+                if (row.get('success') or '').upper() != 'TRUE':
+                    continue
+                group['times'].append(float(row['response_time_seconds']))
+                group['correct'] += (row.get('correct_answer') or '').upper() == 'TRUE'
+                if row.get('scores_by_index'):
+                    key = (model, quant, language, row['domain'], row.get('query', ''))
+                    if not has_query and key in seen:
+                        collapsed += 1
+                    seen.add(key)
+                    scores.setdefault(key, row['scores_by_index'])
+        if collapsed:
+            print(f"⚠️  {path} has no query column: {collapsed} rows repeat a language and domain and are not compared")
+    return dict(groups), scores
+
+def compare_latency_and_accuracy(baseline: Dict, current: Dict, by_group: bool, thresholds: Dict) -> List[Dict]:
+    """One comparison per unit (model and quant, or every group), over the groups present in both runs."""
+    units = defaultdict(lambda: ({'times': [], 'correct': 0, 'total': 0}, {'times': [], 'correct': 0, 'total': 0}))
+    for key in baseline.keys() & current.keys():
+        unit = key if by_group else key[:2]
+        for side, group in zip(units[unit], (baseline[key], current[key])):
+            side['times'].extend(group['times'])
+            side['correct'] += group['correct']
+            side['total'] += group['total']
+
+    rows = []
+    for unit, (before, after) in units.items():
+        row = {
+            'unit': unit,
+            'trials': (len(before['times']), len(after['times'])),
+            'accuracy': (100 * before['correct'] / before['total'], 100 * after['correct'] / after['total']),
+            'p50': None, 'p95': None, 'p50_change': None, 'p50_ci': None, 'p95_change': None, 'p95_ci': None,
+            'p_value': None,
+            'reasons': []
+        }
+        accuracy_drop = row['accuracy'][0] - row['accuracy'][1]
+        if accuracy_drop > thresholds['max_accuracy_drop']:
+            row['reasons'].append(f"accuracy -{accuracy_drop:.1f}pp")
+
+        if before['times'] and after['times']:
+            row['p50'] = (np.percentile(before['times'], 50), np.percentile(after['times'], 50))
+            row['p95'] = (np.percentile(before['times'], 95), np.percentile(after['times'], 95))
+            change, low, high = bootstrap_change_ci(before['times'], after['times'], 50)
+            row['p50_change'], row['p50_ci'] = change, (low, high)
+            change, low, high = bootstrap_change_ci(before['times'], after['times'], 95)
+            row['p95_change'], row['p95_ci'] = change, (low, high)
+            row['p_value'] = mann_whitney_greater(after['times'], before['times'])
+            if min(row['trials']) >= MIN_TRIALS:
+                if row['p_value'] < thresholds['alpha'] and row['p50_change'] > thresholds['max_p50_increase']:
+                    row['reasons'].append(f"p50 +{row['p50_change']:.0%}")
+                # Tail-only slowdowns barely move the ranks, so the p95 stands on its own interval
+                if row['p95_ci'][0] > thresholds['max_p95_increase']:
+                    row['reasons'].append(f"p95 +{row['p95_change']:.0%}")
+        rows.append(row)
+    return sorted(rows, key=lambda r: (not r['reasons'], r['unit'][0], quant_sort_key(r['unit'][1]), r['unit'][2:]))
+
+def compare_scores(baseline: Dict, current: Dict) -> Dict[Tuple[str, str], Dict]:
+    """Per (model, quant): queries compared, queries whose score vector changed, largest absolute difference."""
+    changes = defaultdict(lambda: {'queries': 0, 'changed': 0, 'max_diff': 0.0})
+    for key in baseline.keys() & current.keys():
+        entry = changes[key[:2]]
+        entry['queries'] += 1
+        if baseline[key] == current[key]:
+            continue
+        before, after = np.array(parse_scores(baseline[key])), np.array(parse_scores(current[key]))
+        if before.shape == after.shape and np.array_equal(before, after, equal_nan=True):
+            continue  # Same values, different formatting
+        entry['changed'] += 1
+        entry['max_diff'] = max(entry['max_diff'], float(np.nanmax(np.abs(before - after)))
+                                if before.shape == after.shape else float('inf'))
+    return dict(changes)
+
+def format_ms(seconds) -> str:
+    return f"{seconds * 1000:.0f}ms"
+
+def unit_label(unit: Tuple) -> str:
+    return " / ".join(unit)
+
+def generate_regression_report(name: str, rows: List[Dict], score_changes: Dict, unmatched: Dict,
+                               thresholds: Dict) -> str:
+    regressions = [r for r in rows if r['reasons']]
+    report = f"""# Reranking Models - Regression Report
+
+**Baseline:** {name}
+**Compared:** {datetime.now().strftime('%Y-%m-%d %H:%M')}
+**Thresholds:** p50 +{thresholds['max_p50_increase']:.0%} (Mann-Whitney p < {thresholds['alpha']}), p95 +{thresholds['max_p95_increase']:.0%} (95% CI lower bound), accuracy -{thresholds['max_accuracy_drop']:g}pp
+**Result:** {"❌ " + str(len(regressions)) + " regression(s)" if regressions else "✅ no regressions"}
+
+## Latency and Accuracy
+
+| Unit | Trials | p50 | p50 Change (95% CI) | p95 | p95 Change (95% CI) | p-value | Accuracy | Status |
+|------|--------|-----|---------------------|-----|---------------------|---------|----------|--------|
+"""
+    for r in rows:
+        if r['p50'] is not None:
+            p50 = f"{format_ms(r['p50'][0])} → {format_ms(r['p50'][1])}"
+            p50_change = f"{r['p50_change']:+.1%} ({r['p50_ci'][0]:+.1%}, {r['p50_ci'][1]:+.1%})"
+            p95 = f"{format_ms(r['p95'][0])} → {format_ms(r['p95'][1])}"
+            p95_change = f"{r['p95_change']:+.1%} ({r['p95_ci'][0]:+.1%}, {r['p95_ci'][1]:+.1%})"
+            p_value = f"{r['p_value']:.3f}"
+        else:
+            p50 = p50_change = p95 = p95_change = p_value = "-"
+        accuracy = f"{r['accuracy'][0]:.0f}% → {r['accuracy'][1]:.0f}%"
+        status = "❌ " + ", ".join(r['reasons']) if r['reasons'] else "✓"
+        report += (f"| {unit_label(r['unit'])} | {r['trials'][0]}/{r['trials'][1]} | {p50} | {p50_change} | {p95} | "
+                   f"{p95_change} | {p_value} | {accuracy} | {status} |\n")
+
+    changed = {key: c for key, c in score_changes.items() if c['changed']}
+    report += "\n## Score Vectors\n\n"
+    if not score_changes:
+        report += "No queries with scores_by_index in both runs.\n"
+    elif not changed:
+        report += f"All {sum(c['queries'] for c in score_changes.values())} matched queries returned identical scores.\n"
+    else:
+        report += "| Model | Quant | Changed Queries | Max Abs Difference |\n"
+        report += "|-------|-------|-----------------|--------------------|\n"
+        for (model, quant), c in sorted(changed.items(), key=lambda x: (x[0][0], quant_sort_key(x[0][1]))):
+            report += f"| {model} | {quant} | {c['changed']}/{c['queries']} | {c['max_diff']:.6f} |\n"
+
+    for side, keys in unmatched.items():
+        if keys:
+            report += f"\n## Only in {side} ({len(keys)} groups)\n\n"
+            for key in sorted(keys)[:20]:
+                report += f"- {unit_label(key)}\n"
+            if len(keys) > 20:
+                report += f"- ... and {len(keys) - 20} more\n"
+
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(description="Save sweep results as baselines and check new runs for regressions.")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    save = commands.add_parser('save', help="Store result files as a named baseline")
+    save.add_argument('name')
+    save.add_argument('files', nargs='*', default=RESULT_FILES)
+
+    commands.add_parser('list', help="List stored baselines")
+
+    compare = commands.add_parser('compare', help="Compare result files with a baseline")
+    compare.add_argument('name')
+    compare.add_argument('files', nargs='*', default=RESULT_FILES)
+    compare.add_argument('--by', choices=['model', 'group'], default='model',
+                         help="Compare latency per model and quant, or per (model, quant, domain, language)")
+    compare.add_argument('--max-p50-increase', type=float, default=MAX_P50_INCREASE)
+    compare.add_argument('--max-p95-increase', type=float, default=MAX_P95_INCREASE)
+    compare.add_argument('--max-accuracy-drop', type=float, default=MAX_ACCURACY_DROP)
+    compare.add_argument('--alpha', type=float, default=ALPHA)
+    compare.add_argument('--fail-on-score-change', action='store_true', default=FAIL_ON_SCORE_CHANGE)
+    args = parser.parse_args()
+
+    if args.command == 'save':
+        target = save_baseline(args.name, args.files)
+        print(f"✓ Baseline {args.name} saved to {target}")
+        return
+
+    if args.command == 'list':
+        for metadata_file in sorted(BASELINE_DIR.glob("*/baseline.json")):
+            with open(metadata_file) as f:
+                metadata = json.load(f)
+            print(f"  {metadata_file.parent.name:<24} {metadata['created'][:16]}  "
+                  f"{', '.join(metadata['files'])}  {metadata.get('server_version') or ''}")
+        return
+
+    thresholds = {key: getattr(args, key) for key in ['max_p50_increase', 'max_p95_increase', 'max_accuracy_drop', 'alpha']}
+    baseline_groups, baseline_scores = load_run(baseline_files(args.name))
+    current_groups, current_scores = load_run(args.files)
+    if not current_groups:
+        print(f"✗ No results in {', '.join(args.files)}")
+        sys.exit(2)
+
+    rows = compare_latency_and_accuracy(baseline_groups, current_groups, args.by == 'group', thresholds)
+    score_changes = compare_scores(baseline_scores, current_scores)
+    unmatched = {
+        'baseline': baseline_groups.keys() - current_groups.keys(),
+        'current run': current_groups.keys() - baseline_groups.keys()
+    }
+    with open(REPORT_FILE, 'w', encoding='utf-8') as f:
+        f.write(generate_regression_report(args.name, rows, score_changes, unmatched, thresholds))
+
+    regressions = [r for r in rows if r['reasons']]
+    score_drift = sum(c['changed'] for c in score_changes.values())
+    print(f"Compared {len(rows)} units against baseline {args.name}; "
+          f"{score_drift} queries with changed scores")
+    for r in regressions:
+        print(f"  ❌ {unit_label(r['unit'])}: {', '.join(r['reasons'])}")
+    print(f"✓ {REPORT_FILE}")
+
+    if regressions or (args.fail_on_score_change and score_drift):
+        sys.exit(1)
+    print("✅ No regressions")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+Replay a production rerank trace against llama.cpp or Ollama.
+
+Reads a JSONL trace one line at a time, one request per line:
+
+    {"timestamp": 1731580479.12, "query": "...", "documents": ["...", ...], "expected_index": 2}
+
+`timestamp` is epoch seconds or an ISO-8601 string; `expected_index` is
+optional. Requests are sent open-loop at their original inter-arrival gaps
+divided by --speedup, so a slow backend builds up a backlog instead of
+slowing the replay down. Reports latency percentiles (from the scheduled send
+time, so queueing is included), backlog growth and per-window throughput.
+
+Usage:
+    python replay_trace.py trace.jsonl --backend llamacpp --speedup 2
+    python replay_trace.py trace.jsonl --backend ollama --model bge-reranker-v2-m3-Q4_K_M:latest
+"""
+
+import argparse
+import csv
+import json
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import requests
+
+# --- Configuration ---
+LLAMACPP_URL = "http://localhost:8080/rerank"
+OLLAMA_URL = "http://localhost:11434/api/rerank"
+REQUEST_TIMEOUT = 120
+MAX_CONCURRENCY = 32  # Client-side cap on in-flight requests
+WINDOW_SECONDS = 10  # Throughput and backlog reporting window
+
+def parse_timestamp(value) -> float:
+    if isinstance(value, (int, float)):
+        return float(value)
+    return datetime.fromisoformat(value).timestamp()
+
+def iter_trace(path):
+    """Yield trace records lazily, skipping blank lines."""
+    with open(path, 'r', encoding='utf-8') as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            record['timestamp'] = parse_timestamp(record['timestamp'])
+            record['line'] = line_number
+            yield record
+
+def send_request(backend, model, query, documents):
+    """Send one rerank request and return the results sorted by relevance."""
+    payload = {"query": query, "documents": documents}
+    if backend == 'ollama':
+        payload['model'] = model
+        url = OLLAMA_URL
+    else:
+        url = LLAMACPP_URL
+
+    response = requests.post(url, json=payload, timeout=REQUEST_TIMEOUT)
+    response.raise_for_status()
+    results = response.json()['results']
+    return sorted(results, key=lambda x: x['relevance_score'], reverse=True)
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return None
+    return sorted_values[min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))]
+
+class TraceReplayer:
+    """Open-loop replayer that tracks latency, backlog and throughput."""
+
+    def __init__(self, backend, model=None, speedup=1.0, max_concurrency=MAX_CONCURRENCY,
+                 window_seconds=WINDOW_SECONDS):
+        self.backend = backend
+        self.model = model
+        self.speedup = speedup
+        self.window_seconds = window_seconds
+        self.executor = ThreadPoolExecutor(max_workers=max_concurrency)
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.results = []
+        self.backlog_samples = []  # (replay_time, in_flight at send time)
+        self.max_schedule_lag = 0.0
+        self.wall_start = None
+
+    def _run_one(self, record, scheduled_at):
+        service_start = time.perf_counter()
+        result = {
+            'line': record['line'],
+            'scheduled_offset_seconds': round(scheduled_at - self.wall_start, 4),
+            'latency_seconds': None,
+            'service_seconds': None,
+            'num_documents': len(record['documents']),
+            'success': False,
+            'correct_answer': None,
+            'error': None
+        }
+        try:
+            sorted_results = send_request(self.backend, self.model, record['query'], record['documents'])
+            finished = time.perf_counter()
+            result['success'] = True
+            result['service_seconds'] = round(finished - service_start, 4)
+            result['latency_seconds'] = round(finished - scheduled_at, 4)
+            if record.get('expected_index') is not None and sorted_results:
+                result['correct_answer'] = sorted_results[0]['index'] == record['expected_index']
+        except Exception as e:
+            result['error'] = str(e)
+        finally:
+            result['completed_offset_seconds'] = round(time.perf_counter() - self.wall_start, 4)
+            with self.lock:
+                self.in_flight -= 1
+                self.results.append(result)
+
+    def replay(self, records):
+        """Send every record at its scaled arrival time."""
+        trace_start = None
+        self.wall_start = time.perf_counter()
+        for record in records:
+            if trace_start is None:
+                trace_start = record['timestamp']
+            scheduled_at = self.wall_start + (record['timestamp'] - trace_start) / self.speedup
+            delay = scheduled_at - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                self.max_schedule_lag = max(self.max_schedule_lag, -delay)
+
+            with self.lock:
+                self.in_flight += 1
+                self.backlog_samples.append((scheduled_at - self.wall_start, self.in_flight))
+            self.executor.submit(self._run_one, record, scheduled_at)
+
+        self.executor.shutdown(wait=True)
+        return self.results
+
+    def summary(self):
+        """Latency percentiles, backlog growth and per-window throughput."""
+        successful = [r for r in self.results if r['success']]
+        latencies = sorted(r['latency_seconds'] for r in successful)
+        service = sorted(r['service_seconds'] for r in successful)
+
+        windows = defaultdict(lambda: {'completed': 0, 'max_backlog': 0})
+        for r in successful:
+            windows[int(r['completed_offset_seconds'] // self.window_seconds)]['completed'] += 1
+        for offset, backlog in self.backlog_samples:
+            w = windows[int(offset // self.window_seconds)]
+            w['max_backlog'] = max(w['max_backlog'], backlog)
+
+        labeled = [r for r in successful if r['correct_answer'] is not None]
+        return {
+            'requests': len(self.results),
+            'successful': len(successful),
+            'failed': len(self.results) - len(successful),
+            'accuracy': (100 * sum(r['correct_answer'] for r in labeled) / len(labeled)) if labeled else None,
+            'latency': {p: percentile(latencies, p) for p in [50, 90, 95, 99]},
+            'service': {p: percentile(service, p) for p in [50, 90, 95, 99]},
+            'max_backlog': max((b for _, b in self.backlog_samples), default=0),
+            'max_schedule_lag_seconds': self.max_schedule_lag,
+            'windows': dict(sorted(windows.items()))
+        }
+
+def save_to_csv(results, filename):
+    """Save per-request replay results to CSV file."""
+    with open(filename, 'w', newline='', encoding='utf-8') as csvfile:
+        fieldnames = [
+            'line',
+            'scheduled_offset_seconds',
+            'completed_offset_seconds',
+            'latency_seconds',
+            'service_seconds',
+            'num_documents',
+            'success',
+            'correct_answer',
+            'error'
+        ]
+
+        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
+        writer.writeheader()
+        writer.writerows(sorted(results, key=lambda r: r['line']))
+
+    print(f"\n✓ Results saved to {filename}")
+
+def format_ms(seconds):
+    return f"{seconds * 1000:.1f}ms" if seconds is not None else "-"
+
+def print_summary(summary, window_seconds):
+    print("\n" + "=" * 80)
+    print("TRACE REPLAY SUMMARY")
+    print("=" * 80)
+    print(f"Requests: {summary['requests']} ({summary['successful']} ok, {summary['failed']} failed)")
+    if summary['accuracy'] is not None:
+        print(f"Accuracy (labeled requests): {summary['accuracy']:.1f}%")
+    print(f"Max backlog (in flight): {summary['max_backlog']}")
+    print(f"Max client schedule lag: {format_ms(summary['max_schedule_lag_seconds'])}")
+
+    print(f"\n{'Percentile':<12} {'Latency':>12} {'Service':>12}")
+    for p in [50, 90, 95, 99]:
+        print(f"p{p:<11} {format_ms(summary['latency'][p]):>12} {format_ms(summary['service'][p]):>12}")
+
+    print(f"\n{'Window':<16} {'Throughput':>14} {'Max backlog':>12}")
+    for window, w in summary['windows'].items():
+        start = window * window_seconds
+        print(f"{start:>6}-{start + window_seconds:<6}s {w['completed'] / window_seconds:>10.2f} req/s {w['max_backlog']:>12}")
+
+def positive_float(value: str) -> float:
+    """argparse type for factors and durations that are divided by."""
+    number = float(value)
+    if not number > 0:
+        raise argparse.ArgumentTypeError(f"must be greater than 0, got {value}")
+    return number
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a JSONL rerank trace with time scaling.")
+    parser.add_argument('trace', help="JSONL trace file")
+    parser.add_argument('--backend', choices=['llamacpp', 'ollama'], default='llamacpp')
+    parser.add_argument('--model', help="Model name (required for Ollama)")
+    parser.add_argument('--speedup', type=positive_float, default=1.0, help="Divide inter-arrival gaps by this factor")
+    parser.add_argument('--max-concurrency', type=int, default=MAX_CONCURRENCY)
+    parser.add_argument('--window', type=positive_float, default=WINDOW_SECONDS, help="Reporting window in seconds")
+    parser.add_argument('--output', default=f"trace_replay_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv")
+    args = parser.parse_args()
+
+    if args.backend == 'ollama' and not args.model:
+        parser.error("--model is required for the Ollama backend")
+
+    print(f"Replaying {args.trace} against {args.backend} at {args.speedup}x speed")
+    replayer = TraceReplayer(args.backend, args.model, args.speedup, args.max_concurrency, args.window)
+    results = replayer.replay(iter_trace(args.trace))
+
+    save_to_csv(results, args.output)
+    print_summary(replayer.summary(), args.window)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Client-side micro-batcher for /rerank.
+
+Concurrent callers that rerank against the same query within a short window
+are merged into a single /rerank call. Repeated documents are sent once, and
+the scores are split back to each caller in the same shape test_reranking()
+returns: results sorted by relevance with indexes into the caller's own
+document list.
+"""
+
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, List
+
+from test_all_models import test_reranking
+
+DEFAULT_WINDOW_MS = 5
+MAX_BATCH_DOCUMENTS = 64  # Flush early once a merged call reaches this size
+MAX_IN_FLIGHT = 4  # Concurrent /rerank calls (one per distinct query batch)
+
+class _PendingRequest:
+    __slots__ = ('documents', 'future', 'enqueued_at')
+
+    def __init__(self, documents, future):
+        self.documents = documents
+        self.future = future
+        self.enqueued_at = time.perf_counter()
+
+class _PendingBatch:
+    __slots__ = ('requests', 'unique_documents', 'deadline')
+
+    def __init__(self, deadline):
+        self.requests = []
+        self.unique_documents = {}
+        self.deadline = deadline
+
+class RerankBatcher:
+    """Coalesce same-query rerank requests arriving within a time window."""
+
+    def __init__(self,
+                 rerank_fn: Callable = test_reranking,
+                 window_ms: float = DEFAULT_WINDOW_MS,
+                 max_documents: int = MAX_BATCH_DOCUMENTS,
+                 max_in_flight: int = MAX_IN_FLIGHT):
+        self.rerank_fn = rerank_fn
+        self.window = window_ms / 1000
+        self.max_documents = max_documents
+        self._pending: Dict[str, _PendingBatch] = {}
+        self._condition = threading.Condition()
+        self._closed = False
+        self._executor = ThreadPoolExecutor(max_workers=max_in_flight)
+        self._dispatcher = threading.Thread(target=self._dispatch_loop, daemon=True)
+        self.stats = {
+            'requests': 0,
+            'server_calls': 0,
+            'documents_requested': 0,
+            'documents_sent': 0,
+            'queue_wait_seconds': 0.0
+        }
+        self._dispatcher.start()
+
+    def submit(self, query: str, documents: List[str]) -> Future:
+        """Queue a rerank request. The future resolves to (sorted_results, elapsed_time)."""
+        future = Future()
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("RerankBatcher is closed")
+            batch = self._pending.get(query)
+            if batch is None:
+                batch = self._pending[query] = _PendingBatch(time.perf_counter() + self.window)
+            batch.requests.append(_PendingRequest(documents, future))
+            for doc in documents:
+                batch.unique_documents.setdefault(doc, len(batch.unique_documents))
+            self.stats['requests'] += 1
+            self.stats['documents_requested'] += len(documents)
+            if len(batch.unique_documents) >= self.max_documents:
+                batch.deadline = 0  # Flush on the next dispatcher pass
+            self._condition.notify()
+        return future
+
+    def rerank(self, query: str, documents: List[str]):
+        """Blocking call with the same return shape as test_reranking()."""
+        return self.submit(query, documents).result()
+
+    def close(self):
+        """Flush everything still queued and stop the dispatcher."""
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+        self._dispatcher.join()
+        self._executor.shutdown(wait=True)
+
+    def _dispatch_loop(self):
+        while True:
+            with self._condition:
+                while True:
+                    if not self._pending:
+                        if self._closed:
+                            return
+                        self._condition.wait()
+                        continue
+                    query, batch = min(self._pending.items(), key=lambda item: item[1].deadline)
+                    remaining = batch.deadline - time.perf_counter()
+                    if remaining <= 0 or self._closed:
+                        del self._pending[query]
+                        break
+                    self._condition.wait(remaining)
+            self._executor.submit(self._send, query, batch)
+
+    def _send(self, query, batch):
+        merged_documents = list(batch.unique_documents)
+        sent_at = time.perf_counter()
+        with self._condition:
+            self.stats['server_calls'] += 1
+            self.stats['documents_sent'] += len(merged_documents)
+            self.stats['queue_wait_seconds'] += sum(sent_at - r.enqueued_at for r in batch.requests)
+
+        try:
+            sorted_results, _ = self.rerank_fn(query, merged_documents)
+            merged_scores = {res['index']: res['relevance_score'] for res in sorted_results}
+            finished_at = time.perf_counter()
+            for request in batch.requests:
+                caller_results = [
+                    {'index': i, 'relevance_score': merged_scores[batch.unique_documents[doc]]}
+                    for i, doc in enumerate(request.documents)
+                ]
+                caller_results.sort(key=lambda x: x['relevance_score'], reverse=True)
+                # Elapsed time includes the time spent waiting in the batch window
+                request.future.set_result((caller_results, finished_at - request.enqueued_at))
+        except Exception as e:
+            # Includes a response missing some documents; no caller may be left waiting
+            for request in batch.requests:
+                if not request.future.done():
+                    request.future.set_exception(e)
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Compact result rows.
+
+Runners used to build an 18-25 key dict per query and copy it again when
+writing CSV. record_type() creates a class with one __slots__ entry per CSV
+column instead: no per-row dict, and write_records() streams the slots
+straight into csv.writer without building intermediate dicts.
+
+Records keep dict-style access (result['top_score'], result.get(...),
+'key' in result), so code written against the old dicts keeps working.
+Keys outside the declared columns (a benchmark's 'backend' tag, say) go to a
+small side dict that is only created when used.
+"""
+
+import csv
+from operator import attrgetter
+from typing import Dict, Iterable, Sequence
+
+class ResultRecord:
+    """Base class for slotted result rows; create subclasses with record_type()."""
+
+    __slots__ = ('_extra',)
+    FIELDS = ()
+    DEFAULTS = {}
+    _FIELD_SET = frozenset()
+
+    def __init__(self, **values):
+        defaults = self.DEFAULTS
+        for field in self.FIELDS:
+            setattr(self, field, defaults.get(field))
+        self._extra = None
+        for key, value in values.items():
+            self[key] = value
+
+    def __getitem__(self, key):
+        if key in self._FIELD_SET:
+            return getattr(self, key)
+        if self._extra is not None and key in self._extra:
+            return self._extra[key]
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        if key in self._FIELD_SET:
+            setattr(self, key, value)
+        else:
+            if self._extra is None:
+                self._extra = {}
+            self._extra[key] = value
+
+    def __contains__(self, key):
+        return key in self._FIELD_SET or (self._extra is not None and key in self._extra)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def keys(self):
+        return list(self.FIELDS) + list(self._extra or ())
+
+    def items(self):
+        return [(key, self[key]) for key in self.keys()]
+
+    def as_dict(self) -> Dict:
+        return dict(self.items())
+
+    # Writers that still use csv.DictWriter call result.copy(), as with dicts
+    copy = as_dict
+
+    def __repr__(self):
+        return f"{type(self).__name__}({', '.join(f'{k}={v!r}' for k, v in self.items())})"
+
+def record_type(name: str, fields: Sequence[str], defaults: Dict = None):
+    """Create a slotted record class with the given columns (in CSV order)."""
+    return type(name, (ResultRecord,), {
+        '__slots__': tuple(fields),
+        'FIELDS': tuple(fields),
+        'DEFAULTS': dict(defaults or {}),
+        '_FIELD_SET': frozenset(fields)
+    })
+
+def write_records(filename, records: Iterable[ResultRecord], fields: Sequence[str], encoding=None) -> None:
+    """Write records to CSV straight from their slots.
+
+    csv.writer renders None as an empty cell and lists (all_scores) with
+    str(), the same output DictWriter gave for the old dicts.
+    """
+    row = attrgetter(*fields)
+    with open(filename, 'w', newline='', encoding=encoding) as csvfile:
+        writer = csv.writer(csvfile)
+        writer.writerow(fields)
+        writer.writerows(row(record) for record in records)
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Pair-level (query, document) score cache in front of /rerank.
+
+Cross-encoder scores depend only on the model and the (query, document) pair,
+so a score computed once can be reused for any later request containing the
+same pair. Only cache-miss documents are sent to the server; cached scores are
+merged back and the combined list is returned in ranked order, in the same
+shape test_reranking() returns.
+"""
+
+import hashlib
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Callable, List
+
+from test_all_models import test_reranking
+
+DEFAULT_MAX_ENTRIES = 100_000  # ~100 bytes per entry
+DEFAULT_TTL_SECONDS = 3600
+
+def normalize_text(text: str) -> str:
+    """Unicode-normalize and collapse whitespace.
+
+    Case is preserved because cased models score case differences.
+    """
+    return " ".join(unicodedata.normalize('NFKC', text).split())
+
+def text_hash(text: str) -> bytes:
+    return hashlib.blake2b(normalize_text(text).encode('utf-8'), digest_size=16).digest()
+
+class RerankScoreCache:
+    """Bounded LRU + TTL cache of relevance scores, wrapping a rerank function."""
+
+    def __init__(self,
+                 model_id: str,
+                 rerank_fn: Callable = test_reranking,
+                 max_entries: int = DEFAULT_MAX_ENTRIES,
+                 ttl_seconds: float = DEFAULT_TTL_SECONDS,
+                 clock: Callable[[], float] = time.monotonic):
+        self.model_id = model_id
+        self.rerank_fn = rerank_fn
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.clock = clock
+        self._model_prefix = model_id.encode('utf-8') + b'\0'
+        self._entries: OrderedDict = OrderedDict()  # key -> (score, expires_at)
+        self._lock = threading.Lock()
+        # Running estimate of server time per document, used to value hits
+        self._seconds_per_document = None
+        self.stats = {
+            'hits': 0,
+            'misses': 0,
+            'expired': 0,
+            'evictions': 0,
+            'server_calls': 0,
+            'latency_saved_seconds': 0.0
+        }
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.stats['hits'] + self.stats['misses']
+        return self.stats['hits'] / lookups if lookups else 0.0
+
+    def _key(self, query_hash: bytes, document: str) -> bytes:
+        return self._model_prefix + query_hash + text_hash(document)
+
+    def _lookup(self, key, now):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        score, expires_at = entry
+        if expires_at <= now:
+            del self._entries[key]
+            self.stats['expired'] += 1
+            return None
+        self._entries.move_to_end(key)
+        return score
+
+    def _store(self, key, score, now):
+        self._entries[key] = (score, now + self.ttl_seconds)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.stats['evictions'] += 1
+
+    def rerank(self, query: str, documents: List[str]):
+        """Rerank with cached scores where available. Returns (sorted_results, elapsed_time)."""
+        start_time = time.perf_counter()
+        query_hash = text_hash(query)
+        keys = [self._key(query_hash, doc) for doc in documents]
+        scores = [None] * len(documents)
+
+        with self._lock:
+            now = self.clock()
+            for i, key in enumerate(keys):
+                scores[i] = self._lookup(key, now)
+
+        # Send each distinct missing document once
+        miss_positions = {}
+        for i, score in enumerate(scores):
+            if score is None:
+                miss_positions.setdefault(keys[i], []).append(i)
+        hits = len(documents) - sum(len(p) for p in miss_positions.values())
+
+        if miss_positions:
+            miss_keys = list(miss_positions)
+            miss_documents = [documents[miss_positions[key][0]] for key in miss_keys]
+            server_results, server_time = self.rerank_fn(query, miss_documents)
+            with self._lock:
+                now = self.clock()
+                for res in server_results:
+                    key = miss_keys[res['index']]
+                    for i in miss_positions[key]:
+                        scores[i] = res['relevance_score']
+                    self._store(key, res['relevance_score'], now)
+                per_document = server_time / len(miss_documents)
+                self._seconds_per_document = (per_document if self._seconds_per_document is None
+                                              else 0.8 * self._seconds_per_document + 0.2 * per_document)
+                self.stats['server_calls'] += 1
+
+        with self._lock:
+            self.stats['hits'] += hits
+            self.stats['misses'] += len(documents) - hits
+            if self._seconds_per_document is not None:
+                self.stats['latency_saved_seconds'] += hits * self._seconds_per_document
+
+        results = [{'index': i, 'relevance_score': score} for i, score in enumerate(scores)]
+        results.sort(key=lambda x: x['relevance_score'], reverse=True)
+        return results, time.perf_counter() - start_time
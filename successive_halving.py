@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Successive halving for model sweeps.
+
+Every model first gets a small number of queries. After each round, models
+below an absolute accuracy or latency bound are dropped, the rest are ranked
+by accuracy (then latency) and only the top 1/eta, plus close contenders
+within a margin of the cut-off, get the next, larger slice of queries. The
+last round runs the remaining queries, so surviving models end up with the
+full query set.
+"""
+
+import math
+import random
+from typing import Dict, List, Tuple
+
+# --- Configuration ---
+HALVING_MIN_QUERIES = 3  # Queries every model gets before the first cut
+HALVING_ETA = 2  # Keep 1/eta of the models and multiply the query budget by eta each round
+HALVING_MIN_ACCURACY = 40.0  # % - below this a model is dropped regardless of rank
+HALVING_MAX_LATENCY = 2.0  # Seconds - average above this drops a model regardless of rank
+HALVING_ACCURACY_MARGIN = 10.0  # % - models this close to the cut-off accuracy survive too
+HALVING_SEED = 42
+
+def halving_rungs(num_queries: int, min_queries: int = HALVING_MIN_QUERIES, eta: int = HALVING_ETA) -> List[int]:
+    """Cumulative number of queries each surviving model has run after each round."""
+    rungs = []
+    budget = min_queries
+    while budget < num_queries:
+        rungs.append(budget)
+        budget *= eta
+    rungs.append(num_queries)
+    return rungs
+
+def query_order(queries: List, seed: int = HALVING_SEED) -> List:
+    """Shuffle queries (seeded) so early rounds mix domains and languages."""
+    ordered = list(queries)
+    random.Random(seed).shuffle(ordered)
+    return ordered
+
+def model_score(results: List[Dict]) -> Tuple[float, float]:
+    """Accuracy (%) and average latency of a model's results so far."""
+    successful = [r for r in results if r['success']]
+    if not successful:
+        return 0.0, float('inf')
+    accuracy = 100 * sum(1 for r in successful if r['correct_answer']) / len(results)
+    avg_time = sum(r['response_time_seconds'] for r in successful) / len(successful)
+    return accuracy, avg_time
+
+def select_survivors(results_by_model: Dict[str, List[Dict]],
+                     models: List[str],
+                     round_number: int,
+                     eta: int = HALVING_ETA,
+                     min_accuracy: float = HALVING_MIN_ACCURACY,
+                     max_latency: float = HALVING_MAX_LATENCY,
+                     accuracy_margin: float = HALVING_ACCURACY_MARGIN) -> Tuple[List[str], Dict[str, str]]:
+    """Decide which models continue. Returns (survivors, {eliminated model: reason})."""
+    scores = {m: model_score(results_by_model.get(m, [])) for m in models}
+    eliminated = {}
+
+    for model in models:
+        accuracy, avg_time = scores[model]
+        if accuracy < min_accuracy:
+            eliminated[model] = f"round {round_number}: accuracy {accuracy:.0f}% < {min_accuracy:.0f}%"
+        elif avg_time > max_latency:
+            eliminated[model] = f"round {round_number}: avg latency {avg_time:.3f}s > {max_latency:.3f}s"
+
+    contenders = sorted((m for m in models if m not in eliminated),
+                        key=lambda m: (-scores[m][0], scores[m][1]))
+    keep = max(1, math.ceil(len(models) / eta))
+    if len(contenders) > keep:
+        cutoff_accuracy = scores[contenders[keep - 1]][0]
+        for model in contenders[keep:]:
+            accuracy, _ = scores[model]
+            if accuracy < cutoff_accuracy - accuracy_margin:
+                eliminated[model] = (f"round {round_number}: accuracy {accuracy:.0f}% "
+                                     f"more than {accuracy_margin:.0f} points below cut-off {cutoff_accuracy:.0f}%")
+
+    survivors = [m for m in models if m not in eliminated]
+    return survivors, eliminated
+
+def mark_eliminated(results: List[Dict], reason: str) -> None:
+    """Flag a model's results as coming from an early-eliminated run."""
+    for result in results:
+        result['eliminated_early'] = True
+        result['elimination_reason'] = reason
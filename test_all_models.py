@@ -1,79 +1,131 @@
 import requests
 import json
+import os
 import subprocess
 import time
-import csv
 from pathlib import Path
 from datetime import datetime
+from memory_sampler import MemorySampler, memory_per_slot, samples_llama_server
+from tokenization import TokenCounter
+from degenerate_probe import probe_model
+from query_dataset import is_correct, load_queries
+from successive_halving import halving_rungs, mark_eliminated, query_order, select_survivors
+from result_records import record_type, write_records
 
 # --- Configuration ---
 SERVER_URL = "http://localhost:8080/rerank"
 MODEL_DIR = Path.home() / "Documents" / "reranking-models"
 TEST_QUERIES_FILE = "test_queries.csv"
+CORPUS_PATH = None  # Corpus directory (corpus_store.py) for query files that list doc_ids
 PORT = 8080
 TIMEOUT_SECONDS = 30  # Timeout for server startup
 REQUEST_TIMEOUT = 60  # Timeout for reranking request
+PROBE_ACTION = 'skip'  # 'skip' or 'flag' models failing the degenerate-output probe; None disables it
+SUCCESSIVE_HALVING = False  # Drop weak models early; see successive_halving.py for bounds
+# Command that serves the model; see record_replay.py to record or replay a run
+SERVER_COMMAND = ["llama-server"]
+
+# CSV columns in order; QueryResult keeps one slot per column
+RESULT_FIELDS = [
+    'model_name',
+    'model_size_mb',
+    'domain',
+    'query',
+    'correct_doc_index',
+    'success',
+    'response_time_seconds',
+    'top_score',
+    'top_document_index',
+    'top_document',
+    'correct_answer',
+    'rank_2_score',
+    'rank_3_score',
+    'rank_4_score',
+    'rank_5_score',
+    'all_scores',
+    'scores_by_index',
+    'prompt_tokens',
+    'tokens_per_second',
+    'peak_rss_mb',
+    'steady_rss_mb',
+    'rss_per_slot_mb',
+    'probe_reason',
+    'eliminated_early',
+    'elimination_reason',
+    'error',
+    'timestamp'
+]
+QueryResult = record_type('QueryResult', RESULT_FIELDS,
+                          {'success': False, 'correct_answer': False, 'eliminated_early': False})
 
 def load_test_queries():
-    """Load test queries from CSV file."""
-    queries = []
-    with open(TEST_QUERIES_FILE, 'r') as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            query_data = {
-                'domain': row['domain'],
-                'query': row['query'],
-                'documents': [row['doc1'], row['doc2'], row['doc3'], row['doc4'], row['doc5']],
-                'correct_doc_index': int(row['correct_doc_index'])
-            }
-            queries.append(query_data)
-    return queries
+    """Load test queries (CSV, JSONL or Parquet; see query_dataset.py)."""
+    return load_queries(TEST_QUERIES_FILE, CORPUS_PATH)
 
 def get_model_files():
     """Get all .gguf model files from the models directory."""
     return sorted(MODEL_DIR.glob("*.gguf"))
 
-def start_server(model_path):
-    """Start llama-server with the specified model."""
-    cmd = [
-        "llama-server",
+def start_server(model_path, extra_args=None, server_command=None, port=PORT, cpus=None):
+    """Start llama-server with the specified model and optional extra flags.
+
+    server_command overrides SERVER_COMMAND (e.g. another llama.cpp build);
+    cpus pins the server to those cores and, unless extra_args sets it,
+    uses one thread per core.
+    """
+    extra_args = list(extra_args or [])
+    cmd = list(server_command or SERVER_COMMAND) + [
         "-m", str(model_path),
-        "--port", str(PORT),
+        "--port", str(port),
         "--rerank"
-    ]
+    ] + extra_args
+    if cpus and not {"-t", "--threads"} & set(extra_args):
+        cmd += ["--threads", str(len(cpus))]
 
-    print(f"Starting server with model: {model_path.name}")
+    print(f"Starting server with model: {model_path.name}" + (f" on port {port}" if port != PORT else ""))
     process = subprocess.Popen(
         cmd,
         stdout=subprocess.PIPE,
         stderr=subprocess.PIPE,
-        text=True
+        text=True,
+        preexec_fn=(lambda: os.sched_setaffinity(0, cpus)) if cpus else None
     )
 
     return process
 
-def wait_for_server(timeout=TIMEOUT_SECONDS):
+def wait_for_server(timeout=TIMEOUT_SECONDS, poll_interval=1, port=PORT):
     """Wait for the server to be ready."""
     start_time = time.time()
     while time.time() - start_time < timeout:
         try:
             # Try to connect to the server (health check)
-            response = requests.get(f"http://localhost:{PORT}/health", timeout=2)
+            response = requests.get(f"http://localhost:{port}/health", timeout=2)
             if response.status_code == 200:
                 print("Server is ready!")
                 return True
         except requests.exceptions.RequestException:
             pass
-        time.sleep(1)
+        time.sleep(poll_interval)
 
     return False
 
-def test_reranking(query, documents):
+def get_total_slots(port=PORT):
+    """Get the number of parallel slots the server was started with."""
+    try:
+        response = requests.get(f"http://localhost:{port}/props", timeout=2)
+        response.raise_for_status()
+        return response.json().get('total_slots', 1)
+    except (requests.exceptions.RequestException, ValueError):
+        return 1
+
+def test_reranking(query, documents, extra_payload=None, url=SERVER_URL):
     """Test the reranking endpoint and return results."""
     payload = {
         "query": query,
         "documents": documents
     }
+    # Optional llama-server request options, e.g. cache_prompt or id_slot
+    payload.update(extra_payload or {})
 
     headers = {
         "Content-Type": "application/json"
@@ -81,7 +133,7 @@ def test_reranking(query, documents):
 
     start_time = time.time()
     response = requests.post(
-        SERVER_URL,
+        url,
         headers=headers,
         data=json.dumps(payload),
         timeout=REQUEST_TIMEOUT
@@ -109,35 +161,33 @@ def stop_server(process):
     # Give the port time to be released
     time.sleep(2)
 
-def test_model_with_query(model_path, query_data, process=None):
-    """Test a single model with a specific query."""
+def scores_by_index(sorted_results):
+    """Scores in document order, so runs of different models can be compared per document."""
+    scores = [None] * len(sorted_results)
+    for res in sorted_results:
+        scores[res['index']] = round(res['relevance_score'], 4)
+    return scores
+
+def test_model_with_query(model_path, query_data, process=None, token_counter=None, rerank_fn=test_reranking):
+    """Test a single model with a specific query.
+
+    rerank_fn defaults to the llama-server endpoint; see inprocess_backend.py.
+    """
     model_name = model_path.name
     correct_doc_index = query_data['correct_doc_index']
 
-    result = {
-        'model_name': model_name,
-        'model_size_mb': round(model_path.stat().st_size / (1024 * 1024), 2),
-        'domain': query_data['domain'],
-        'query': query_data['query'],
-        'correct_doc_index': correct_doc_index,
-        'success': False,
-        'error': None,
-        'response_time_seconds': None,
-        'top_score': None,
-        'top_document_index': None,
-        'top_document': None,
-        'correct_answer': False,
-        'rank_2_score': None,
-        'rank_3_score': None,
-        'rank_4_score': None,
-        'rank_5_score': None,
-        'all_scores': None,
-        'timestamp': datetime.now().isoformat()
-    }
+    result = QueryResult(
+        model_name=model_name,
+        model_size_mb=round(model_path.stat().st_size / (1024 * 1024), 2),
+        domain=query_data['domain'],
+        query=query_data['query'],
+        correct_doc_index=correct_doc_index,
+        timestamp=datetime.now().isoformat()
+    )
 
     try:
         # Test reranking
-        sorted_results, elapsed_time = test_reranking(query_data['query'], query_data['documents'])
+        sorted_results, elapsed_time = rerank_fn(query_data['query'], query_data['documents'])
 
         # Record results
         result['success'] = True
@@ -150,7 +200,7 @@ def test_model_with_query(model_path, query_data, process=None):
                 result['top_score'] = score
                 result['top_document_index'] = res['index']
                 result['top_document'] = query_data['documents'][res['index']]
-                result['correct_answer'] = (res['index'] == correct_doc_index)
+                result['correct_answer'] = is_correct(query_data, res['index'])
             elif i == 1:
                 result['rank_2_score'] = score
             elif i == 2:
@@ -161,6 +211,7 @@ def test_model_with_query(model_path, query_data, process=None):
                 result['rank_5_score'] = score
 
         result['all_scores'] = [round(r['relevance_score'], 4) for r in sorted_results]
+        result['scores_by_index'] = scores_by_index(sorted_results)
 
         correct_mark = "✓" if result['correct_answer'] else "✗"
         print(f"  {correct_mark} {query_data['domain']}: Score={result['top_score']}, Time={result['response_time_seconds']}s, Correct={result['correct_answer']}")
@@ -169,49 +220,113 @@ def test_model_with_query(model_path, query_data, process=None):
         result['error'] = str(e)
         print(f"  ✗ {query_data['domain']}: Error - {e}")
 
+    # Tokenized after the timed request so /tokenize never adds to latency; a
+    # failed count leaves the token columns empty instead of failing the query
+    if token_counter is not None and result['success']:
+        try:
+            prompt_tokens = token_counter.prompt_tokens(query_data['query'], query_data['documents'])
+            result['prompt_tokens'] = prompt_tokens
+            if elapsed_time > 0:
+                result['tokens_per_second'] = round(prompt_tokens / elapsed_time, 1)
+        except (requests.exceptions.RequestException, KeyError, ValueError) as e:
+            print(f"  ⚠️  Token count unavailable: {e}")
+
     return result
 
 def save_to_csv(results, filename='test_results.csv'):
     """Save results to CSV file."""
-    with open(filename, 'w', newline='') as csvfile:
-        fieldnames = [
-            'model_name',
-            'model_size_mb',
-            'domain',
-            'query',
-            'correct_doc_index',
-            'success',
-            'response_time_seconds',
-            'top_score',
-            'top_document_index',
-            'top_document',
-            'correct_answer',
-            'rank_2_score',
-            'rank_3_score',
-            'rank_4_score',
-            'rank_5_score',
-            'all_scores',
-            'error',
-            'timestamp'
-        ]
-
-        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-        writer.writeheader()
-
-        for result in results:
-            # Convert all_scores list to string for CSV
-            csv_result = result.copy()
-            if csv_result['all_scores']:
-                csv_result['all_scores'] = str(csv_result['all_scores'])
-            writer.writerow(csv_result)
-
+    write_records(filename, results, RESULT_FIELDS)
     print(f"\n✓ Results saved to {filename}")
 
+def failed_results(model_path, queries, error, probe_reason=None):
+    """Result rows for queries that were not run against the model."""
+    results = []
+    for query_data in queries:
+        results.append(QueryResult(
+            model_name=model_path.name,
+            model_size_mb=round(model_path.stat().st_size / (1024 * 1024), 2),
+            domain=query_data['domain'],
+            query=query_data['query'],
+            correct_doc_index=query_data['correct_doc_index'],
+            error=error,
+            probe_reason=probe_reason,
+            timestamp=datetime.now().isoformat()
+        ))
+    return results
+
+def run_model_queries(model_path, queries, sample_memory=True):
+    """Start a server for one model, run the given queries and stop it.
+
+    With sample_memory=False the RSS columns are left empty, for runs whose
+    memory was already measured on an earlier start of the same model.
+    """
+    process = None
+    sampler = None
+    total_slots = None
+    model_results = []
+    try:
+        # Start server once per model
+        process = start_server(model_path)
+        if sample_memory and samples_llama_server(SERVER_COMMAND):
+            sampler = MemorySampler(process.pid).start()
+
+        # Wait for server to be ready
+        if not wait_for_server():
+            print(f"✗ Server failed to start - skipping all queries for this model")
+            model_results = failed_results(model_path, queries, 'Server failed to start')
+            return model_results
+
+        # Catch models that load but return constant, NaN or tied scores
+        probe_reason = None
+        if PROBE_ACTION:
+            probe_reason, probe_detail = probe_model(test_reranking)
+            if probe_reason:
+                print(f"⚠ Pre-flight probe: {probe_reason} ({probe_detail})")
+                if PROBE_ACTION == 'skip':
+                    model_results = failed_results(model_path, queries,
+                                                   f"Degenerate output: {probe_reason}", probe_reason)
+                    return model_results
+
+        if sampler:
+            sampler.mark_loaded()
+        total_slots = get_total_slots()
+        token_counter = TokenCounter(f"http://localhost:{PORT}")
+
+        for query_idx, query_data in enumerate(queries, 1):
+            print(f"  [{query_idx}/{len(queries)}] Query: {query_data['domain']}")
+
+            result = test_model_with_query(model_path, query_data, process, token_counter)
+            result['probe_reason'] = probe_reason
+            model_results.append(result)
+
+    except Exception as e:
+        print(f"✗ Unexpected error: {e}")
+
+    finally:
+        if sampler:
+            # Memory figures are per server run, so attach them to every row,
+            # including rows of skipped or failed queries
+            memory = sampler.stop()
+            rss_per_slot = memory_per_slot(memory, total_slots)
+            print(f"  Memory: peak {memory['peak_rss_mb']} MB, steady {memory['steady_rss_mb']} MB, "
+                  f"{rss_per_slot} MB/slot ({total_slots or '?'} slots)")
+            for result in model_results:
+                result['peak_rss_mb'] = memory['peak_rss_mb']
+                result['steady_rss_mb'] = memory['steady_rss_mb']
+                result['rss_per_slot_mb'] = rss_per_slot
+        if process:
+            stop_server(process)
+
+    return model_results
+
 def main():
     """Main function to test all models with all queries."""
     print("=" * 80)
     print("COMPREHENSIVE RERANKING MODEL TESTING SUITE")
     print("=" * 80)
+    if not samples_llama_server(SERVER_COMMAND):
+        print(f"⚠️  SERVER_COMMAND does not start llama-server directly ({Path(SERVER_COMMAND[0]).name}) - "
+              f"memory columns are left empty")
 
     # Load test queries
     test_queries = load_test_queries()
@@ -226,60 +341,48 @@ def main():
     print(f"\nTotal tests to run: {total_tests} ({len(model_files)} models × {len(test_queries)} queries)")
     print("=" * 80)
 
-    # Test each model with all queries
+    # Test each model, in successive-halving rounds when enabled
     all_results = []
-    test_count = 0
-
-    for model_idx, model_path in enumerate(model_files, 1):
-        print(f"\n[Model {model_idx}/{len(model_files)}] Testing: {model_path.name}")
-        print("-" * 80)
-
-        process = None
-        try:
-            # Start server once per model
-            process = start_server(model_path)
-
-            # Wait for server to be ready
-            if not wait_for_server():
-                print(f"✗ Server failed to start - skipping all queries for this model")
-                for query_data in test_queries:
-                    result = {
-                        'model_name': model_path.name,
-                        'model_size_mb': round(model_path.stat().st_size / (1024 * 1024), 2),
-                        'domain': query_data['domain'],
-                        'query': query_data['query'],
-                        'correct_doc_index': query_data['correct_doc_index'],
-                        'success': False,
-                        'error': 'Server failed to start',
-                        'response_time_seconds': None,
-                        'top_score': None,
-                        'top_document_index': None,
-                        'top_document': None,
-                        'correct_answer': False,
-                        'rank_2_score': None,
-                        'rank_3_score': None,
-                        'rank_4_score': None,
-                        'rank_5_score': None,
-                        'all_scores': None,
-                        'timestamp': datetime.now().isoformat()
-                    }
-                    all_results.append(result)
-                continue
-
-            # Test all queries with this model
-            for query_idx, query_data in enumerate(test_queries, 1):
-                test_count += 1
-                print(f"  [{test_count}/{total_tests}] Query: {query_data['domain']}")
-
-                result = test_model_with_query(model_path, query_data, process)
-                all_results.append(result)
-
-        except Exception as e:
-            print(f"✗ Unexpected error: {e}")
-
-        finally:
-            if process:
-                stop_server(process)
+    results_by_model = {model_path.name: [] for model_path in model_files}
+    surviving = list(model_files)
+    if SUCCESSIVE_HALVING:
+        test_queries = query_order(test_queries)
+        rungs = halving_rungs(len(test_queries))
+        print(f"Successive halving: query budget per round {rungs}")
+    else:
+        rungs = [len(test_queries)]
+
+    round_start = 0
+    for round_number, round_end in enumerate(rungs, 1):
+        round_queries = test_queries[round_start:round_end]
+        if len(rungs) > 1:
+            print(f"\n=== Round {round_number}/{len(rungs)}: {len(surviving)} models × {len(round_queries)} queries ===")
+
+        # Every round restarts and reloads each surviving model, which costs part of
+        # what halving saves; memory is sampled on the first start only, so the
+        # steady/peak RSS keep one baseline per model
+        for model_idx, model_path in enumerate(surviving, 1):
+            print(f"\n[Model {model_idx}/{len(surviving)}] Testing: {model_path.name}")
+            print("-" * 80)
+            model_results = results_by_model[model_path.name]
+            round_results = run_model_queries(model_path, round_queries, sample_memory=not model_results)
+            if model_results:
+                for result in round_results:
+                    for column in ['peak_rss_mb', 'steady_rss_mb', 'rss_per_slot_mb']:
+                        result[column] = model_results[0][column]
+            model_results.extend(round_results)
+
+        if round_end < len(test_queries):
+            survivor_names, eliminated = select_survivors(
+                results_by_model, [m.name for m in surviving], round_number)
+            for model_name, reason in eliminated.items():
+                mark_eliminated(results_by_model[model_name], reason)
+                print(f"  ✂ Eliminated {model_name} ({reason})")
+            surviving = [m for m in surviving if m.name in survivor_names]
+        round_start = round_end
+
+    for model_path in model_files:
+        all_results.extend(results_by_model[model_path.name])
 
     # Save results
     print("\n" + "=" * 80)
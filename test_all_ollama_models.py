@@ -8,18 +8,50 @@ Results are saved to a comprehensive CSV file for analysis.
 
 import requests
 import json
-import csv
 import time
 from pathlib import Path
 from datetime import datetime
 import sys
 
+from query_dataset import is_correct, load_queries
+from successive_halving import halving_rungs, mark_eliminated, query_order, select_survivors
+from result_records import record_type, write_records
+
 # --- Configuration ---
 OLLAMA_URL = "http://localhost:11434/api/rerank"
 TEST_QUERIES_FILE = "test_queries.csv"
+CORPUS_PATH = None  # Corpus directory (corpus_store.py) for query files that list doc_ids
 REQUEST_TIMEOUT = 120  # Longer timeout for large models
+SUCCESSIVE_HALVING = False  # Drop weak models early; see successive_halving.py for bounds
 RESULTS_FILE = f"test_results_all_models_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
 
+# CSV columns in order; QueryResult keeps one slot per column
+RESULT_FIELDS = [
+    'model_name',
+    'domain',
+    'query',
+    'correct_doc_index',
+    'success',
+    'response_time_seconds',
+    'total_duration_ms',
+    'load_duration_ms',
+    'top_score',
+    'top_document_index',
+    'top_document',
+    'correct_answer',
+    'rank_2_score',
+    'rank_3_score',
+    'rank_4_score',
+    'rank_5_score',
+    'all_scores',
+    'eliminated_early',
+    'elimination_reason',
+    'error',
+    'timestamp'
+]
+QueryResult = record_type('QueryResult', RESULT_FIELDS,
+                          {'success': False, 'correct_answer': False, 'eliminated_early': False})
+
 # All reranking models to test (exactly matching your Ollama list)
 RERANKING_MODELS = [
     # BGE Models (3 base models x 3 quantizations = 9)
@@ -89,19 +121,8 @@ RERANKING_MODELS = [
 ]
 
 def load_test_queries():
-    """Load test queries from CSV file."""
-    queries = []
-    with open(TEST_QUERIES_FILE, 'r') as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            query_data = {
-                'domain': row['domain'],
-                'query': row['query'],
-                'documents': [row['doc1'], row['doc2'], row['doc3'], row['doc4'], row['doc5']],
-                'correct_doc_index': int(row['correct_doc_index'])
-            }
-            queries.append(query_data)
-    return queries
+    """Load test queries (CSV, JSONL or Parquet; see query_dataset.py)."""
+    return load_queries(TEST_QUERIES_FILE, CORPUS_PATH)
 
 def test_ollama_reranking(model, query, documents):
     """Test the Ollama reranking endpoint and return results."""
@@ -129,31 +150,24 @@ def test_ollama_reranking(model, query, documents):
 
     return result, elapsed_time
 
+def warm_up(model, query_data):
+    """Send one unmeasured request so the model load is not timed as a query."""
+    try:
+        test_ollama_reranking(model, query_data['query'], query_data['documents'])
+    except Exception as e:
+        print(f"  ⚠️  Warm-up failed: {e}")
+
 def test_query(model, query_data):
     """Test a single query."""
     correct_doc_index = query_data['correct_doc_index']
 
-    result = {
-        'model_name': model,
-        'domain': query_data['domain'],
-        'query': query_data['query'],
-        'correct_doc_index': correct_doc_index,
-        'success': False,
-        'error': None,
-        'response_time_seconds': None,
-        'total_duration_ms': None,
-        'load_duration_ms': None,
-        'top_score': None,
-        'top_document_index': None,
-        'top_document': None,
-        'correct_answer': False,
-        'rank_2_score': None,
-        'rank_3_score': None,
-        'rank_4_score': None,
-        'rank_5_score': None,
-        'all_scores': None,
-        'timestamp': datetime.now().isoformat()
-    }
+    result = QueryResult(
+        model_name=model,
+        domain=query_data['domain'],
+        query=query_data['query'],
+        correct_doc_index=correct_doc_index,
+        timestamp=datetime.now().isoformat()
+    )
 
     try:
         # Test reranking
@@ -179,7 +193,7 @@ def test_query(model, query_data):
                 result['top_score'] = score
                 result['top_document_index'] = res['index']
                 result['top_document'] = res.get('document', query_data['documents'][res['index']])
-                result['correct_answer'] = (res['index'] == correct_doc_index)
+                result['correct_answer'] = is_correct(query_data, res['index'])
             elif i == 1:
                 result['rank_2_score'] = score
             elif i == 2:
@@ -202,39 +216,7 @@ def test_query(model, query_data):
 
 def save_to_csv(results, filename):
     """Save results to CSV file."""
-    with open(filename, 'w', newline='') as csvfile:
-        fieldnames = [
-            'model_name',
-            'domain',
-            'query',
-            'correct_doc_index',
-            'success',
-            'response_time_seconds',
-            'total_duration_ms',
-            'load_duration_ms',
-            'top_score',
-            'top_document_index',
-            'top_document',
-            'correct_answer',
-            'rank_2_score',
-            'rank_3_score',
-            'rank_4_score',
-            'rank_5_score',
-            'all_scores',
-            'error',
-            'timestamp'
-        ]
-
-        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-        writer.writeheader()
-
-        for result in results:
-            # Convert all_scores list to string for CSV
-            csv_result = result.copy()
-            if csv_result['all_scores']:
-                csv_result['all_scores'] = str(csv_result['all_scores'])
-            writer.writerow(csv_result)
-
+    write_records(filename, results, RESULT_FIELDS)
     print(f"\n✓ Results saved to {filename}")
 
 def print_model_summary(model, results):
@@ -265,34 +247,72 @@ def main():
     print(f"Results will be saved to: {RESULTS_FILE}")
     print("=" * 100)
 
-    # Test all models
+    # Test all models, in successive-halving rounds when enabled
     all_results = []
     model_summaries = []
-
-    for model_idx, model in enumerate(RERANKING_MODELS, 1):
-        print(f"\n[{model_idx}/{len(RERANKING_MODELS)}] Testing Model: {model}")
-        print("-" * 100)
-
-        model_results = []
-        model_start_time = time.time()
-
-        for query_idx, query_data in enumerate(test_queries, 1):
-            result = test_query(model, query_data)
-            model_results.append(result)
-            all_results.append(result)
-
-            # Small delay between queries
-            if query_idx < len(test_queries):
-                time.sleep(0.2)
-
-        model_elapsed = time.time() - model_start_time
-
-        # Print model summary
-        print_model_summary(model, model_results)
-        print(f"  Total Time: {model_elapsed:.2f}s")
-
-        # Store summary
-        successful = [r for r in model_results if r['success']]
+    results_by_model = {model: [] for model in RERANKING_MODELS}
+    model_times = {model: 0.0 for model in RERANKING_MODELS}
+    surviving = list(RERANKING_MODELS)
+    if SUCCESSIVE_HALVING:
+        test_queries = query_order(test_queries)
+        rungs = halving_rungs(len(test_queries))
+        print(f"Successive halving: query budget per round {rungs}")
+    else:
+        rungs = [len(test_queries)]
+
+    round_start = 0
+    for round_number, round_end in enumerate(rungs, 1):
+        round_queries = test_queries[round_start:round_end]
+        if len(rungs) > 1:
+            print(f"\n=== Round {round_number}/{len(rungs)}: {len(surviving)} models × {len(round_queries)} queries ===")
+
+        for model_idx, model in enumerate(surviving, 1):
+            print(f"\n[{model_idx}/{len(surviving)}] Testing Model: {model}")
+            print("-" * 100)
+
+            # Ollama loads models on first use and unloads idle ones, so warm up
+            # every round; otherwise load time counts against the first query
+            warm_up(model, round_queries[0])
+            model_start_time = time.time()
+
+            for query_idx, query_data in enumerate(round_queries, 1):
+                result = test_query(model, query_data)
+                results_by_model[model].append(result)
+                all_results.append(result)
+
+                # Small delay between queries
+                if query_idx < len(round_queries):
+                    time.sleep(0.2)
+
+            model_elapsed = time.time() - model_start_time
+            model_times[model] += model_elapsed
+
+            # Print model summary
+            print_model_summary(model, results_by_model[model])
+            print(f"  Total Time: {model_elapsed:.2f}s")
+
+            # Save intermediate results after each model
+            save_to_csv(all_results, RESULTS_FILE)
+
+            # Longer delay between models to prevent overheating
+            if model_idx < len(surviving):
+                time.sleep(1.0)
+
+        if round_end < len(test_queries):
+            survivors, eliminated = select_survivors(results_by_model, surviving, round_number)
+            for model, reason in eliminated.items():
+                mark_eliminated(results_by_model[model], reason)
+                print(f"  ✂ Eliminated {model} ({reason})")
+            surviving = survivors
+        round_start = round_end
+
+    # Group results by model and save the final elimination flags
+    all_results = [r for model in RERANKING_MODELS for r in results_by_model[model]]
+    save_to_csv(all_results, RESULTS_FILE)
+
+    # Store summaries
+    for model in RERANKING_MODELS:
+        successful = [r for r in results_by_model[model] if r['success']]
         if successful:
             correct = sum(1 for r in successful if r['correct_answer'])
             accuracy = 100 * correct / len(successful)
@@ -306,16 +326,10 @@ def main():
                 'total': len(successful),
                 'avg_time': avg_time,
                 'avg_score': avg_score,
-                'total_time': model_elapsed
+                'total_time': model_times[model],
+                'eliminated_early': results_by_model[model][0]['eliminated_early']
             })
 
-        # Save intermediate results after each model
-        save_to_csv(all_results, RESULTS_FILE)
-
-        # Longer delay between models to prevent overheating
-        if model_idx < len(RERANKING_MODELS):
-            time.sleep(1.0)
-
     # Final Summary
     print("\n" + "=" * 100)
     print("COMPREHENSIVE TEST COMPLETED")
@@ -338,7 +352,7 @@ def main():
         print("-" * 100)
 
         for rank, summary in enumerate(sorted_summaries[:20], 1):  # Top 20
-            model_short = summary['model'].replace(':latest', '')
+            model_short = summary['model'].replace(':latest', '') + (' ✂' if summary['eliminated_early'] else '')
             accuracy_str = f"{summary['correct']}/{summary['total']} ({summary['accuracy']:.1f}%)"
             print(f"{rank:<6} {model_short:<50} {accuracy_str:<15} {summary['avg_score']:<12.4f} {summary['avg_time']:<12.3f}s")
 
@@ -353,10 +367,13 @@ def main():
         print("-" * 100)
 
         for rank, summary in enumerate(sorted_by_speed[:20], 1):  # Top 20
-            model_short = summary['model'].replace(':latest', '')
+            model_short = summary['model'].replace(':latest', '') + (' ✂' if summary['eliminated_early'] else '')
             accuracy_str = f"{summary['correct']}/{summary['total']} ({summary['accuracy']:.1f}%)"
             print(f"{rank:<6} {model_short:<50} {summary['avg_time']:<12.3f}s {accuracy_str:<15}")
 
+        if any(summary['eliminated_early'] for summary in model_summaries):
+            print("\n✂ = eliminated early by successive halving (ranked on fewer queries)")
+
     print(f"\n{'=' * 100}")
     print(f"Full results saved to: {RESULTS_FILE}")
     print("=" * 100)
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Interleaved model testing.
+
+test_all_models.py measures one model after another over about ten minutes,
+so drift in the machine (turbo, thermal throttling, noisy neighbours) shows
+up as differences between models. This mode keeps a group of models up at
+once, each on its own port and cores, and sends every query to all of them
+in randomized order (interleaved.py), over several rounds. CPU frequency and
+load average are sampled during each group; groups whose environment drifted
+beyond the thresholds in environment_monitor.py are flagged.
+
+Writes test_results_interleaved.csv in the test_results.csv format plus a
+round column (one row per query and round), and interleaved_environment.csv
+with one row per group, including the threads each server ran with. Pinned servers get only their
+share of the cores, so these latencies are not comparable with a sequential
+test_all_models.py run: compare interleaved runs only with interleaved
+baselines in regression_tracker.py.
+
+Usage:
+    python test_interleaved.py bge-reranker-v2-m3-Q4_K_M ms-marco-MiniLM-L12-v2-Q4_K_M jina-reranker-v2-base-multilingual-Q4_K_M
+    python test_interleaved.py --group-size 3 --rounds 5          # every model, three at a time
+"""
+
+import argparse
+import csv
+from functools import partial
+
+from interleaved import run_interleaved, start_servers, stop_servers, warm_up
+from test_all_models import (
+    MODEL_DIR,
+    RESULT_FIELDS,
+    get_model_files,
+    load_test_queries,
+    test_model_with_query,
+    test_reranking,
+)
+from tokenization import TokenCounter
+
+# --- Configuration ---
+RESULTS_FILE = "test_results_interleaved.csv"
+ENVIRONMENT_FILE = "interleaved_environment.csv"
+GROUP_SIZE = 4  # Models up at the same time when no models are named
+ROUNDS = 3  # Passes over the query set per model
+
+def measure_model(server, query_index, query_data):
+    """One result row in the test_results.csv format."""
+    return test_model_with_query(server['model_path'], query_data, token_counter=server['token_counter'],
+                                 rerank_fn=partial(test_reranking, url=server['url']))
+
+def save_results(results, filename=RESULTS_FILE):
+    """Save result rows to CSV file, with the round the slotted QueryResult has no column for."""
+    with open(filename, 'w', newline='', encoding='utf-8') as csvfile:
+        writer = csv.DictWriter(csvfile, fieldnames=RESULT_FIELDS + ['round'])
+        writer.writeheader()
+        writer.writerows(result.copy() for result in results)
+    print(f"\n✓ Results saved to {filename}")
+
+def save_environment(rows, filename=ENVIRONMENT_FILE):
+    """Save per-group environment summaries to CSV file."""
+    with open(filename, 'w', newline='', encoding='utf-8') as csvfile:
+        fieldnames = [
+            'group',
+            'models',
+            'samples',
+            'cpu_mhz_min',
+            'cpu_mhz_max',
+            'frequency_drift',
+            'load_min',
+            'load_max',
+            'load_idle',
+            'threads',
+            'drifted',
+            'reasons'
+        ]
+
+        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
+        writer.writeheader()
+        for row in rows:
+            writer.writerow({key: "; ".join(row['reasons']) if key == 'reasons' else row.get(key)
+                             for key in fieldnames})
+
+def main():
+    parser = argparse.ArgumentParser(description="Test models side by side with interleaved, randomized requests.")
+    parser.add_argument('models', nargs='*', help=f"Model files in {MODEL_DIR} whose name contains one of these")
+    parser.add_argument('--group-size', type=int, help=f"Models up at once (default: all named models, else {GROUP_SIZE})")
+    parser.add_argument('--rounds', type=int, default=ROUNDS)
+    parser.add_argument('--cpus-per-server', type=int)
+    args = parser.parse_args()
+
+    model_files = get_model_files()
+    if args.models:
+        model_files = [path for path in model_files if any(p in path.name for p in args.models)]
+    group_size = args.group_size or (len(model_files) if args.models else GROUP_SIZE)
+    if len(model_files) < 2 or group_size < 2:
+        parser.error("interleaving needs at least two models per group")
+    groups = [model_files[i:i + group_size] for i in range(0, len(model_files), group_size)]
+    test_queries = load_test_queries()
+
+    print("=" * 80)
+    print("INTERLEAVED MODEL TESTING")
+    print("=" * 80)
+    print(f"Models: {len(model_files)} in {len(groups)} group(s) of up to {group_size}, "
+          f"queries: {len(test_queries)}, rounds: {args.rounds}")
+    if len(groups) > 1:
+        print("⚠️  Groups still run one after another; compare models within a group")
+    print(f"⚠️  Servers share the cores, so compare {RESULTS_FILE} only with interleaved baselines, "
+          f"not with test_all_models.py runs")
+
+    all_results = []
+    environments = []
+    for group_idx, group in enumerate(groups, 1):
+        print(f"\n[Group {group_idx}/{len(groups)}] {', '.join(path.name for path in group)}")
+        print("-" * 80)
+        specs = [{'label': path.name, 'model_path': path} for path in group]
+        try:
+            servers = start_servers(specs, args.cpus_per_server)
+        except (RuntimeError, ValueError, OSError) as e:
+            print(f"✗ {e} - skipping group")
+            continue
+        try:
+            for server in servers:
+                server['token_counter'] = TokenCounter(f"http://localhost:{server['port']}")
+            warm_up(servers, test_queries)
+            results, environment = run_interleaved(servers, test_queries, args.rounds, measure=measure_model)
+            all_results.extend(results)
+            environments.append(dict(environment, group=group_idx, models=" ".join(path.name for path in group),
+                                     threads=" ".join(str(server['threads'] or 'default') for server in servers)))
+        finally:
+            stop_servers(servers)
+
+        # Save intermediate results after each group
+        save_results(all_results)
+        save_environment(environments)
+
+    drifted = [e for e in environments if e['drifted']]
+    print(f"\n✓ Environment log saved to {ENVIRONMENT_FILE}")
+    if drifted:
+        print(f"⚠️  {len(drifted)} of {len(environments)} group(s) ran in a drifting environment - "
+              f"re-run them before comparing: {', '.join(str(e['group']) for e in drifted)}")
+    else:
+        print("✅ Environment stable in every group")
+
+if __name__ == "__main__":
+    main()
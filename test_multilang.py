@@ -8,18 +8,48 @@ import requests
 import json
 import subprocess
 import time
-import csv
 from pathlib import Path
 from datetime import datetime
 from collections import defaultdict
+from memory_sampler import MemorySampler, memory_per_slot, samples_llama_server
+from tokenization import TokenCounter
+from degenerate_probe import probe_model
+from query_dataset import is_correct, load_queries
+from result_records import record_type, write_records
 
 # --- Configuration ---
 SERVER_URL = "http://localhost:8080/rerank"
 MODEL_DIR = Path.home() / "Documents" / "reranking-models"
 TEST_QUERIES_FILE = "test_queries_multilang.csv"
+CORPUS_PATH = None  # Corpus directory (corpus_store.py) for query files that list doc_ids
 PORT = 8080
 TIMEOUT_SECONDS = 30
 REQUEST_TIMEOUT = 60
+PROBE_ACTION = 'skip'  # 'skip' or 'flag' models failing the degenerate-output probe; None disables it
+# Command that serves the model; see record_replay.py to record or replay a run
+SERVER_COMMAND = ["llama-server"]
+
+# CSV columns in order; QueryResult keeps one slot per column
+RESULT_FIELDS = [
+    'model_name',
+    'model_size_mb',
+    'language',
+    'domain',
+    'query',
+    'success',
+    'response_time_seconds',
+    'correct_answer',
+    'scores_by_index',
+    'prompt_tokens',
+    'tokens_per_second',
+    'peak_rss_mb',
+    'steady_rss_mb',
+    'rss_per_slot_mb',
+    'probe_reason',
+    'timestamp'
+]
+QueryResult = record_type('QueryResult', RESULT_FIELDS,
+                          {'success': False, 'correct_answer': False})
 
 # Language codes
 LANGUAGES = {
@@ -32,20 +62,8 @@ LANGUAGES = {
 }
 
 def load_test_queries():
-    """Load multilingual test queries from CSV file."""
-    queries = []
-    with open(TEST_QUERIES_FILE, 'r', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            query_data = {
-                'language': row['language'],
-                'domain': row['domain'],
-                'query': row['query'],
-                'documents': [row['doc1'], row['doc2'], row['doc3'], row['doc4'], row['doc5']],
-                'correct_doc_index': int(row['correct_doc_index'])
-            }
-            queries.append(query_data)
-    return queries
+    """Load multilingual test queries (CSV, JSONL or Parquet; see query_dataset.py)."""
+    return load_queries(TEST_QUERIES_FILE, CORPUS_PATH)
 
 def get_model_files():
     """Get all .gguf model files from the models directory."""
@@ -53,8 +71,7 @@ def get_model_files():
 
 def start_server(model_path):
     """Start llama-server with the specified model."""
-    cmd = [
-        "llama-server",
+    cmd = SERVER_COMMAND + [
         "-m", str(model_path),
         "--port", str(PORT),
         "--rerank"
@@ -85,6 +102,15 @@ def wait_for_server(timeout=TIMEOUT_SECONDS):
 
     return False
 
+def get_total_slots():
+    """Get the number of parallel slots the server was started with."""
+    try:
+        response = requests.get(f"http://localhost:{PORT}/props", timeout=2)
+        response.raise_for_status()
+        return response.json().get('total_slots', 1)
+    except (requests.exceptions.RequestException, ValueError):
+        return 1
+
 def test_reranking(query, documents):
     """Test the reranking endpoint and return results."""
     payload = {
@@ -125,21 +151,25 @@ def stop_server(process):
 
     time.sleep(2)
 
-def test_model_with_query(model_path, query_data):
+def scores_by_index(sorted_results):
+    """Scores in document order, so runs of different models can be compared per document."""
+    scores = [None] * len(sorted_results)
+    for res in sorted_results:
+        scores[res['index']] = round(res['relevance_score'], 4)
+    return scores
+
+def test_model_with_query(model_path, query_data, token_counter=None):
     """Test a single model with a specific query."""
     model_name = model_path.name
-    correct_doc_index = query_data['correct_doc_index']
-
-    result = {
-        'model_name': model_name,
-        'model_size_mb': round(model_path.stat().st_size / (1024 * 1024), 2),
-        'language': query_data['language'],
-        'domain': query_data['domain'],
-        'success': False,
-        'response_time_seconds': None,
-        'correct_answer': False,
-        'timestamp': datetime.now().isoformat()
-    }
+
+    result = QueryResult(
+        model_name=model_name,
+        model_size_mb=round(model_path.stat().st_size / (1024 * 1024), 2),
+        language=query_data['language'],
+        domain=query_data['domain'],
+        query=query_data['query'],
+        timestamp=datetime.now().isoformat()
+    )
 
     try:
         sorted_results, elapsed_time = test_reranking(query_data['query'], query_data['documents'])
@@ -148,7 +178,8 @@ def test_model_with_query(model_path, query_data):
         result['response_time_seconds'] = round(elapsed_time, 3)
 
         top_result = sorted_results[0]
-        result['correct_answer'] = (top_result['index'] == correct_doc_index)
+        result['correct_answer'] = is_correct(query_data, top_result['index'])
+        result['scores_by_index'] = scores_by_index(sorted_results)
 
         correct_mark = "✓" if result['correct_answer'] else "✗"
         lang_name = LANGUAGES.get(query_data['language'], query_data['language'])
@@ -157,26 +188,37 @@ def test_model_with_query(model_path, query_data):
     except Exception as e:
         print(f"  ✗ [{query_data['language']}] {query_data['domain']}: Error - {e}")
 
+    # Tokenized after the timed request so /tokenize never adds to latency; a
+    # failed count leaves the token columns empty instead of failing the query
+    if token_counter is not None and result['success']:
+        try:
+            prompt_tokens = token_counter.prompt_tokens(query_data['query'], query_data['documents'])
+            result['prompt_tokens'] = prompt_tokens
+            if elapsed_time > 0:
+                result['tokens_per_second'] = round(prompt_tokens / elapsed_time, 1)
+        except (requests.exceptions.RequestException, KeyError, ValueError) as e:
+            print(f"  ⚠️  Token count unavailable: {e}")
+
     return result
 
+def failed_results(model_path, queries, probe_reason=None):
+    """Result rows for queries that were not run against the model."""
+    results = []
+    for query_data in queries:
+        results.append(QueryResult(
+            model_name=model_path.name,
+            model_size_mb=round(model_path.stat().st_size / (1024 * 1024), 2),
+            language=query_data['language'],
+            domain=query_data['domain'],
+            query=query_data['query'],
+            probe_reason=probe_reason,
+            timestamp=datetime.now().isoformat()
+        ))
+    return results
+
 def save_to_csv(results, filename='test_results_multilang.csv'):
     """Save results to CSV file."""
-    with open(filename, 'w', newline='', encoding='utf-8') as csvfile:
-        fieldnames = [
-            'model_name',
-            'model_size_mb',
-            'language',
-            'domain',
-            'success',
-            'response_time_seconds',
-            'correct_answer',
-            'timestamp'
-        ]
-
-        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-        writer.writeheader()
-        writer.writerows(results)
-
+    write_records(filename, results, RESULT_FIELDS, encoding='utf-8')
     print(f"\n✓ Results saved to {filename}")
 
 def main():
@@ -184,6 +226,9 @@ def main():
     print("=" * 80)
     print("MULTILINGUAL RERANKING MODEL TESTING SUITE")
     print("=" * 80)
+    if not samples_llama_server(SERVER_COMMAND):
+        print(f"⚠️  SERVER_COMMAND does not start llama-server directly ({Path(SERVER_COMMAND[0]).name}) - "
+              f"memory columns are left empty")
 
     # Load test queries
     test_queries = load_test_queries()
@@ -216,35 +261,56 @@ def main():
         print("-" * 80)
 
         process = None
+        sampler = None
+        total_slots = None
+        model_results = []
         try:
             process = start_server(model_path)
+            if samples_llama_server(SERVER_COMMAND):
+                sampler = MemorySampler(process.pid).start()
 
             if not wait_for_server():
                 print(f"✗ Server failed to start - skipping model")
-                for query_data in test_queries:
-                    result = {
-                        'model_name': model_path.name,
-                        'model_size_mb': round(model_path.stat().st_size / (1024 * 1024), 2),
-                        'language': query_data['language'],
-                        'domain': query_data['domain'],
-                        'success': False,
-                        'response_time_seconds': None,
-                        'correct_answer': False,
-                        'timestamp': datetime.now().isoformat()
-                    }
-                    all_results.append(result)
+                model_results = failed_results(model_path, test_queries)
                 continue
 
+            # Catch models that load but return constant, NaN or tied scores
+            probe_reason = None
+            if PROBE_ACTION:
+                probe_reason, probe_detail = probe_model(test_reranking)
+                if probe_reason:
+                    print(f"⚠ Pre-flight probe: {probe_reason} ({probe_detail})")
+                    if PROBE_ACTION == 'skip':
+                        model_results = failed_results(model_path, test_queries, probe_reason)
+                        continue
+
+            if sampler:
+                sampler.mark_loaded()
+            total_slots = get_total_slots()
+            token_counter = TokenCounter(f"http://localhost:{PORT}")
+
             # Test all queries with this model
             for query_idx, query_data in enumerate(test_queries, 1):
                 test_count += 1
-                result = test_model_with_query(model_path, query_data)
-                all_results.append(result)
+                result = test_model_with_query(model_path, query_data, token_counter)
+                result['probe_reason'] = probe_reason
+                model_results.append(result)
 
         except Exception as e:
             print(f"✗ Unexpected error: {e}")
 
         finally:
+            if sampler:
+                # Attached to every row, including rows of skipped or failed queries
+                memory = sampler.stop()
+                rss_per_slot = memory_per_slot(memory, total_slots)
+                print(f"  Memory: peak {memory['peak_rss_mb']} MB, steady {memory['steady_rss_mb']} MB, "
+                      f"{rss_per_slot} MB/slot ({total_slots or '?'} slots)")
+                for result in model_results:
+                    result['peak_rss_mb'] = memory['peak_rss_mb']
+                    result['steady_rss_mb'] = memory['steady_rss_mb']
+                    result['rss_per_slot_mb'] = rss_per_slot
+            all_results.extend(model_results)
             if process:
                 stop_server(process)
 
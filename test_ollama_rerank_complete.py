@@ -6,15 +6,46 @@ Tests all available reranking models across 10 domains with comprehensive analys
 
 import json
 import time
-import csv
 import subprocess
 from datetime import datetime
 from typing import List, Dict, Any
 
+from query_dataset import is_correct, load_queries
+from successive_halving import halving_rungs, mark_eliminated, query_order, select_survivors
+from result_records import record_type, write_records
+
 # --- Configuration ---
 OLLAMA_API_URL = "http://localhost:11434/api/rerank"
 TEST_QUERIES_FILE = "test_queries.csv"
+CORPUS_PATH = None  # Corpus directory (corpus_store.py) for query files that list doc_ids
 REQUEST_TIMEOUT = 120  # Timeout for reranking request
+SUCCESSIVE_HALVING = False  # Drop weak models early; see successive_halving.py for bounds
+
+# CSV columns in order; QueryResult keeps one slot per column
+RESULT_FIELDS = [
+    'model_name',
+    'model_size_mb',
+    'domain',
+    'query',
+    'correct_doc_index',
+    'success',
+    'response_time_seconds',
+    'top_score',
+    'top_document_index',
+    'top_document',
+    'correct_answer',
+    'rank_2_score',
+    'rank_3_score',
+    'rank_4_score',
+    'rank_5_score',
+    'all_scores',
+    'eliminated_early',
+    'elimination_reason',
+    'error',
+    'timestamp'
+]
+QueryResult = record_type('QueryResult', RESULT_FIELDS,
+                          {'success': False, 'correct_answer': False, 'eliminated_early': False})
 
 # Current available Ollama reranking models (updated list)
 OLLAMA_MODELS = [
@@ -50,23 +81,12 @@ OLLAMA_MODELS = [
 ]
 
 def load_test_queries() -> List[Dict[str, Any]]:
-    """Load test queries from CSV file (same as llama.cpp tests)."""
-    queries = []
+    """Load test queries (same loader as the llama.cpp tests)."""
     try:
-        with open(TEST_QUERIES_FILE, 'r', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                query_data = {
-                    'domain': row['domain'],
-                    'query': row['query'],
-                    'documents': [row['doc1'], row['doc2'], row['doc3'], row['doc4'], row['doc5']],
-                    'correct_doc_index': int(row['correct_doc_index'])
-                }
-                queries.append(query_data)
+        return load_queries(TEST_QUERIES_FILE, CORPUS_PATH)
     except FileNotFoundError:
         print(f"❌ {TEST_QUERIES_FILE} not found.")
         return []
-    return queries
 
 def test_ollama_rerank(model_name: str, query: str, documents: List[str]) -> Dict[str, Any]:
     """Test Ollama reranking API for a specific model."""
@@ -131,30 +151,24 @@ def test_ollama_rerank(model_name: str, query: str, documents: List[str]) -> Dic
             "response_time": 0
         }
 
-def test_model_with_query(model_name: str, query_data: Dict[str, Any]) -> Dict[str, Any]:
+def warm_up(model_name: str, query_data: Dict[str, Any]) -> None:
+    """Send one unmeasured request so the model load is not timed as a query."""
+    result = test_ollama_rerank(model_name, query_data['query'], query_data['documents'])
+    if not result['success']:
+        print(f"  ⚠️  Warm-up failed: {result['error']}")
+
+def test_model_with_query(model_name: str, query_data: Dict[str, Any]) -> QueryResult:
     """Test a single model with a specific query."""
     correct_doc_index = query_data['correct_doc_index']
 
-    result = {
-        'model_name': model_name,
-        'model_size_mb': 0,  # Will be extracted if needed
-        'domain': query_data['domain'],
-        'query': query_data['query'],
-        'correct_doc_index': correct_doc_index,
-        'success': False,
-        'error': None,
-        'response_time_seconds': None,
-        'top_score': None,
-        'top_document_index': None,
-        'top_document': None,
-        'correct_answer': False,
-        'rank_2_score': None,
-        'rank_3_score': None,
-        'rank_4_score': None,
-        'rank_5_score': None,
-        'all_scores': None,
-        'timestamp': datetime.now().isoformat()
-    }
+    result = QueryResult(
+        model_name=model_name,
+        model_size_mb=0,
+        domain=query_data['domain'],
+        query=query_data['query'],
+        correct_doc_index=correct_doc_index,
+        timestamp=datetime.now().isoformat()
+    )
 
     try:
         # Test reranking
@@ -178,7 +192,7 @@ def test_model_with_query(model_name: str, query_data: Dict[str, Any]) -> Dict[s
                     result['top_score'] = score
                     result['top_document_index'] = res['index']
                     result['top_document'] = query_data['documents'][res['index']]
-                    result['correct_answer'] = (res['index'] == correct_doc_index)
+                    result['correct_answer'] = is_correct(query_data, res['index'])
                 elif i == 1:
                     result['rank_2_score'] = score
                 elif i == 2:
@@ -204,40 +218,9 @@ def test_model_with_query(model_name: str, query_data: Dict[str, Any]) -> Dict[s
 
     return result
 
-def save_to_csv(results: List[Dict[str, Any]], filename: str) -> None:
+def save_to_csv(results: List[QueryResult], filename: str) -> None:
     """Save results to CSV file."""
-    with open(filename, 'w', newline='', encoding='utf-8') as csvfile:
-        fieldnames = [
-            'model_name',
-            'model_size_mb',
-            'domain',
-            'query',
-            'correct_doc_index',
-            'success',
-            'response_time_seconds',
-            'top_score',
-            'top_document_index',
-            'top_document',
-            'correct_answer',
-            'rank_2_score',
-            'rank_3_score',
-            'rank_4_score',
-            'rank_5_score',
-            'all_scores',
-            'error',
-            'timestamp'
-        ]
-
-        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-        writer.writeheader()
-
-        for result in results:
-            # Convert all_scores list to string for CSV
-            csv_result = result.copy()
-            if csv_result['all_scores']:
-                csv_result['all_scores'] = str(csv_result['all_scores'])
-            writer.writerow(csv_result)
-
+    write_records(filename, results, RESULT_FIELDS, encoding='utf-8')
     print(f"\n✓ Results saved to {filename}")
 
 def main():
@@ -273,52 +256,80 @@ def main():
     print(f"\n🎯 Total tests to run: {total_tests} ({len(OLLAMA_MODELS)} models × {len(test_queries)} queries)")
     print("=" * 100)
 
-    # Test each model with all queries
+    # Test each model, in successive-halving rounds when enabled
     all_results = []
     test_count = 0
-
-    for model_idx, model_name in enumerate(OLLAMA_MODELS, 1):
-        print(f"\n[🤖 Model {model_idx}/{len(OLLAMA_MODELS)}] Testing: {model_name}")
-        print("-" * 100)
-
-        model_results = []
-        model_start_time = time.time()
-
-        for query_idx, query_data in enumerate(test_queries, 1):
-            test_count += 1
-            progress = f"[{test_count}/{total_tests}]"
-            print(f"  {progress} Query: {query_data['domain']}")
-
-            result = test_model_with_query(model_name, query_data)
-            model_results.append(result)
-            all_results.append(result)
-
-            # Small delay between queries
-            time.sleep(0.1)
-
-        model_elapsed = time.time() - model_start_time
-
-        # Print model summary
-        successful = [r for r in model_results if r['success']]
-        if successful:
-            correct = sum(1 for r in successful if r['correct_answer'])
-            accuracy = 100 * correct / len(successful)
-            avg_time = sum(r['response_time_seconds'] for r in successful) / len(successful)
-
-            print(f"  📊 Model Summary: {correct}/{len(successful)} ({accuracy:.1f}% accuracy)")
-            print(f"  ⏱️  Average Time: {avg_time:.3f}s")
-        else:
-            print(f"  ❌ No successful tests for this model")
-
-        print(f"  ⏰ Total Time: {model_elapsed:.2f}s")
-
-        # Save intermediate results
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f'test_results_ollama_complete_{timestamp}.csv'
-        save_to_csv(all_results, filename)
-
-        # Delay between models
-        time.sleep(1.0)
+    results_by_model = {model_name: [] for model_name in OLLAMA_MODELS}
+    surviving = list(OLLAMA_MODELS)
+    if SUCCESSIVE_HALVING:
+        test_queries = query_order(test_queries)
+        rungs = halving_rungs(len(test_queries))
+        print(f"✂  Successive halving: query budget per round {rungs}")
+    else:
+        rungs = [len(test_queries)]
+
+    round_start = 0
+    for round_number, round_end in enumerate(rungs, 1):
+        round_queries = test_queries[round_start:round_end]
+        if len(rungs) > 1:
+            print(f"\n=== Round {round_number}/{len(rungs)}: {len(surviving)} models × {len(round_queries)} queries ===")
+
+        for model_idx, model_name in enumerate(surviving, 1):
+            print(f"\n[🤖 Model {model_idx}/{len(surviving)}] Testing: {model_name}")
+            print("-" * 100)
+
+            # Ollama loads models on first use and unloads idle ones, so warm up
+            # every round; otherwise load time counts against the first query
+            warm_up(model_name, round_queries[0])
+            model_start_time = time.time()
+
+            for query_idx, query_data in enumerate(round_queries, 1):
+                test_count += 1
+                progress = f"[{test_count}/{total_tests}]"
+                print(f"  {progress} Query: {query_data['domain']}")
+
+                result = test_model_with_query(model_name, query_data)
+                results_by_model[model_name].append(result)
+                all_results.append(result)
+
+                # Small delay between queries
+                time.sleep(0.1)
+
+            model_elapsed = time.time() - model_start_time
+
+            # Print model summary
+            successful = [r for r in results_by_model[model_name] if r['success']]
+            if successful:
+                correct = sum(1 for r in successful if r['correct_answer'])
+                accuracy = 100 * correct / len(successful)
+                avg_time = sum(r['response_time_seconds'] for r in successful) / len(successful)
+
+                print(f"  📊 Model Summary: {correct}/{len(successful)} ({accuracy:.1f}% accuracy)")
+                print(f"  ⏱️  Average Time: {avg_time:.3f}s")
+            else:
+                print(f"  ❌ No successful tests for this model")
+
+            print(f"  ⏰ Total Time: {model_elapsed:.2f}s")
+
+            # Save intermediate results
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            filename = f'test_results_ollama_complete_{timestamp}.csv'
+            save_to_csv(all_results, filename)
+
+            # Delay between models
+            time.sleep(1.0)
+
+        if round_end < len(test_queries):
+            survivors, eliminated = select_survivors(results_by_model, surviving, round_number)
+            for model_name, reason in eliminated.items():
+                mark_eliminated(results_by_model[model_name], reason)
+                print(f"  ✂ Eliminated {model_name} ({reason})")
+            surviving = survivors
+        round_start = round_end
+
+    # Group results by model and save the final elimination flags
+    all_results = [r for model_name in OLLAMA_MODELS for r in results_by_model[model_name]]
+    save_to_csv(all_results, filename)
 
     # Final Summary
     print("\n" + "=" * 100)
@@ -388,6 +399,14 @@ def main():
         for i, (model, avg_time, accuracy) in enumerate(fastest, 1):
             print(f"  {i:2d}. {model}: {avg_time:.3f}s - {accuracy:.1f}% accuracy")
 
+    eliminated_models = [model_name for model_name in OLLAMA_MODELS
+                         if results_by_model[model_name] and results_by_model[model_name][0]['eliminated_early']]
+    if eliminated_models:
+        print("\n--- ✂ Eliminated Early (not ranked on the full query set) ---")
+        for model_name in eliminated_models:
+            first = results_by_model[model_name][0]
+            print(f"  {model_name}: {len(results_by_model[model_name])} queries - {first['elimination_reason']}")
+
     print(f"\n{'=' * 100}")
     print(f"📁 Results saved to: {filename}")
     print("=" * 100)
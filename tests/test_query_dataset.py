@@ -0,0 +1,56 @@
+"""Datasets mixing inline documents and corpus doc_ids.
+
+Run with: python -m unittest discover tests
+"""
+
+import json
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from corpus_store import write_corpus  # noqa: E402
+from query_dataset import load_queries  # noqa: E402
+
+class MixedDatasetTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write_jsonl(self, records):
+        path = self.root / "queries.jsonl"
+        with open(path, 'w', encoding='utf-8') as f:
+            for record in records:
+                f.write(json.dumps(record) + "\n")
+        return path
+
+    def test_null_doc_ids_use_inline_documents(self):
+        path = self.write_jsonl([{"query": "q", "documents": ["a", "b"], "doc_ids": None, "correct_doc_index": 0}])
+        [query] = load_queries(path)
+        self.assertEqual(query['documents'], ["a", "b"])
+        self.assertNotIn('doc_ids', query)
+
+    def test_inline_and_corpus_rows(self):
+        write_corpus(self.root / "corpus", ["zero", "one", "two"]).close()
+        path = self.write_jsonl([
+            {"query": "inline", "documents": ["a", "b"], "correct_doc_index": 1},
+            {"query": "null ids", "documents": ["c", "d"], "doc_ids": None, "correct_doc_index": 0},
+            {"query": "corpus", "doc_ids": [2, 0], "correct_doc_index": 0},
+        ])
+        queries = load_queries(path, corpus=self.root / "corpus")
+        self.assertEqual([q['documents'] for q in queries], [["a", "b"], ["c", "d"], ["two", "zero"]])
+        self.assertEqual(queries[2]['doc_ids'], [2, 0])
+        self.assertEqual([q['correct_doc_index'] for q in queries], [1, 0, 0])
+
+    def test_doc_ids_without_corpus_fail(self):
+        path = self.write_jsonl([{"query": "corpus", "doc_ids": [0], "correct_doc_index": 0}])
+        with self.assertRaises(ValueError):
+            load_queries(path)
+
+if __name__ == "__main__":
+    unittest.main()
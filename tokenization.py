@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Server-side tokenization helpers.
+
+Uses llama-server's /tokenize endpoint so token counts match exactly what the
+loaded model sees. Tokenizers differ between models, so create one
+TokenCounter per server run. Token IDs can also be persisted on disk per
+vocabulary, so models sharing a tokenizer (e.g. the F16/Q8_0/Q4_K_M variants
+of one model) tokenize each text only once.
+"""
+
+import hashlib
+import json
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import requests
+
+REQUEST_TIMEOUT = 30
+TOKEN_CACHE_DIR = Path(".token_cache")
+
+# Mixed-script text whose tokenization differs between vocabularies
+VOCAB_PROBE_TEXT = (
+    "The quick brown fox jumps over the lazy dog. 1234567890 "
+    "Zürich café naïve — São Paulo. Привет мир. مرحبا بالعالم. 你好，世界。 <|sep|> [SEP] </s>"
+)
+
+def text_key(text: str) -> str:
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+def vocab_fingerprint(base_url: str, timeout: int = REQUEST_TIMEOUT) -> str:
+    """Identify a server's vocabulary by its metadata and a probe tokenization.
+
+    Quantization does not change the vocabulary, so all quants of one model
+    share a fingerprint.
+    """
+    base_url = base_url.rstrip('/')
+    meta = {}
+    try:
+        response = requests.get(f"{base_url}/v1/models", timeout=timeout)
+        response.raise_for_status()
+        model_meta = response.json()['data'][0].get('meta', {})
+        meta = {key: model_meta.get(key) for key in ['vocab_type', 'n_vocab']}
+    except (requests.exceptions.RequestException, KeyError, IndexError, ValueError):
+        pass  # Older servers: fall back to the probe tokenization alone
+
+    response = requests.post(
+        f"{base_url}/tokenize",
+        json={"content": VOCAB_PROBE_TEXT, "add_special": True},
+        timeout=timeout
+    )
+    response.raise_for_status()
+    meta['probe_tokens'] = response.json()['tokens']
+
+    return hashlib.sha256(json.dumps(meta, sort_keys=True).encode('utf-8')).hexdigest()[:16]
+
+class TokenIdCache:
+    """On-disk token ID store for one vocabulary, keyed by a hash of the text."""
+
+    def __init__(self, vocab_hash: str, cache_dir: Path = TOKEN_CACHE_DIR):
+        self.path = Path(cache_dir) / f"{vocab_hash}.json"
+        self.hits = 0
+        self.misses = 0
+        self._dirty = False
+        self._entries: Dict[str, List[int]] = {}
+        if self.path.exists():
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self._entries = json.load(f)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, text: str) -> Optional[List[int]]:
+        tokens = self._entries.get(text_key(text))
+        if tokens is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return tokens
+
+    def put(self, text: str, tokens: List[int]) -> None:
+        self._entries[text_key(text)] = tokens
+        self._dirty = True
+
+    def save(self) -> None:
+        if not self._dirty:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix('.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self._entries, f, separators=(',', ':'))
+        tmp_path.replace(self.path)
+        self._dirty = False
+
+class TokenCounter:
+    """Tokenize text through a running llama-server, caching results per text."""
+
+    def __init__(self, base_url: str, timeout: int = REQUEST_TIMEOUT, id_cache: Optional[TokenIdCache] = None):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.id_cache = id_cache
+        self._cache: Dict[str, List[int]] = {}
+
+    def tokenize(self, text: str) -> List[int]:
+        """Return the token IDs for a text, without special tokens."""
+        if text not in self._cache and self.id_cache is not None:
+            tokens = self.id_cache.get(text)
+            if tokens is not None:
+                self._cache[text] = tokens
+        if text not in self._cache:
+            response = requests.post(
+                f"{self.base_url}/tokenize",
+                json={"content": text, "add_special": False},
+                timeout=self.timeout
+            )
+            response.raise_for_status()
+            self._cache[text] = response.json()['tokens']
+            if self.id_cache is not None:
+                self.id_cache.put(text, self._cache[text])
+        return self._cache[text]
+
+    def count(self, text: str) -> int:
+        return len(self.tokenize(text))
+
+    def prompt_tokens(self, query: str, documents: List[str]) -> int:
+        """Tokens processed by one /rerank call.
+
+        The server scores one (query, document) pair per document, so the
+        query is counted once per document. Separator tokens are not included.
+        """
+        query_tokens = self.count(query)
+        return sum(query_tokens + self.count(doc) for doc in documents)